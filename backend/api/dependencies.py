@@ -5,8 +5,10 @@ from jose import JWTError
 
 from core.database import get_db
 from core.security import decode_access_token
-from core.exceptions import UnauthorizedException
+from core.config import settings
+from core.exceptions import ForbiddenException, UnauthorizedException
 from repositories.user_repository import UserRepository
+from models import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
@@ -44,3 +46,7 @@ async def get_current_user(
     return user
 
 
+async def get_current_admin(current_user: User = Depends(get_current_user)):
+    if current_user.username not in settings.ADMIN_USERNAMES:
+        raise ForbiddenException("Admin permission required")
+    return current_user
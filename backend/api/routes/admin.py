@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+
+from core.exceptions import BadRequestException
+from core.rate_limit import limiter
+from services.bulk_export import BulkExportService
+from api.dependencies import get_current_admin
+from models import User
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+def get_bulk_export_service() -> BulkExportService:
+    return BulkExportService()
+
+
+@router.get("/exports/bulk")
+@limiter.limit("5/hour")
+def bulk_export(
+    request: Request,
+    start_week: int = Query(..., ge=1, le=40),
+    end_week: int = Query(..., ge=1, le=40),
+    format: str = Query("pdf", pattern="^(pdf|excel)$", description="pdf hoặc excel"),
+    current_user: User = Depends(get_current_admin),
+    service: BulkExportService = Depends(get_bulk_export_service),
+):
+    """
+    Export cả trường cuối kỳ: một ZIP gồm file của mọi lớp của mọi giáo viên
+    (thư mục theo giáo viên). ZIP được stream trong lúc các file đang render.
+    """
+    if start_week > end_week:
+        raise BadRequestException("start_week must not be greater than end_week")
+
+    filename = service.filename(format, start_week, end_week)
+    return StreamingResponse(
+        service.iter_zip(format, start_week, end_week),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, Path, Request
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from core.rate_limit import limiter
+from core.database import get_db
+from services.export_jobs import ExportJobService
+from api.dependencies import get_current_user
+from schemas import ExportJobCreate, ExportJobResponse
+from models import User
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+
+def get_export_job_service(db: Session = Depends(get_db)) -> ExportJobService:
+    return ExportJobService(db)
+
+
+@router.post("", response_model=ExportJobResponse, status_code=202)
+@limiter.limit("30/hour")
+def create_export_job(
+    request: Request,
+    job_data: ExportJobCreate,
+    current_user: User = Depends(get_current_user),
+    service: ExportJobService = Depends(get_export_job_service),
+):
+    """
+    Đưa export vào hàng đợi render nền. Yêu cầu giống hệt job đang chờ hoặc đã xong
+    trả về job cũ thay vì render lại. PDF nhận nhiều tuần và nhiều lớp (class_ids),
+    các nhóm tuần được render song song rồi ghép thành một file.
+    """
+    job = service.create_job(
+        current_user,
+        job_data.kind,
+        job_data.start_week,
+        job_data.end_week,
+        job_data.class_id,
+        job_data.class_ids,
+    )
+    return service.describe(job)
+
+
+@router.get("/{job_id}", response_model=ExportJobResponse)
+@limiter.limit("120/minute")
+def get_export_job(
+    request: Request,
+    job_id: str = Path(..., max_length=32),
+    current_user: User = Depends(get_current_user),
+    service: ExportJobService = Depends(get_export_job_service),
+):
+    return service.describe(service.get_job(current_user.id, job_id))
+
+
+@router.get("/{job_id}/download")
+@limiter.limit("60/hour")
+def download_export_job(
+    request: Request,
+    job_id: str = Path(..., max_length=32),
+    current_user: User = Depends(get_current_user),
+    service: ExportJobService = Depends(get_export_job_service),
+):
+    path, media_type, filename = service.get_result(current_user.id, job_id)
+    return FileResponse(path, media_type=media_type, filename=filename)
@@ -6,13 +6,19 @@ from api.dependencies import get_current_user, get_db
 from models import User, Holiday
 from schemas import HolidayCreate, HolidayResponse
 from core.logging_config import get_logger
-from utils.holidays import create_default_holidays
+from utils.holidays import create_default_holidays, invalidate_holiday_calendar
+from services.year_plan import year_plan_cache
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/holidays", tags=["Holidays"])
 
 
+def _invalidate_caches(user_id: int) -> None:
+    invalidate_holiday_calendar(user_id)
+    year_plan_cache.invalidate(user_id)
+
+
 @router.get("", response_model=list[HolidayResponse])
 def get_holidays(
     current_user: User = Depends(get_current_user),
@@ -24,6 +30,7 @@ def get_holidays(
     # Nếu không có ngày nghỉ và có yêu cầu tạo mặc định
     if not holidays and year:
         create_default_holidays(db, current_user.id, year)
+        _invalidate_caches(current_user.id)
         holidays = db.query(Holiday).filter(Holiday.user_id == current_user.id).all()
     
     return holidays
@@ -36,6 +43,7 @@ def create_default_holidays_for_user(
     db: Session = Depends(get_db),
 ):
     count = create_default_holidays(db, current_user.id, year)
+    _invalidate_caches(current_user.id)
     return {"message": f"Đã tạo {count} ngày nghỉ lễ mặc định", "count": count}
 
 
@@ -76,6 +84,7 @@ def create_holiday(
     db.add(new_holiday)
     db.commit()
     db.refresh(new_holiday)
+    _invalidate_caches(current_user.id)
     logger.info("Holiday created", holiday_id=new_holiday.id, user_id=current_user.id)
     return new_holiday
 
@@ -94,6 +103,7 @@ def delete_holiday(
     if holiday:
         db.delete(holiday)
         db.commit()
+        _invalidate_caches(current_user.id)
         logger.info("Holiday deleted", holiday_id=holiday_id, user_id=current_user.id)
     return None
 
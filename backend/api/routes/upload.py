@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Request
+from fastapi import APIRouter, Depends, UploadFile, File, Path, Request
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
@@ -6,25 +6,29 @@ from core.config import settings
 from core.rate_limit import limiter
 from core.database import get_db
 from core.exceptions import BadRequestException
-from services.excel_service import ExcelService
+from services.upload_jobs import UploadJobService
 from api.dependencies import get_current_user
+from schemas import UploadJobResponse
 from models import User
 
 router = APIRouter(prefix="/upload", tags=["File Upload"])
 
 
-def get_excel_service(db=Depends(get_db)) -> ExcelService:
-    return ExcelService(db)
+def get_upload_job_service(db=Depends(get_db)) -> UploadJobService:
+    return UploadJobService(db)
 
 
-@router.post("/tkb")
+@router.post("/tkb", response_model=UploadJobResponse, status_code=202)
 @limiter.limit("10/hour")
 def upload_tkb(
     request: Request,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
-    excel_service: ExcelService = Depends(get_excel_service),
+    upload_service: UploadJobService = Depends(get_upload_job_service),
 ):
+    """
+    Lưu file và trả về job ngay; parse và thay TKB chạy nền, theo dõi ở /upload/jobs/{id}
+    """
     if not file.filename or not file.filename.endswith((".xlsx", ".xls")):
         raise BadRequestException("File must be Excel format (.xlsx or .xls)")
     
@@ -33,18 +37,22 @@ def upload_tkb(
             f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE / 1024 / 1024}MB"
         )
     
-    result = excel_service.process_tkb_file(file, current_user.id)
-    return {"message": "TKB uploaded successfully", **result}
+    job = upload_service.create_job(current_user.id, "tkb", file)
+    return upload_service.describe(job)
 
 
-@router.post("/ctgd")
+@router.post("/ctgd", response_model=UploadJobResponse, status_code=202)
 @limiter.limit("10/hour")
 def upload_ctgd(
     request: Request,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
-    excel_service: ExcelService = Depends(get_excel_service),
+    upload_service: UploadJobService = Depends(get_upload_job_service),
 ):
+    """
+    Lưu file và trả về job ngay; parse và thay CTGD chạy nền, theo dõi ở /upload/jobs/{id}.
+    Dòng lỗi của file nằm trong result.errors khi job xong.
+    """
     if not file.filename or not file.filename.endswith((".xlsx", ".xls")):
         raise BadRequestException("File must be Excel format (.xlsx or .xls)")
     
@@ -53,6 +61,19 @@ def upload_ctgd(
             f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE / 1024 / 1024}MB"
         )
     
-    result = excel_service.process_ctgd_file(file, current_user.id)
-    return {"message": "CTGD uploaded successfully", **result}
+    job = upload_service.create_job(current_user.id, "ctgd", file)
+    return upload_service.describe(job)
 
+
+@router.get("/jobs/{job_id}", response_model=UploadJobResponse)
+@limiter.limit("120/minute")
+def get_upload_job(
+    request: Request,
+    job_id: str = Path(..., max_length=32),
+    current_user: User = Depends(get_current_user),
+    upload_service: UploadJobService = Depends(get_upload_job_service),
+):
+    """
+    Trạng thái và tiến độ (số dòng đã đọc / đã ghi) của một upload
+    """
+    return upload_service.describe(upload_service.get_job(current_user.id, job_id))
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, Path, Request, Query
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import Response, StreamingResponse
 from typing import List
 from slowapi import Limiter
 from slowapi.util import get_remote_address
@@ -7,12 +7,15 @@ from sqlalchemy.orm import Session
 
 from core.rate_limit import limiter
 from core.database import get_db
-from core.exceptions import NotFoundException
+from core.exceptions import BadRequestException, NotFoundException
 from services.weekly_report_service import WeeklyReportService
 from services.export_service import ExportService
+from services.export_cache import ExportFile
+from services.preview_renderer import PREVIEW_CSS, PREVIEW_CSS_VERSION
+from services.row_export import ROW_EXPORT_FORMATS, RowExportService
 from api.dependencies import get_current_user
-from schemas import WeeklyLogCreate
-from models import User
+from schemas import WeeklyLogCreate, WeeklyReportPatch
+from models import Class, User
 
 router = APIRouter(prefix="/weekly-report", tags=["Weekly Report"])
 
@@ -21,35 +24,84 @@ def get_weekly_report_service(db: Session = Depends(get_db)) -> WeeklyReportServ
     return WeeklyReportService(db)
 
 
+@router.get("/lessons/search")
+@limiter.limit("120/minute")
+def search_lessons(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100, description="Từ khóa, không cần gõ dấu"),
+    subject_name: str = Query(None, description="Chỉ tìm trong một môn"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    weekly_service: WeeklyReportService = Depends(get_weekly_report_service),
+):
+    """
+    Tìm bài học theo tên, không phân biệt dấu (gõ "tieng viet" tìm được "Tiếng Việt")
+    """
+    lessons = weekly_service.search_lessons(current_user.id, q, subject_name, limit)
+    return {
+        "query": q,
+        "lessons": [
+            {
+                "subject_name": tp.subject_name,
+                "lesson_index": tp.lesson_index,
+                "lesson_name": tp.lesson_name,
+            }
+            for tp in lessons
+        ],
+    }
+
+
 @router.get("/lessons/{subject_name}")
 @limiter.limit("30/minute")
 def get_lessons_by_subject(
     request: Request,
     subject_name: str = Path(..., description="Tên môn học"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(None, ge=1, le=500, description="Bỏ trống để lấy tất cả"),
     current_user: User = Depends(get_current_user),
     weekly_service: WeeklyReportService = Depends(get_weekly_report_service),
 ):
     """
-    Lấy danh sách các tiết học của một môn học
+    Lấy danh sách các tiết học của một môn học, sắp xếp theo lesson_index
     """
-    teaching_programs = weekly_service.teaching_program_repo.get_by_user_id(current_user.id)
+    teaching_programs, total = weekly_service.teaching_program_repo.get_lessons_page(
+        current_user.id, subject_name, offset, limit
+    )
     lessons = [
         {
             "lesson_index": tp.lesson_index,
             "lesson_name": tp.lesson_name,
         }
         for tp in teaching_programs
-        if tp.subject_name == subject_name
     ]
-    # Sắp xếp theo lesson_index
-    lessons.sort(key=lambda x: x["lesson_index"])
-    return {"subject_name": subject_name, "lessons": lessons}
+    return {
+        "subject_name": subject_name,
+        "lessons": lessons,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+    }
 
 
 def get_export_service() -> ExportService:
     return ExportService()
 
 
+def get_row_export_service() -> RowExportService:
+    return RowExportService()
+
+
+def _download_response(export: ExportFile, media_type: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        export.chunks(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(export.size),
+        },
+    )
+
+
 @router.get("/preview")
 @limiter.limit("10/hour")
 def preview_all_weeks(
@@ -60,285 +112,67 @@ def preview_all_weeks(
     current_user: User = Depends(get_current_user),
     weekly_service: WeeklyReportService = Depends(get_weekly_report_service),
     export_service: ExportService = Depends(get_export_service),
-    db: Session = Depends(get_db),
 ):
     """
     Preview - Xem nhanh file Excel trong browser (không tải xuống)
     Trả về HTML để xem trong iframe hoặc tab mới
     """
-    from fastapi.responses import HTMLResponse
-    from datetime import datetime, timedelta
-    from utils.date_utils import get_week_dates, format_vietnamese_date
-    
     if start_week < 1 or end_week > 40 or start_week > end_week:
         raise NotFoundException("Invalid week range")
     
-    # Lấy thông tin class
-    from models import Class, WeeklyLog
-    reviewer_name = None
-    teacher_name = current_user.full_name
-    location = "Long Tiên"
-    
-    if class_id:
-        class_obj = db.query(Class).filter(Class.id == class_id, Class.user_id == current_user.id).first()
-        if class_obj:
-            reviewer_name = class_obj.reviewer_name
-            if class_obj.teacher_name:
-                teacher_name = class_obj.teacher_name
-            if class_obj.location:
-                location = class_obj.location
-    
-    # Lấy dữ liệu
-    timetables = weekly_service.timetable_repo.get_by_user_id(current_user.id)
-    teaching_programs = weekly_service.teaching_program_repo.get_by_user_id(current_user.id)
-    all_weekly_logs = []
-    for week in range(start_week, end_week + 1):
-        # Lấy logs theo class_id nếu có, nếu không thì lấy tất cả
-        if class_id:
-            logs = db.query(WeeklyLog).filter(
-                WeeklyLog.user_id == current_user.id,
-                WeeklyLog.week_number == week,
-                WeeklyLog.class_id == class_id
-            ).all()
-        else:
-            logs = weekly_service.weekly_log_repo.get_by_user_and_week(current_user.id, week)
-        all_weekly_logs.extend(logs)
-    
-    holidays = weekly_service.get_holidays_for_user(current_user.id)
-    
-    # Tạo HTML preview
-    html_content = f"""
-    <!DOCTYPE html>
-    <html lang="vi">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Preview - Tuần {start_week} đến {end_week}</title>
-        <style>
-            * {{
-                font-family: "Times New Roman", Times, serif;
-                color: #000000;
-            }}
-            body {{
-                font-family: "Times New Roman", Times, serif;
-                margin: 0;
-                padding: 20px;
-                background: #ffffff;
-                color: #000000;
-            }}
-            .container {{
-                background: #ffffff;
-                padding: 30px;
-                margin-bottom: 40px;
-                page-break-after: always;
-                color: #000000;
-            }}
-            .container:last-child {{
-                page-break-after: auto;
-            }}
-            .header {{
-                text-align: center;
-                margin-bottom: 25px;
-                color: #000000;
-            }}
-            .header h1 {{
-                font-size: 18px;
-                font-weight: bold;
-                margin: 0 0 10px 0;
-                text-transform: uppercase;
-                color: #000000;
-            }}
-            .header .week-info {{
-                font-size: 14px;
-                margin-top: 5px;
-                color: #000000;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-bottom: 30px;
-                font-size: 13px;
-                border: 2px solid #000000;
-            }}
-            th, td {{
-                border: 1px solid #000000;
-                padding: 8px 10px;
-                text-align: left;
-                vertical-align: top;
-                color: #000000;
-            }}
-            th {{
-                background-color: #e8e8e8;
-                color: #000000;
-                font-weight: bold;
-                text-align: center;
-                font-size: 13px;
-                border: 1px solid #000000;
-            }}
-            td {{
-                font-size: 12px;
-                color: #000000;
-                background-color: #ffffff;
-                border: 1px solid #000000;
-            }}
-            tr:nth-child(even) td {{
-                background-color: #ffffff;
-            }}
-            .day-cell {{
-                text-align: center;
-                font-weight: bold;
-                vertical-align: middle;
-            }}
-            .period-cell {{
-                text-align: center;
-                width: 50px;
-            }}
-            .lesson-cell {{
-                min-width: 300px;
-            }}
-            .integrated-cell {{
-                width: 150px;
-            }}
-            .signature-section {{
-                margin-top: 40px;
-                display: flex;
-                justify-content: space-between;
-                font-size: 12px;
-                color: #000000;
-            }}
-            .signature-left {{
-                text-align: left;
-                color: #000000;
-            }}
-            .signature-right {{
-                text-align: right;
-                color: #000000;
-            }}
-            .signature-line {{
-                margin-top: 50px;
-                border-top: 1px solid #000000;
-                padding-top: 5px;
-                text-align: center;
-                color: #000000;
-            }}
-        </style>
-    </head>
-    <body>
+    report = weekly_service.report_engine.build_report(
+        current_user, start_week, end_week, class_id
+    )
+    # Các tuần được dựng lần lượt trong lúc stream, byte đầu tiên không phụ thuộc số tuần
+    return StreamingResponse(
+        export_service.iter_preview_html(report),
+        media_type="text/html",
+    )
+
+
+@router.get("/preview.css")
+def preview_css(request: Request):
+    """
+    CSS của trang preview, tách riêng để trình duyệt cache thay vì gửi lại mỗi lần preview
     """
+    etag = f'"{PREVIEW_CSS_VERSION}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=PREVIEW_CSS, media_type="text/css", headers=headers)
+
+
+@router.get("/range")
+@limiter.limit("30/minute")
+def get_weekly_report_range(
+    request: Request,
+    start_week: int = Query(..., ge=1, le=40),
+    end_week: int = Query(..., ge=1, le=40),
+    class_id: int = Query(None, description="ID của lớp"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json hoặc ndjson"),
+    current_user: User = Depends(get_current_user),
+    service: WeeklyReportService = Depends(get_weekly_report_service),
+):
+    """
+    Lịch báo giảng nhiều tuần trong một request.
+    format=ndjson trả về mỗi tuần một dòng JSON để UI hiển thị dần từng tuần.
+    """
+    if start_week > end_week:
+        raise BadRequestException("start_week must not be greater than end_week")
     
-    # Tạo HTML cho mỗi tuần
-    for week_number in range(start_week, end_week + 1):
-        # Lấy week_logs theo class_id
-        week_logs = [log for log in all_weekly_logs if log.week_number == week_number]
-        
-        # Tính toán ngày bắt đầu và kết thúc tuần
-        week_start, week_end = get_week_dates(datetime.now().year, week_number)
-        data = export_service._build_report_data(
-            timetables, teaching_programs, week_logs, week_number, holidays
-        )
-        
-        html_content += f"""
-        <div class="container">
-            <div class="header">
-                <h1>LỊCH BÁO GIẢNG</h1>
-                <div class="week-info">
-                    <strong>TUẦN: {week_number}</strong><br/>
-                    Từ ngày: {week_start.strftime('%d/%m/%Y')} đến ngày: {week_end.strftime('%d/%m/%Y')}
-                </div>
-            </div>
-            <table>
-                <thead>
-                    <tr>
-                        <th style="width: 150px;">THỨ/NGÀY</th>
-                        <th style="width: 60px;">TIẾT</th>
-                        <th>TÊN BÀI DẠY</th>
-                        <th style="width: 120px;">Lồng ghép</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """
-        
-        # Tính toán rowspan cho mỗi ngày trước
-        day_rowspans = {}
-        current_day = None
-        day_start_idx = None
-        
-        for idx, row in enumerate(data[1:], start=1):
-            day_name = row[0] if row[0] else ""
-            if day_name and day_name != current_day:
-                if current_day is not None and day_start_idx is not None:
-                    # Lưu rowspan cho ngày trước
-                    periods_count = idx - day_start_idx
-                    day_rowspans[day_start_idx] = periods_count
-                current_day = day_name
-                day_start_idx = idx
-            elif not day_name and current_day:
-                # Tiếp tục ngày hiện tại
-                pass
-        
-        # Lưu rowspan cho ngày cuối
-        if current_day is not None and day_start_idx is not None:
-            periods_count = len(data) - day_start_idx
-            day_rowspans[day_start_idx] = periods_count
-        
-        # Tạo HTML với rowspan đã tính
-        current_day = None
-        row_idx = 1
-        
-        for row in data[1:]:
-            day_name = row[0] if row[0] else ""
-            subject_code = row[2] if len(row) > 2 else ""
-            lesson_name = row[3] if len(row) > 3 else ""
-            lesson_display = f"{subject_code} - {lesson_name}" if subject_code else lesson_name
-            notes = row[4] if len(row) > 4 else ""
-            
-            if day_name and day_name != current_day:
-                current_day = day_name
-                day_offset = int(day_name.split()[1]) - 2
-                day_date = week_start + timedelta(days=day_offset)
-                day_display = f"{day_name}<br/>{day_date.strftime('%d/%m/%Y')}"
-                rowspan = day_rowspans.get(row_idx, 5)
-                html_content += f"""
-                    <tr>
-                        <td rowspan="{rowspan}" class="day-cell">{day_display}</td>
-                        <td class="period-cell">{row[1]}</td>
-                        <td class="lesson-cell">{lesson_display}</td>
-                        <td class="integrated-cell">{notes}</td>
-                    </tr>
-                """
-            else:
-                html_content += f"""
-                    <tr>
-                        <td class="period-cell">{row[1]}</td>
-                        <td class="lesson-cell">{lesson_display}</td>
-                        <td class="integrated-cell">{notes}</td>
-                    </tr>
-                """
-            row_idx += 1
-        
-        html_content += """
-                </tbody>
-            </table>
-            <div class="signature-section">
-                <div class="signature-left">
-                    <div><strong>Duyệt của Tổ trưởng chuyên môn</strong></div>
-                    <div class="signature-line">""" + (reviewer_name or "") + """</div>
-                </div>
-                <div class="signature-right">
-                    <div>""" + location + """, ngày """ + str(datetime.now().day) + """ tháng """ + str(datetime.now().month) + """ năm """ + str(datetime.now().year) + """</div>
-                    <div style="margin-top: 10px;"><strong>GVPT</strong></div>
-                    <div class="signature-line">""" + teacher_name + """</div>
-                </div>
-            </div>
-        </div>
-        """
+    grids = service.get_weekly_grids(current_user.id, start_week, end_week, class_id)
     
-    html_content += """
-    </body>
-    </html>
-    """
+    if format == "ndjson":
+        return StreamingResponse(
+            (grid.to_json() + "\n" for grid in grids),
+            media_type="application/x-ndjson",
+        )
     
-    return HTMLResponse(content=html_content)
+    content = (
+        f'{{"start_week":{start_week},"end_week":{end_week},'
+        f'"weeks":[{",".join(grid.to_json() for grid in grids)}]}}'
+    )
+    return Response(content=content, media_type="application/json")
 
 
 @router.get("/{week_number}")
@@ -346,13 +180,15 @@ def preview_all_weeks(
 def get_weekly_report(
     request: Request,
     week_number: int = Path(..., ge=1, le=40),
+    class_id: int = Query(None, description="ID của lớp"),
     current_user: User = Depends(get_current_user),
     service: WeeklyReportService = Depends(get_weekly_report_service),
 ):
     if week_number < 1 or week_number > 40:
         raise NotFoundException("Week number must be between 1 and 40")
     
-    return service.generate_weekly_report(current_user.id, week_number)
+    grid = service.get_weekly_grid(current_user.id, week_number, class_id)
+    return Response(content=grid.to_json(), media_type="application/json")
 
 
 @router.post("/{week_number}/save")
@@ -367,36 +203,45 @@ def save_weekly_report(
     return service.save_weekly_report(current_user.id, week_number, [log.dict() for log in logs])
 
 
+@router.patch("/{week_number}")
+@limiter.limit("120/minute")
+def patch_weekly_report(
+    request: Request,
+    week_number: int = Path(..., ge=1, le=40),
+    patch: WeeklyReportPatch = ...,
+    current_user: User = Depends(get_current_user),
+    service: WeeklyReportService = Depends(get_weekly_report_service),
+):
+    """
+    Cập nhật từng ô (thứ, tiết) đã sửa; ô có deleted=true quay về theo TKB/CTGD
+    """
+    return service.patch_weekly_report(
+        current_user.id,
+        week_number,
+        [cell.dict() for cell in patch.cells],
+        patch.class_id,
+    )
+
+
 @router.get("/{week_number}/export/pdf")
 @limiter.limit("20/hour")
 def export_pdf(
     request: Request,
     week_number: int = Path(..., ge=1, le=40),
+    class_id: int = Query(None, description="ID của lớp"),
     current_user: User = Depends(get_current_user),
     weekly_service: WeeklyReportService = Depends(get_weekly_report_service),
     export_service: ExportService = Depends(get_export_service),
 ):
-    timetables, teaching_programs, weekly_logs = weekly_service.get_data_for_export(
-        current_user, week_number
+    weekly_service.ensure_default_holidays(current_user.id)
+    report = weekly_service.report_engine.build_report(
+        current_user, week_number, week_number, class_id
     )
     
-    holidays = weekly_service.get_holidays_for_user(current_user.id)
-    
-    # Tự động tạo ngày nghỉ lễ mặc định nếu chưa có
-    if not holidays:
-        from utils.holidays import create_default_holidays
-        from datetime import datetime
-        create_default_holidays(weekly_service.db, current_user.id, datetime.now().year)
-        holidays = weekly_service.get_holidays_for_user(current_user.id)
-    
-    pdf_path = export_service.export_pdf(
-        current_user, timetables, teaching_programs, weekly_logs, week_number, holidays
-    )
-    
-    return FileResponse(
-        pdf_path,
-        media_type="application/pdf",
-        filename=f"bao_giang_tuan_{week_number}.pdf",
+    return _download_response(
+        export_service.export_pdf(report),
+        "application/pdf",
+        f"bao_giang_tuan_{week_number}.pdf",
     )
 
 
@@ -409,29 +254,16 @@ def export_excel(
     current_user: User = Depends(get_current_user),
     weekly_service: WeeklyReportService = Depends(get_weekly_report_service),
     export_service: ExportService = Depends(get_export_service),
-    db: Session = Depends(get_db),
 ):
-    timetables, teaching_programs, weekly_logs = weekly_service.get_data_for_export(
-        current_user, week_number
+    weekly_service.ensure_default_holidays(current_user.id)
+    report = weekly_service.report_engine.build_report(
+        current_user, week_number, week_number, class_id
     )
     
-    holidays = weekly_service.get_holidays_for_user(current_user.id)
-    
-    # Tự động tạo ngày nghỉ lễ mặc định nếu chưa có
-    if not holidays:
-        from utils.holidays import create_default_holidays
-        from datetime import datetime
-        create_default_holidays(weekly_service.db, current_user.id, datetime.now().year)
-        holidays = weekly_service.get_holidays_for_user(current_user.id)
-    
-    excel_path = export_service.export_excel(
-        current_user, timetables, teaching_programs, weekly_logs, week_number, holidays, class_id, db
-    )
-    
-    return FileResponse(
-        excel_path,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename=f"bao_giang_tuan_{week_number}.xlsx",
+    return _download_response(
+        export_service.export_excel(report),
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        f"bao_giang_tuan_{week_number}.xlsx",
     )
 
 
@@ -445,7 +277,6 @@ def export_all_weeks(
     current_user: User = Depends(get_current_user),
     weekly_service: WeeklyReportService = Depends(get_weekly_report_service),
     export_service: ExportService = Depends(get_export_service),
-    db: Session = Depends(get_db),
 ):
     """
     Export - Tải xuống file Excel
@@ -453,29 +284,47 @@ def export_all_weeks(
     if start_week < 1 or end_week > 40 or start_week > end_week:
         raise NotFoundException("Invalid week range")
     
-    timetables = weekly_service.timetable_repo.get_by_user_id(current_user.id)
-    teaching_programs = weekly_service.teaching_program_repo.get_by_user_id(current_user.id)
-    all_weekly_logs = []
-    for week in range(start_week, end_week + 1):
-        logs = weekly_service.weekly_log_repo.get_by_user_and_week(current_user.id, week)
-        all_weekly_logs.extend(logs)
-    
-    holidays = weekly_service.get_holidays_for_user(current_user.id)
-    
-    # Tự động tạo ngày nghỉ lễ mặc định nếu chưa có
-    if not holidays:
-        from utils.holidays import create_default_holidays
-        from datetime import datetime
-        create_default_holidays(weekly_service.db, current_user.id, datetime.now().year)
-        holidays = weekly_service.get_holidays_for_user(current_user.id)
-    
-    excel_path = export_service.export_all_weeks_excel(
-        current_user, timetables, teaching_programs, all_weekly_logs, start_week, end_week, holidays, class_id, db
+    weekly_service.ensure_default_holidays(current_user.id)
+    report = weekly_service.report_engine.build_report(
+        current_user, start_week, end_week, class_id
     )
     
-    return FileResponse(
-        excel_path,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename=f"bao_giang_tuan_{start_week}_{end_week}.xlsx",
+    return _download_response(
+        export_service.export_all_weeks_excel(report),
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        f"bao_giang_tuan_{start_week}_{end_week}.xlsx",
     )
 
+
+@router.get("/export/rows")
+@limiter.limit("10/hour")
+def export_rows(
+    request: Request,
+    start_week: int = Query(..., ge=1, le=40),
+    end_week: int = Query(..., ge=1, le=40),
+    class_id: int = Query(None, description="ID của lớp, bỏ trống để lấy mọi lớp"),
+    format: str = Query("csv", pattern="^(csv|jsonl)$", description="csv hoặc jsonl"),
+    current_user: User = Depends(get_current_user),
+    weekly_service: WeeklyReportService = Depends(get_weekly_report_service),
+    row_export_service: RowExportService = Depends(get_row_export_service),
+):
+    """
+    Export cho hệ thống khác đọc: mỗi dòng một (tuần, ngày, tiết, lớp), CSV hoặc JSON Lines.
+    Stream từng tuần của từng lớp nên cả năm nhiều lớp vẫn dùng bộ nhớ cố định.
+    """
+    if start_week > end_week:
+        raise BadRequestException("start_week must not be greater than end_week")
+    # Kiểm tra trước khi stream: lỗi giữa chừng chỉ làm đứt file chứ không thành mã lỗi
+    if class_id is not None and not weekly_service.db.query(Class.id).filter(
+        Class.id == class_id, Class.user_id == current_user.id
+    ).first():
+        raise NotFoundException("Class", class_id)
+
+    weekly_service.ensure_default_holidays(current_user.id)
+    _, media_type = ROW_EXPORT_FORMATS[format]
+    filename = row_export_service.filename(format, start_week, end_week)
+    return StreamingResponse(
+        row_export_service.iter_export(format, current_user.id, start_week, end_week, class_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
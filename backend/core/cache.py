@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+import time
+
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class UserScopedCache:
+    """
+    LRU cache trong process, key là tuple bắt đầu bằng user_id để xóa theo user.
+    TTL giới hạn thời gian dữ liệu cũ khi DB bị sửa từ ngoài process (scripts, worker khác).
+    Mỗi user có một generation, tăng khi dữ liệu của user đổi: giá trị dựng xong sau khi
+    generation đã đổi (đọc DB trước lúc đổi) chỉ trả về cho người gọi, không lưu vào cache.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: int):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self._generations: Dict[Hashable, int] = {}
+        self._epoch = 0  # Tăng khi clear(), áp cho mọi user
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: Tuple[Hashable, ...], builder: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation(key[0])
+
+        value = builder()
+
+        with self._lock:
+            if self._generation(key[0]) != generation:
+                logger.debug("Cache entry discarded", cache=self.name, key=str(key))
+                return value
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        logger.debug("Cache entry built", cache=self.name, key=str(key))
+        return value
+
+    def entries_for(self, user_id: int) -> List[Tuple[Tuple, Any]]:
+        with self._lock:
+            return [(k, e[1]) for k, e in self._entries.items() if k[0] == user_id]
+
+    def _generation(self, user_id: Hashable) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(user_id, 0)
+
+    def mark_changed(self, user_id: int) -> None:
+        """
+        Dữ liệu của user vừa đổi nhưng entry đang có vẫn giữ (người gọi tự cập nhật chúng):
+        chỉ chặn lưu các giá trị đang dựng dở
+        """
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for key in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -28,7 +28,42 @@ class Settings(BaseSettings):
     LOG_FORMAT: str = "json"
     
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024
+    # Upload TKB/CTGD xử lý nền: file được lưu tạm trong UPLOAD_DIR tới khi xử lý xong,
+    # trạng thái job (bảng import_progress) xóa sau UPLOAD_JOB_TTL_HOURS
+    UPLOAD_DIR: str = "uploads"
+    UPLOAD_JOB_TTL_HOURS: int = 24
+    UPLOAD_INSERT_BATCH_SIZE: int = 1000  # Số dòng mỗi lần insert, tiến độ cập nhật sau mỗi lô
     
+    EXPORT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    EXPORT_SPOOL_MAX_BYTES: int = 8 * 1024 * 1024
+    
+    # Export chạy nền: file kết quả nằm trong EXPORT_DIR/jobs, xóa sau EXPORT_JOB_TTL_HOURS
+    EXPORT_DIR: str = "exports"
+    EXPORT_WORKERS: int = 2
+    EXPORT_JOB_TTL_HOURS: int = 24
+    EXPORT_MAX_ACTIVE_JOBS_PER_USER: int = 5
+    EXPORT_PDF_CHUNK_WEEKS: int = 4  # Số tuần mỗi process render một lần khi in PDF nhiều tuần
+    # Font TTF Unicode cho PDF (cần dấu tiếng Việt), Docker cài qua gói fonts-dejavu-core
+    PDF_FONT_PATH: str = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+    PDF_FONT_BOLD_PATH: str = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+    # "canvas": vẽ thẳng lưới cố định (nhanh), tuần không vừa một trang tự chuyển sang
+    # "platypus": layout đầy đủ của ReportLab
+    PDF_RENDERER: str = "canvas"
+    
+    # Export cả trường (ZIP) của admin: số file render trước chờ ghi vào ZIP
+    BULK_EXPORT_MAX_IN_FLIGHT: int = 4
+    
+    # Username có quyền admin (export cả trường); để trống thì không ai có quyền
+    ADMIN_USERNAMES: list[str] = []
+    
+    YEAR_PLAN_CACHE_SIZE: int = 256
+    YEAR_PLAN_CACHE_TTL_SECONDS: int = 300
+
+    # Năm học bắt đầu mặc định 1/9; ghi đè theo năm học, ví dụ {"2025-2026": "2025-09-05"}
+    SCHOOL_YEAR_START_MONTH: int = 9
+    SCHOOL_YEAR_START_DAY: int = 1
+    SCHOOL_YEAR_START_DATES: dict[str, str] = {}
+
     @classmethod
     def generate_secret_key(cls) -> str:
         return secrets.token_urlsafe(32)
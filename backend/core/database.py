@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import NullPool
@@ -58,6 +58,37 @@ def set_sqlite_pragma(dbapi_conn, connection_record):
     logger.debug("Database connection established")
 
 
+def ensure_columns() -> None:
+    """
+    create_all không thêm cột mới vào bảng đã tồn tại, thêm bù các cột còn thiếu.
+    Chỉ dùng cho cột nullable, không có giá trị mặc định phía database.
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                    f"{preparer.format_column(column)} {column.type.compile(dialect=engine.dialect)}"
+                )
+                logger.info("Column added", table=table.name, column=column.name)
+
+
+def ensure_indexes() -> None:
+    """
+    create_all không thêm index mới vào bảng đã tồn tại, tạo bù các index còn thiếu
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
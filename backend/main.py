@@ -3,11 +3,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from core.config import settings
-from core.database import Base, engine
+from core.database import Base, engine, ensure_columns, ensure_indexes
 from core.logging_config import setup_logging, get_logger
 from core.middleware import LoggingMiddleware, ExceptionHandlingMiddleware
 from core.rate_limit import setup_rate_limiting
-from api.routes import auth, upload, weekly_report, templates, classes, holidays
+from services.export_cache import export_cache
+from services.export_jobs import export_job_runner
+from services.pdf_renderer import get_pdf_styles
+from services.upload_jobs import recover_upload_jobs
+from api.routes import auth, upload, weekly_report, templates, classes, holidays, exports, admin
 
 logger = get_logger(__name__)
 
@@ -16,8 +20,14 @@ logger = get_logger(__name__)
 async def lifespan(app: FastAPI):
     setup_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
     Base.metadata.create_all(bind=engine)
+    ensure_columns()
+    ensure_indexes()
+    export_job_runner.recover()
+    recover_upload_jobs()
+    get_pdf_styles()
     logger.info("Application started", version=settings.VERSION)
     yield
+    export_job_runner.shutdown()
     logger.info("Application shutdown")
 
 
@@ -48,6 +58,8 @@ app.include_router(weekly_report.router, prefix=settings.API_V1_PREFIX)
 app.include_router(templates.router, prefix=settings.API_V1_PREFIX)
 app.include_router(classes.router, prefix=settings.API_V1_PREFIX)
 app.include_router(holidays.router, prefix=settings.API_V1_PREFIX)
+app.include_router(exports.router, prefix=settings.API_V1_PREFIX)
+app.include_router(admin.router, prefix=settings.API_V1_PREFIX)
 
 
 @app.get("/")
@@ -61,4 +73,8 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "version": settings.VERSION}
+    return {
+        "status": "healthy",
+        "version": settings.VERSION,
+        "export_cache": export_cache.stats(),
+    }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, Date
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Date, DateTime, Index
 from sqlalchemy.orm import relationship
 from core.database import Base
 
@@ -48,6 +48,10 @@ class TeachingProgram(Base):
     
     user = relationship("User", back_populates="teaching_programs")
     class_obj = relationship("Class", back_populates="teaching_programs")
+    
+    __table_args__ = (
+        Index("ix_teaching_programs_user_subject_lesson", "user_id", "subject_name", "lesson_index"),
+    )
 
 
 class Timetable(Base):
@@ -108,8 +112,41 @@ class ImportProgress(Base):
     row_index = Column(Integer, nullable=False)  # Hàng đang xử lý
     subject_name = Column(String, nullable=True)  # Môn học đang xử lý
     lesson_counter = Column(Integer, default=0)  # Số tiết đã import cho môn này
-    status = Column(String, default="in_progress")  # in_progress, completed, error
+    status = Column(String, default="in_progress")  # pending, in_progress, completed, error
     created_at = Column(Date, nullable=True)
     updated_at = Column(Date, nullable=True)
+    # Upload TKB/CTGD xử lý nền (dòng của script import không có job_id)
+    job_id = Column(String, nullable=True, index=True)  # uuid4 hex, không đoán được
+    kind = Column(String, nullable=True)  # tkb, ctgd
+    rows_parsed = Column(Integer, nullable=True)  # Số dòng hợp lệ đọc được từ file
+    rows_inserted = Column(Integer, nullable=True)
+    result = Column(Text, nullable=True)  # JSON kết quả trả về cho client (gồm lỗi từng dòng)
+    error = Column(Text, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    content_hash = Column(String(64), nullable=True)  # sha256 của file, upload lại y hệt thì bỏ qua
+
+    user = relationship("User")
+
+
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+    
+    id = Column(String, primary_key=True)  # uuid4 hex, không đoán được
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=True)
+    class_ids = Column(String, nullable=True)  # "3,1,2" khi in PDF nhiều lớp
+    kind = Column(String, nullable=False)  # pdf, excel, excel_all
+    start_week = Column(Integer, nullable=False)
+    end_week = Column(Integer, nullable=False)
+    content_key = Column(String, nullable=False)  # Hash nội dung, dùng để gộp job trùng
+    status = Column(String, nullable=False, default="pending")  # pending, completed, error
+    file_size = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
     
     user = relationship("User")
+    
+    __table_args__ = (
+        Index("ix_export_jobs_user_content_key", "user_id", "content_key"),
+    )
@@ -0,0 +1,95 @@
+import csv
+from io import StringIO
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy import Table, text
+from sqlalchemy.orm import Session
+
+# on_batch(số dòng đã nạp vào bảng tạm)
+BatchCallback = Callable[[int], None]
+
+
+def replace_user_rows(
+    db: Session,
+    table: Table,
+    user_id: int,
+    records: List[dict],
+    batch_size: int,
+    on_batch: Optional[BatchCallback] = None,
+) -> int:
+    """
+    Thay toàn bộ dòng của user trong table bằng records, không commit.
+
+    Dữ liệu được nạp trước vào bảng tạm (Postgres: COPY, SQLite: executemany theo lô),
+    sau đó xóa dòng cũ và INSERT ... SELECT từ bảng tạm. Xóa và chèn nằm chung transaction
+    của session nên người đọc chỉ thấy dữ liệu cũ hoặc mới, không bao giờ thấy bảng rỗng.
+    Trên SQLite bảng tạm nằm ở database temp nên lúc nạp chưa khóa ghi database chính.
+
+    Mọi record phải cùng bộ key; giá trị None không được hỗ trợ (COPY ghi thành chuỗi rỗng).
+    """
+    columns = list(records[0]) if records else []
+    staging = f"{table.name}_staging"
+    column_list = ", ".join(columns)
+
+    # Bảng tạm gắn với connection: lần chạy trước lỗi giữa chừng có thể còn sót lại
+    db.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+    if records:
+        db.execute(text(
+            f"CREATE TEMPORARY TABLE {staging} AS "
+            f"SELECT {column_list} FROM {table.name} WHERE 1 = 0"
+        ))
+        if db.get_bind().dialect.name == "postgresql":
+            _copy_into(db, staging, columns, records, batch_size, on_batch)
+        else:
+            _insert_into(db, staging, columns, records, batch_size, on_batch)
+
+    db.execute(table.delete().where(table.c.user_id == user_id))
+    if records:
+        db.execute(text(
+            f"INSERT INTO {table.name} ({column_list}) SELECT {column_list} FROM {staging}"
+        ))
+        db.execute(text(f"DROP TABLE {staging}"))
+    return len(records)
+
+
+def _insert_into(
+    db: Session,
+    staging: str,
+    columns: Sequence[str],
+    records: List[dict],
+    batch_size: int,
+    on_batch: Optional[BatchCallback],
+) -> None:
+    statement = text(
+        f"INSERT INTO {staging} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(':' + column for column in columns)})"
+    )
+    for start in range(0, len(records), batch_size):
+        db.execute(statement, records[start:start + batch_size])
+        if on_batch:
+            on_batch(min(start + batch_size, len(records)))
+
+
+def _copy_into(
+    db: Session,
+    staging: str,
+    columns: Sequence[str],
+    records: List[dict],
+    batch_size: int,
+    on_batch: Optional[BatchCallback],
+) -> None:
+    # COPY phải chạy trên chính connection (và transaction) của session
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    statement = f"COPY {staging} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    try:
+        for start in range(0, len(records), batch_size):
+            buffer = StringIO()
+            writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+            for record in records[start:start + batch_size]:
+                writer.writerow([record[column] for column in columns])
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            if on_batch:
+                on_batch(min(start + batch_size, len(records)))
+    finally:
+        cursor.close()
@@ -0,0 +1,86 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from models import ExportJob
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ExportJobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_by_user_and_id(self, user_id: int, job_id: str) -> Optional[ExportJob]:
+        return (
+            self.db.query(ExportJob)
+            .filter(ExportJob.user_id == user_id, ExportJob.id == job_id)
+            .first()
+        )
+
+    def get_by_content_key(self, user_id: int, content_key: str) -> List[ExportJob]:
+        return (
+            self.db.query(ExportJob)
+            .filter(ExportJob.user_id == user_id, ExportJob.content_key == content_key)
+            .order_by(ExportJob.created_at.desc())
+            .all()
+        )
+
+    def count_pending(self, user_id: int) -> int:
+        return (
+            self.db.query(ExportJob)
+            .filter(ExportJob.user_id == user_id, ExportJob.status == "pending")
+            .count()
+        )
+
+    def create(self, **values) -> ExportJob:
+        job = ExportJob(**values)
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        logger.info("Export job created", job_id=job.id, user_id=job.user_id, kind=job.kind)
+        return job
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        file_size: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        self.db.query(ExportJob).filter(ExportJob.id == job_id).update(
+            {
+                ExportJob.status: status,
+                ExportJob.file_size: file_size,
+                ExportJob.error: error,
+                ExportJob.finished_at: datetime.now(),
+            },
+            synchronize_session=False,
+        )
+        self.db.commit()
+
+    def fail_pending(self, error: str) -> int:
+        """
+        Job còn pending khi khởi động lại không còn process nào chạy nữa
+        """
+        count = (
+            self.db.query(ExportJob)
+            .filter(ExportJob.status == "pending")
+            .update(
+                {
+                    ExportJob.status: "error",
+                    ExportJob.error: error,
+                    ExportJob.finished_at: datetime.now(),
+                },
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return count
+
+    def delete_created_before(self, before: datetime) -> List[ExportJob]:
+        jobs = self.db.query(ExportJob).filter(ExportJob.created_at < before).all()
+        for job in jobs:
+            self.db.delete(job)
+        self.db.commit()
+        return jobs
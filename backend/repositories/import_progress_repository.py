@@ -0,0 +1,116 @@
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from models import ImportProgress
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Trạng thái của job upload chưa xong
+ACTIVE_STATUSES = ("pending", "in_progress")
+
+
+class ImportProgressRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_by_job_id(self, job_id: str) -> Optional[ImportProgress]:
+        return self.db.query(ImportProgress).filter(ImportProgress.job_id == job_id).first()
+
+    def get_by_user_and_job_id(self, user_id: int, job_id: str) -> Optional[ImportProgress]:
+        return (
+            self.db.query(ImportProgress)
+            .filter(ImportProgress.user_id == user_id, ImportProgress.job_id == job_id)
+            .first()
+        )
+
+    def has_active(self, user_id: int, kind: str) -> bool:
+        return (
+            self.db.query(ImportProgress.id)
+            .filter(
+                ImportProgress.user_id == user_id,
+                ImportProgress.kind == kind,
+                ImportProgress.status.in_(ACTIVE_STATUSES),
+            )
+            .first()
+            is not None
+        )
+
+    def get_last_completed(self, user_id: int, kind: str) -> Optional[ImportProgress]:
+        """
+        Upload thành công gần nhất, tức file đang là dữ liệu TKB/CTGD hiện tại của user
+        """
+        return (
+            self.db.query(ImportProgress)
+            .filter(
+                ImportProgress.user_id == user_id,
+                ImportProgress.kind == kind,
+                ImportProgress.status == "completed",
+            )
+            .order_by(ImportProgress.id.desc())
+            .first()
+        )
+
+    def create(self, **values) -> ImportProgress:
+        job = ImportProgress(**values)
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        logger.info("Upload job created", job_id=job.job_id, user_id=job.user_id, kind=job.kind)
+        return job
+
+    def update(self, job_id: str, **values) -> None:
+        values["updated_at"] = datetime.now().date()
+        self.db.query(ImportProgress).filter(ImportProgress.job_id == job_id).update(
+            {getattr(ImportProgress, key): value for key, value in values.items()},
+            synchronize_session=False,
+        )
+        self.db.commit()
+
+    def fail_active(self, error: str) -> int:
+        """
+        Job upload chưa xong khi khởi động lại không còn process nào xử lý nữa
+        """
+        count = (
+            self.db.query(ImportProgress)
+            .filter(
+                ImportProgress.job_id.isnot(None),
+                ImportProgress.status.in_(ACTIVE_STATUSES),
+            )
+            .update(
+                {
+                    ImportProgress.status: "error",
+                    ImportProgress.error: error,
+                    ImportProgress.finished_at: datetime.now(),
+                },
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return count
+
+    def delete_finished_before(self, before: datetime) -> List[str]:
+        """
+        Xóa job đã xong trước thời điểm before, trả về đường dẫn file tạm của chúng.
+        Giữ lại upload thành công gần nhất của mỗi user/loại để còn so hash khi upload lại.
+        """
+        last_completed = (
+            self.db.query(func.max(ImportProgress.id))
+            .filter(ImportProgress.job_id.isnot(None), ImportProgress.status == "completed")
+            .group_by(ImportProgress.user_id, ImportProgress.kind)
+        )
+        jobs = (
+            self.db.query(ImportProgress)
+            .filter(
+                ImportProgress.job_id.isnot(None),
+                ImportProgress.finished_at < before,
+                ImportProgress.id.notin_(last_completed),
+            )
+            .all()
+        )
+        paths = [job.file_path for job in jobs if job.file_path]
+        for job in jobs:
+            self.db.delete(job)
+        self.db.commit()
+        return paths
@@ -0,0 +1,196 @@
+from sqlalchemy import String, func, literal, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from models import TeachingProgram
+from core.logging_config import get_logger
+from utils.text_utils import (
+    VIETNAMESE_ACCENTED,
+    VIETNAMESE_PLAIN,
+    normalize_vietnamese,
+    search_tokens,
+)
+
+logger = get_logger(__name__)
+
+FTS_TABLE = "teaching_programs_fts"
+
+# None: chưa kiểm tra; False: SQLite build không có FTS5
+_fts_available: Optional[bool] = None
+
+
+class LessonSearchRepository:
+    """
+    Tìm bài học theo tên, không phân biệt hoa thường và dấu tiếng Việt, khớp theo tiền tố từ.
+    SQLite: bảng FTS5 chứa tên bài đã bỏ dấu, rowid = teaching_programs.id.
+    Postgres: LIKE trên translate(lower(lesson_name)) bỏ dấu, không cần extension unaccent.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def search(
+        self,
+        user_id: int,
+        query: str,
+        subject_name: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[TeachingProgram]:
+        tokens = search_tokens(query)
+        if not tokens:
+            return []
+
+        if self.dialect == "sqlite" and self._ensure_fts():
+            self._sync_user(user_id)
+            return self._search_fts(user_id, tokens, subject_name, limit)
+        if self.dialect == "postgresql":
+            return self._search_translate(user_id, tokens, subject_name, limit)
+        return self._search_python(user_id, tokens, subject_name, limit)
+
+    def reindex_user(self, user_id: int) -> int:
+        """
+        Dựng lại chỉ mục của user, gọi sau khi CTGD thay đổi. Không commit: chỉ mục mới
+        nằm chung transaction với CTGD mới, người gọi commit.
+        """
+        if self.dialect != "sqlite" or not self._ensure_fts():
+            return 0
+
+        rows = (
+            self.db.query(TeachingProgram.id, TeachingProgram.lesson_name)
+            .filter(TeachingProgram.user_id == user_id)
+            .all()
+        )
+        user_key = _user_key(user_id)
+        self.db.execute(
+            text(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN "
+                f"(SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match)"
+            ),
+            {"match": f"user_key:{user_key}"},
+        )
+        if rows:
+            self.db.execute(
+                text(
+                    f"INSERT INTO {FTS_TABLE} (rowid, user_key, lesson_name) "
+                    "VALUES (:id, :user_key, :lesson_name)"
+                ),
+                [
+                    {
+                        "id": row.id,
+                        "user_key": user_key,
+                        "lesson_name": normalize_vietnamese(row.lesson_name),
+                    }
+                    for row in rows
+                ],
+            )
+        logger.info("Lesson search index rebuilt", user_id=user_id, count=len(rows))
+        return len(rows)
+
+    def _ensure_fts(self) -> bool:
+        global _fts_available
+        if _fts_available is not None:
+            return _fts_available
+        exists = self.db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        if exists:
+            _fts_available = True
+            return True
+        # Tạo trong savepoint, không commit: có thể đang ở giữa transaction của người gọi
+        # (reindex_user khi thay CTGD). Bảng chỉ được nhớ là có sau khi đã commit thật.
+        try:
+            with self.db.begin_nested():
+                self.db.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                    "USING fts5(user_key, lesson_name, tokenize='unicode61')"
+                ))
+        except OperationalError:
+            logger.warning("SQLite FTS5 not available, lesson search falls back to Python")
+            _fts_available = False
+            return False
+        return True
+
+    def _sync_user(self, user_id: int) -> None:
+        # DB cũ hoặc CTGD được import bằng script: chỉ mục thiếu dòng thì dựng lại
+        indexed = self.db.execute(
+            text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"),
+            {"match": f"user_key:{_user_key(user_id)}"},
+        ).scalar()
+        total = (
+            self.db.query(func.count(TeachingProgram.id))
+            .filter(TeachingProgram.user_id == user_id)
+            .scalar()
+        )
+        if indexed != total:
+            # Đường đọc (search) tự dựng lại chỉ mục nên tự commit
+            self.reindex_user(user_id)
+            self.db.commit()
+
+    def _search_fts(
+        self, user_id: int, tokens: List[str], subject_name: Optional[str], limit: int
+    ) -> List[TeachingProgram]:
+        match = f"user_key:{_user_key(user_id)} AND " + " AND ".join(
+            f'lesson_name:"{token}"*' for token in tokens
+        )
+        statement = text(
+            "SELECT teaching_programs.* FROM teaching_programs "
+            f"JOIN {FTS_TABLE} ON {FTS_TABLE}.rowid = teaching_programs.id "
+            f"WHERE {FTS_TABLE} MATCH :match "
+            "AND (:subject_name IS NULL OR teaching_programs.subject_name = :subject_name) "
+            f"ORDER BY {FTS_TABLE}.rank, teaching_programs.lesson_index "
+            "LIMIT :limit"
+        )
+        return (
+            self.db.query(TeachingProgram)
+            .from_statement(statement)
+            .params(match=match, subject_name=subject_name, limit=limit)
+            .all()
+        )
+
+    def _search_translate(
+        self, user_id: int, tokens: List[str], subject_name: Optional[str], limit: int
+    ) -> List[TeachingProgram]:
+        plain_name = func.translate(
+            func.lower(TeachingProgram.lesson_name), VIETNAMESE_ACCENTED, VIETNAMESE_PLAIN
+        )
+        # Ký tự không phải chữ/số thành dấu cách, thêm dấu cách ở đầu: "% token%" khớp
+        # đầu từ, tách từ giống FTS5 và search_tokens
+        words = literal(" ", String) + func.regexp_replace(
+            plain_name, "[^[:alnum:]]+", " ", "g", type_=String
+        )
+        query = self.db.query(TeachingProgram).filter(TeachingProgram.user_id == user_id)
+        if subject_name:
+            query = query.filter(TeachingProgram.subject_name == subject_name)
+        for token in tokens:
+            query = query.filter(words.like(f"% {_escape_like(token)}%", escape="\\"))
+        return (
+            query.order_by(TeachingProgram.subject_name, TeachingProgram.lesson_index)
+            .limit(limit)
+            .all()
+        )
+
+    def _search_python(
+        self, user_id: int, tokens: List[str], subject_name: Optional[str], limit: int
+    ) -> List[TeachingProgram]:
+        query = self.db.query(TeachingProgram).filter(TeachingProgram.user_id == user_id)
+        if subject_name:
+            query = query.filter(TeachingProgram.subject_name == subject_name)
+        results = []
+        for program in query.order_by(TeachingProgram.subject_name, TeachingProgram.lesson_index):
+            words = search_tokens(program.lesson_name)
+            if all(any(word.startswith(token) for word in words) for token in tokens):
+                results.append(program)
+                if len(results) >= limit:
+                    break
+        return results
+
+
+def _user_key(user_id: int) -> str:
+    return f"u{user_id}"
+
+
+def _escape_like(token: str) -> str:
+    return token.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
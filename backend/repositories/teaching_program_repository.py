@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from models import TeachingProgram
+from repositories.bulk_replace import BatchCallback, replace_user_rows
+from core.config import settings
 from core.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -17,6 +19,26 @@ class TeachingProgramRepository:
             .all()
         )
     
+    def get_lessons_page(
+        self,
+        user_id: int,
+        subject_name: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[TeachingProgram], int]:
+        """
+        Bài học của một môn theo thứ tự tiết, dùng index (user_id, subject_name, lesson_index)
+        """
+        query = self.db.query(TeachingProgram).filter(
+            TeachingProgram.user_id == user_id,
+            TeachingProgram.subject_name == subject_name,
+        )
+        total = query.count()
+        page = query.order_by(TeachingProgram.lesson_index).offset(offset)
+        if limit is not None:
+            page = page.limit(limit)
+        return page.all(), total
+    
     def get_by_subject_and_lesson(
         self, user_id: int, subject_name: str, lesson_index: int
     ) -> Optional[TeachingProgram]:
@@ -30,6 +52,9 @@ class TeachingProgramRepository:
             .first()
         )
     
+    def count_by_user_id(self, user_id: int) -> int:
+        return self.db.query(TeachingProgram).filter(TeachingProgram.user_id == user_id).count()
+    
     def delete_by_user_id(self, user_id: int) -> int:
         count = (
             self.db.query(TeachingProgram)
@@ -46,5 +71,23 @@ class TeachingProgramRepository:
         self.db.commit()
         logger.info("Teaching programs created", count=len(db_programs))
         return db_programs
-
-
+    
+    def replace_by_user_id(
+        self,
+        user_id: int,
+        programs: List[dict],
+        on_batch: Optional[BatchCallback] = None,
+    ) -> int:
+        """
+        Thay toàn bộ CTGD của user qua bảng tạm trong một transaction; người gọi commit
+        """
+        count = replace_user_rows(
+            self.db,
+            TeachingProgram.__table__,
+            user_id,
+            programs,
+            settings.UPLOAD_INSERT_BATCH_SIZE,
+            on_batch,
+        )
+        logger.info("Teaching programs replaced", user_id=user_id, count=count)
+        return count
@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from models import Timetable
+from repositories.bulk_replace import BatchCallback, replace_user_rows
+from core.config import settings
 from core.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -26,6 +28,9 @@ class TimetableRepository:
             .first()
         )
     
+    def count_by_user_id(self, user_id: int) -> int:
+        return self.db.query(Timetable).filter(Timetable.user_id == user_id).count()
+    
     def delete_by_user_id(self, user_id: int) -> int:
         count = self.db.query(Timetable).filter(Timetable.user_id == user_id).delete()
         self.db.commit()
@@ -38,5 +43,23 @@ class TimetableRepository:
         self.db.commit()
         logger.info("Timetables created", count=len(db_timetables))
         return db_timetables
-
-
+    
+    def replace_by_user_id(
+        self,
+        user_id: int,
+        timetables: List[dict],
+        on_batch: Optional[BatchCallback] = None,
+    ) -> int:
+        """
+        Thay toàn bộ TKB của user qua bảng tạm trong một transaction; người gọi commit
+        """
+        count = replace_user_rows(
+            self.db,
+            Timetable.__table__,
+            user_id,
+            timetables,
+            settings.UPLOAD_INSERT_BATCH_SIZE,
+            on_batch,
+        )
+        logger.info("Timetables replaced", user_id=user_id, count=count)
+        return count
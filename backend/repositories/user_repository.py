@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 from models import User
 from core.exceptions import NotFoundException, ConflictException
 from core.logging_config import get_logger
@@ -20,6 +20,9 @@ class UserRepository:
     def get_first_user(self) -> Optional[User]:
         return self.db.query(User).first()
     
+    def get_all(self) -> List[User]:
+        return self.db.query(User).order_by(User.id).all()
+    
     def create(self, user_data: dict) -> User:
         existing_user = self.get_by_username(user_data["username"])
         if existing_user:
@@ -1,5 +1,6 @@
+from sqlalchemy import or_, tuple_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from models import WeeklyLog
 from core.logging_config import get_logger
 
@@ -11,16 +12,32 @@ class WeeklyLogRepository:
         self.db = db
     
     def get_by_user_and_week(
-        self, user_id: int, week_number: int
+        self, user_id: int, week_number: int, class_id: Optional[int] = None
     ) -> List[WeeklyLog]:
-        return (
-            self.db.query(WeeklyLog)
-            .filter(
-                WeeklyLog.user_id == user_id,
-                WeeklyLog.week_number == week_number,
-            )
-            .all()
+        query = self.db.query(WeeklyLog).filter(
+            WeeklyLog.user_id == user_id,
+            WeeklyLog.week_number == week_number,
         )
+        return self._filter_class(query, class_id).all()
+    
+    def get_by_user(
+        self, user_id: int, class_id: Optional[int] = None
+    ) -> List[WeeklyLog]:
+        query = self.db.query(WeeklyLog).filter(WeeklyLog.user_id == user_id)
+        return self._filter_class(query, class_id).all()
+    
+    def get_by_user_and_week_range(
+        self,
+        user_id: int,
+        start_week: int,
+        end_week: int,
+        class_id: Optional[int] = None,
+    ) -> List[WeeklyLog]:
+        query = self.db.query(WeeklyLog).filter(
+            WeeklyLog.user_id == user_id,
+            WeeklyLog.week_number.between(start_week, end_week),
+        )
+        return self._filter_class(query, class_id).all()
     
     def delete_by_user_and_week(self, user_id: int, week_number: int) -> int:
         count = (
@@ -46,5 +63,79 @@ class WeeklyLogRepository:
         self.db.commit()
         logger.info("Weekly logs created", count=len(db_logs))
         return db_logs
+    
+    def apply_cell_changes(
+        self,
+        user_id: int,
+        week_number: int,
+        class_id: Optional[int],
+        upserts: Dict[Tuple[int, int], dict],
+        deletes: List[Tuple[int, int]],
+    ) -> Dict[str, int]:
+        """
+        Ghi các ô (day_of_week, period_index) bị sửa trong một transaction:
+        cập nhật dòng đã có, thêm dòng mới, xóa dòng của ô bị xóa. Các ô khác không bị động tới.
+        """
+        slots = list(upserts) + list(deletes)
+        query = self.db.query(WeeklyLog).filter(
+            WeeklyLog.user_id == user_id,
+            WeeklyLog.week_number == week_number,
+            tuple_(WeeklyLog.day_of_week, WeeklyLog.period_index).in_(slots),
+        )
+        if class_id is None:
+            query = query.filter(WeeklyLog.class_id.is_(None))
+        else:
+            query = query.filter(WeeklyLog.class_id == class_id)
+
+        existing: Dict[Tuple[int, int], List[WeeklyLog]] = {}
+        for log in query.order_by(WeeklyLog.id).all():
+            existing.setdefault((log.day_of_week, log.period_index), []).append(log)
+
+        counts = {"created": 0, "updated": 0, "deleted": 0}
+        try:
+            for slot, values in upserts.items():
+                rows = existing.get(slot, [])
+                if rows:
+                    for key, value in values.items():
+                        setattr(rows[0], key, value)
+                    counts["updated"] += 1
+                    # Dữ liệu cũ có thể có nhiều dòng cho cùng một ô
+                    for duplicate in rows[1:]:
+                        self.db.delete(duplicate)
+                else:
+                    self.db.add(WeeklyLog(
+                        user_id=user_id,
+                        class_id=class_id,
+                        week_number=week_number,
+                        day_of_week=slot[0],
+                        period_index=slot[1],
+                        **values,
+                    ))
+                    counts["created"] += 1
 
+            for slot in deletes:
+                for row in existing.get(slot, []):
+                    self.db.delete(row)
+                    counts["deleted"] += 1
 
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        logger.info(
+            "Weekly log cells applied",
+            user_id=user_id,
+            week_number=week_number,
+            class_id=class_id,
+            **counts,
+        )
+        return counts
+    
+    def _filter_class(self, query, class_id: Optional[int]):
+        if class_id is None:
+            return query
+        # Log không gắn lớp áp dụng cho mọi lớp
+        return query.filter(
+            or_(WeeklyLog.class_id == class_id, WeeklyLog.class_id.is_(None))
+        )
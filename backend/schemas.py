@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
 
 
 class UserBase(BaseModel):
@@ -142,3 +143,52 @@ class WeeklyLogResponse(WeeklyLogBase):
     class Config:
         from_attributes = True
 
+
+class WeeklyLogCellUpdate(BaseModel):
+    day_of_week: int = Field(..., ge=2, le=6)
+    period_index: int = Field(..., ge=1, le=5)
+    subject_name: str = ""
+    lesson_name: str = ""
+    notes: Optional[str] = None
+    deleted: bool = Field(False, description="Xóa ô đã sửa, quay về theo TKB/CTGD")
+
+
+class WeeklyReportPatch(BaseModel):
+    class_id: Optional[int] = None
+    cells: List[WeeklyLogCellUpdate] = Field(..., min_length=1, max_length=25)
+
+
+class ExportJobCreate(BaseModel):
+    kind: str = Field(..., pattern="^(pdf|excel|excel_all)$", description="pdf, excel (một tuần) hoặc excel_all")
+    start_week: int = Field(..., ge=1, le=40)
+    end_week: int = Field(..., ge=1, le=40)
+    class_id: Optional[int] = None
+    class_ids: Optional[List[int]] = Field(None, min_length=1, max_length=50, description="Chỉ cho PDF: in nhiều lớp trong một file")
+
+
+class ExportJobResponse(BaseModel):
+    id: str
+    kind: str
+    start_week: int
+    end_week: int
+    class_id: Optional[int] = None
+    class_ids: Optional[List[int]] = None
+    status: str  # pending, running, completed, error
+    progress: int = 0  # Phần trăm
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class UploadJobResponse(BaseModel):
+    id: str
+    kind: str  # tkb, ctgd
+    status: str  # pending, in_progress, completed, error
+    rows_parsed: int = 0  # Số dòng hợp lệ đọc được từ file
+    rows_inserted: int = 0
+    progress: int = 0  # Phần trăm
+    result: Optional[Dict[str, Any]] = None  # records_processed, lỗi từng dòng của CTGD, unchanged
+    error: Optional[str] = None
+    created_at: date
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Benchmark đọc file upload: cách cũ (pd.read_excel rồi df.iterrows từng dòng) so với
+openpyxl read_only + parse vector hoá (services.excel_import), cho TKB và CTGD.
+Kiểm tra luôn hai cách cho cùng kết quả.
+
+Không cần database: workbook được sinh ngẫu nhiên trong bộ nhớ, gồm TKB bình thường,
+TKB rất nhiều dòng, workbook nhiều sheet (TKB ở sheet đầu, các sheet sau là dữ liệu khác)
+và CTGD nhiều kích thước (có dòng lỗi) để xem thời gian có tăng tuyến tính không.
+
+Thời gian đọc workbook (openpyxl) và parse được in riêng; cột cuối là tỉ lệ tổng cũ/mới.
+
+Chạy: python scripts/benchmark_excel_import.py [--rows 20000] [--sheets 20] [--ctgd-rows 1000 10000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pandas as pd
+from openpyxl import Workbook
+
+from services.excel_import import CTGD_REQUIRED_COLUMNS, parse_ctgd, parse_tkb, read_first_sheet
+
+DAYS = ["Thứ 2", "Thứ 3", "Thứ 4", "Thứ 5", "Thứ 6"]
+SUBJECTS = ["TOÁN", "TIẾNG VIỆT", "TNXH", "ĐẠO ĐỨC", "ÂM NHẠC", "MĨ THUẬT", "HĐTN", "GDTC"]
+
+
+def legacy_parse(df: pd.DataFrame) -> list:
+    # Như ExcelService.process_tkb_file trước đây
+    day_mapping = {name: index + 2 for index, name in enumerate(DAYS)}
+    records = []
+    for _, row in df.iterrows():
+        period_str = str(row.get("Tiết", "")).strip()
+        if not period_str or not period_str.startswith("Tiết"):
+            continue
+        try:
+            period_index = int(period_str.replace("Tiết", "").strip())
+        except (ValueError, AttributeError):
+            continue
+        if period_index < 1 or period_index > 5:
+            continue
+        for day_name, day_of_week in day_mapping.items():
+            subject = str(row.get(day_name, "")).strip()
+            if subject and subject.lower() not in ["", "nan", "none"]:
+                records.append((day_of_week, period_index, subject))
+    return records
+
+
+def vectorized_parse(df: pd.DataFrame) -> list:
+    rows = parse_tkb(df)
+    return list(zip(
+        rows["day_of_week"].tolist(),
+        rows["period_index"].tolist(),
+        rows["subject_name"].tolist(),
+    ))
+
+
+def legacy_read(contents: bytes) -> pd.DataFrame:
+    return pd.read_excel(BytesIO(contents))
+
+
+def legacy_ctgd(contents: bytes) -> list:
+    # Như ExcelService.process_ctgd_file trước đây
+    df = pd.read_excel(BytesIO(contents))
+    records = []
+    for _, row in df.iterrows():
+        subject = str(row.get("Môn học", "")).strip()
+        lesson_index = row.get("Tiết thứ")
+        lesson_name = str(row.get("Tên bài", "")).strip()
+        if not subject or not lesson_name:
+            continue
+        try:
+            lesson_index = int(lesson_index)
+        except (ValueError, TypeError):
+            continue
+        records.append((subject, lesson_index, lesson_name))
+    return records
+
+
+def vectorized_ctgd(contents: bytes):
+    result = parse_ctgd(read_first_sheet(contents, usecols=CTGD_REQUIRED_COLUMNS))
+    programs = result.programs
+    return list(zip(
+        programs["subject_name"].tolist(),
+        programs["lesson_index"].tolist(),
+        programs["lesson_name"].tolist(),
+    )), result.errors
+
+
+def tkb_rows(rnd: random.Random, count: int):
+    for i in range(count):
+        if i % 6 == 5:
+            # Dòng ngăn buổi / ghi chú, không phải "Tiết N"
+            yield ["Buổi chiều", None, None, None, None, None]
+            continue
+        yield [f"Tiết {i % 6 + 1}"] + [
+            rnd.choice(SUBJECTS) if rnd.random() > 0.15 else None for _ in DAYS
+        ]
+
+
+def make_workbook(rnd: random.Random, tkb_rows_count: int, extra_sheets: int, extra_rows: int) -> bytes:
+    # Workbook thường (không write_only) để file có thẻ dimension như file lưu từ Excel;
+    # thiếu thẻ này openpyxl read_only phải quét hết mọi sheet khi mở file
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "TKB"
+    sheet.append(["Tiết"] + DAYS)
+    for row in tkb_rows(rnd, tkb_rows_count):
+        sheet.append(row)
+    for index in range(extra_sheets):
+        other = workbook.create_sheet(f"Lớp {index + 1}")
+        other.append(["Tiết"] + DAYS + ["Ghi chú"])
+        for row in tkb_rows(rnd, extra_rows):
+            other.append(row + ["GDKNS"])
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def make_ctgd(rnd: random.Random, rows: int) -> bytes:
+    # Khoảng 1% dòng thiếu tiết hoặc tên bài; không có dòng trùng để so được với cách cũ
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["STT", "Môn học", "Tiết thứ", "Tên bài", "Ghi chú"])
+    per_subject = max(1, rows // len(SUBJECTS))
+    for i in range(rows):
+        subject = SUBJECTS[i // per_subject % len(SUBJECTS)]
+        index = i % per_subject + 1 + i // (per_subject * len(SUBJECTS)) * per_subject
+        name = f"{subject} - Bài {index}: {rnd.choice(['Ôn tập', 'Luyện tập', 'Bài mới'])}"
+        roll = rnd.random()
+        if roll < 0.005:
+            index = "x"
+        elif roll < 0.01:
+            name = None
+        sheet.append([i + 1, subject, index, name, rnd.choice([None, "GDKNS"])])
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def timed(fn, arg, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(arg)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark đọc file TKB")
+    parser.add_argument("--rows", type=int, default=20000, help="số dòng của TKB lớn")
+    parser.add_argument("--sheets", type=int, default=20, help="số sheet thêm của workbook nhiều sheet")
+    parser.add_argument("--sheet-rows", type=int, default=2000, help="số dòng mỗi sheet thêm")
+    parser.add_argument("--ctgd-rows", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    cases = {
+        "TKB 1 tuần (6 dòng)": make_workbook(rnd, 6, 0, 0),
+        f"TKB lớn ({args.rows} dòng)": make_workbook(rnd, args.rows, 0, 0),
+        f"{args.sheets + 1} sheet x {args.sheet_rows} dòng": make_workbook(
+            rnd, 6, args.sheets, args.sheet_rows
+        ),
+        f"{args.sheets + 1} sheet, TKB lớn": make_workbook(rnd, args.rows, args.sheets, args.sheet_rows),
+    }
+
+    print(
+        f"{'file':<28} {'KB':>6} {'bản ghi':>8} {'đọc cũ':>9} {'đọc mới':>9}"
+        f" {'parse cũ':>9} {'parse mới':>9} {'tổng':>7}"
+    )
+    for name, contents in cases.items():
+        read_before, legacy_df = timed(legacy_read, contents, args.repeat)
+        read_after, df = timed(read_first_sheet, contents, args.repeat)
+        parse_before, expected = timed(legacy_parse, legacy_df, args.repeat)
+        parse_after, records = timed(vectorized_parse, df, args.repeat)
+        if records != expected:
+            raise SystemExit(f"{name}: kết quả khác cách cũ")
+        before = read_before + parse_before
+        after = read_after + parse_after
+        print(
+            f"{name:<28} {len(contents) / 1024:>6.0f} {len(records):>8}"
+            f" {read_before * 1000:>6.1f} ms {read_after * 1000:>6.1f} ms"
+            f" {parse_before * 1000:>6.1f} ms {parse_after * 1000:>6.1f} ms {before / after:>6.2f}x"
+        )
+
+    print(f"\n{'CTGD':<28} {'KB':>6} {'bản ghi':>8} {'lỗi':>6} {'cũ':>9} {'mới':>9} {'µs/dòng':>8} {'nhanh hơn':>10}")
+    for rows in args.ctgd_rows:
+        contents = make_ctgd(rnd, rows)
+        before, expected = timed(legacy_ctgd, contents, args.repeat)
+        after, (records, errors) = timed(vectorized_ctgd, contents, args.repeat)
+        # Cách cũ lưu luôn ô "Tên bài" trống thành tên bài "nan"; cách mới báo lỗi dòng đó
+        expected = [record for record in expected if record[2] != "nan"]
+        if records != expected:
+            raise SystemExit(f"CTGD {rows} dòng: kết quả khác cách cũ")
+        print(
+            f"{f'{rows} dòng':<28} {len(contents) / 1024:>6.0f} {len(records):>8} {len(errors):>6}"
+            f" {before * 1000:>6.1f} ms {after * 1000:>6.1f} ms {after * 1e6 / rows:>8.1f}"
+            f" {before / after:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark import lại CTGD/TKB: cách cũ (delete_by_user_id commit, rồi bulk_create từng lô,
+mỗi lô một commit) so với replace_by_user_id (bảng tạm, xóa và chèn trong một transaction).
+
+Mỗi lần đo là một lần import lại: user đã có sẵn cùng số dòng. Cột "rỗng" là khoảng thời gian
+người đọc thấy CTGD của user trống hoặc thiếu với cách cũ (từ commit xóa tới commit lô cuối);
+cách mới không có khoảng này.
+
+Mặc định chạy trên SQLite tạm; đặt DATABASE_URL để đo trên Postgres (dùng COPY).
+
+Chạy: python scripts/benchmark_import_replace.py [--rows 1000 10000 50000] [--repeat 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+if not os.environ.get("DATABASE_URL"):
+    os.environ["SQLITE_DB_PATH"] = os.path.join(
+        tempfile.mkdtemp(prefix="lbg_bench_replace_"), "bench.db"
+    )
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_FORMAT", "console")
+
+from core.config import settings
+from core.database import Base, SessionLocal, engine
+from core.logging_config import setup_logging
+from models import TeachingProgram, User
+from repositories.teaching_program_repository import TeachingProgramRepository
+
+SUBJECTS = ["TOÁN", "TIẾNG VIỆT", "TNXH", "ĐẠO ĐỨC", "ÂM NHẠC", "MĨ THUẬT", "HĐTN", "GDTC"]
+
+
+def make_programs(user_id: int, rows: int) -> list:
+    return [
+        {
+            "user_id": user_id,
+            "subject_name": SUBJECTS[index % len(SUBJECTS)],
+            "lesson_index": index // len(SUBJECTS) + 1,
+            "lesson_name": f"Bài {index // len(SUBJECTS) + 1}: ôn tập và luyện tập chung",
+        }
+        for index in range(rows)
+    ]
+
+
+def legacy_replace(db, user_id: int, programs: list) -> float:
+    # Như ExcelService.process_ctgd trước đây; trả về thời gian dữ liệu bị trống
+    repo = TeachingProgramRepository(db)
+    repo.delete_by_user_id(user_id)
+    deleted_at = time.perf_counter()
+    batch_size = settings.UPLOAD_INSERT_BATCH_SIZE
+    for start in range(0, len(programs), batch_size):
+        repo.bulk_create(programs[start:start + batch_size])
+    return time.perf_counter() - deleted_at
+
+
+def staged_replace(db, user_id: int, programs: list) -> float:
+    TeachingProgramRepository(db).replace_by_user_id(user_id, programs)
+    db.commit()
+    return 0.0
+
+
+def timed(fn, user_id: int, programs: list, repeat: int):
+    durations, gaps = [], []
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            gaps.append(fn(db, user_id, programs))
+            durations.append(time.perf_counter() - start)
+            count = db.query(TeachingProgram).filter(TeachingProgram.user_id == user_id).count()
+            assert count == len(programs), (fn.__name__, count, len(programs))
+        finally:
+            db.close()
+    return statistics.median(durations), statistics.median(gaps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import lại CTGD")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setup_logging()
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(
+        username=f"bench_replace_{int(time.time())}", password_hash="x", full_name="Benchmark"
+    )
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    print(f"Database: {engine.dialect.name}, lô {settings.UPLOAD_INSERT_BATCH_SIZE} dòng")
+    print(
+        f"{'dòng':>8} {'cũ (ms)':>10} {'rỗng (ms)':>10} {'mới (ms)':>10} "
+        f"{'dòng/s cũ':>11} {'dòng/s mới':>11} {'nhanh hơn':>10}"
+    )
+    for rows in args.rows:
+        programs = make_programs(user_id, rows)
+        # Import lần đầu để các lần đo đều là import lại
+        timed(staged_replace, user_id, programs, 1)
+
+        legacy, gap = timed(legacy_replace, user_id, programs, args.repeat)
+        staged, _ = timed(staged_replace, user_id, programs, args.repeat)
+        print(
+            f"{rows:>8} {legacy * 1000:>10.1f} {gap * 1000:>10.1f} {staged * 1000:>10.1f} "
+            f"{rows / legacy:>11.0f} {rows / staged:>11.0f} {legacy / staged:>9.2f}x"
+        )
+
+    db = SessionLocal()
+    db.query(TeachingProgram).filter(TeachingProgram.user_id == user_id).delete()
+    db.query(User).filter(User.id == user_id).delete()
+    db.commit()
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark in PDF nhiều tuần x nhiều lớp: render tuần tự một lần so với chia nhóm tuần
+render song song trên process pool (--workers) rồi ghép lại bằng pypdf.
+
+Không cần database: TKB và CTGD được sinh ngẫu nhiên trong bộ nhớ.
+Tăng tốc phụ thuộc số core thật của máy (os.cpu_count()).
+
+Chạy: python scripts/benchmark_pdf_export.py [--classes 3] [--weeks 18] [--workers 1 2 4]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from pypdf import PdfReader
+
+from core.logging_config import setup_logging
+from services.export_jobs import init_export_worker
+from services.export_service import ExportService
+from services.parallel_pdf import merge_pdfs, pdf_chunks, render_pdf_chunk, render_pdf_parallel
+from services.report_models import Report
+from benchmark_weekly_grid import make_plan
+
+
+def render_sequential(reports) -> bytes:
+    # Mỗi lớp một file rồi ghép, giống cách in từng lớp trước đây
+    parts = []
+    for report in reports:
+        buffer = BytesIO()
+        ExportService().render("pdf", report, buffer)
+        parts.append(buffer.getvalue())
+    output = BytesIO()
+    merge_pdfs(parts, output)
+    return output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF export song song")
+    parser.add_argument("--classes", type=int, default=3)
+    parser.add_argument("--weeks", type=int, default=18)
+    parser.add_argument("--subjects", type=int, default=8)
+    parser.add_argument("--lessons", type=int, default=400)
+    parser.add_argument("--chunk-weeks", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    setup_logging("WARNING", "console")
+    rnd = random.Random(42)
+    reports = []
+    for class_index in range(args.classes):
+        plan = make_plan(rnd, args.subjects, args.lessons, args.weeks)
+        reports.append(Report(
+            user_id=1,
+            teacher_name="Nguyễn Văn A",
+            reviewer_name="Trần Thị B",
+            class_id=class_index + 1,
+            weeks=[plan.week(w) for w in range(1, args.weeks + 1)],
+        ))
+    chunks = len(pdf_chunks(reports, args.chunk_weeks))
+    pages = args.classes * args.weeks
+
+    print(
+        f"{args.classes} lớp x {args.weeks} tuần = {pages} trang,"
+        f" {chunks} nhóm {args.chunk_weeks} tuần, {os.cpu_count()} CPU"
+    )
+    print(f"{'cách render':<32} {'thời gian':>12} {'tăng tốc':>10}")
+
+    start = time.perf_counter()
+    sequential = render_sequential(reports)
+    baseline = time.perf_counter() - start
+    assert len(PdfReader(BytesIO(sequential)).pages) == pages
+    print(f"{'tuần tự':<32} {baseline * 1000:>9.0f} ms {1.0:>9.2f}x")
+
+    context = multiprocessing.get_context("spawn")
+    for workers in args.workers:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=init_export_worker
+        ) as executor:
+            # Khởi động sẵn các process để không tính thời gian spawn và import
+            list(executor.map(render_pdf_chunk, pdf_chunks(reports[:1], args.chunk_weeks)[:workers]))
+            start = time.perf_counter()
+            output = BytesIO()
+            render_pdf_parallel(reports, executor, output, args.chunk_weeks)
+            elapsed = time.perf_counter() - start
+        assert len(PdfReader(BytesIO(output.getvalue())).pages) == pages
+        print(
+            f"{f'{workers} process song song':<32} {elapsed * 1000:>9.0f} ms"
+            f" {baseline / elapsed:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
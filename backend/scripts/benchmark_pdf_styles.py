@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark thời gian render PDF mỗi tuần: style dựng lại mỗi request với Helvetica (cách cũ),
+registry style dùng chung với font TTF Unicode đăng ký một lần, và renderer canvas
+(PDF_RENDERER=canvas) vẽ thẳng lưới cố định không qua layout của Platypus.
+
+Không cần database: TKB và CTGD được sinh ngẫu nhiên trong bộ nhớ.
+
+Chạy: python scripts/benchmark_pdf_styles.py [--weeks 1 4 18] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from core.logging_config import setup_logging
+from services import pdf_renderer
+from services.pdf_canvas import render_pdf_canvas
+from services.pdf_renderer import FALLBACK_FONT, FALLBACK_FONT_BOLD, get_pdf_styles, render_pdf
+from services.report_models import Report
+from benchmark_weekly_grid import make_plan
+
+
+def per_request_styles():
+    # Như trước: getSampleStyleSheet, ParagraphStyle và TableStyle tạo mới mỗi request
+    return pdf_renderer._build_styles(FALLBACK_FONT, FALLBACK_FONT_BOLD)
+
+
+def timed_render(report: Report, repeat: int, render=render_pdf) -> float:
+    """
+    Trung vị thời gian render (giây)
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(report, BytesIO())
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark style registry của PDF")
+    parser.add_argument("--weeks", type=int, nargs="+", default=[1, 4, 18])
+    parser.add_argument("--subjects", type=int, default=8)
+    parser.add_argument("--lessons", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_logging("WARNING", "console")
+    plan = make_plan(random.Random(42), args.subjects, args.lessons, max(args.weeks))
+    styles = get_pdf_styles()
+    print(f"font: {styles.font} / {styles.font_bold}")
+
+    start = time.perf_counter()
+    for _ in range(100):
+        per_request_styles()
+    print(f"dựng style mỗi request: {(time.perf_counter() - start) * 10:.2f} ms")
+
+    print(
+        f"{'số tuần':>8} {'cũ ms/tuần':>12} {'registry':>12} {'canvas':>12}"
+        f" {'registry/cũ':>12} {'canvas/cũ':>10}"
+    )
+    registry = pdf_renderer.get_pdf_styles
+    for weeks in args.weeks:
+        report = Report(
+            user_id=1,
+            teacher_name="Nguyễn Văn A",
+            reviewer_name="Trần Thị B",
+            weeks=[plan.week(w) for w in range(1, weeks + 1)],
+        )
+        pdf_renderer.get_pdf_styles = per_request_styles
+        try:
+            before = timed_render(report, args.repeat)
+        finally:
+            pdf_renderer.get_pdf_styles = registry
+        after = timed_render(report, args.repeat)
+        canvas = timed_render(report, args.repeat, render_pdf_canvas)
+        print(
+            f"{weeks:>8} {before * 1000 / weeks:>12.1f} {after * 1000 / weeks:>12.1f}"
+            f" {canvas * 1000 / weeks:>12.1f} {before / after:>11.2f}x {before / canvas:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark ReportEngine: đo số lần compile lịch cả năm, số query và thời gian
+cho JSON 40 tuần, preview, export Excel nhiều tuần và report cho nhiều lớp.
+
+Chạy: python scripts/benchmark_report_engine.py [--weeks 40] [--subjects 8] [--classes 5]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+_db_dir = tempfile.mkdtemp(prefix="lbg_bench_")
+os.environ["SQLITE_DB_PATH"] = os.path.join(_db_dir, "bench.db")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_FORMAT", "console")
+
+from sqlalchemy import event
+
+from core.database import Base, engine, SessionLocal
+from core.logging_config import setup_logging
+from models import User, Class, Timetable, TeachingProgram, Holiday
+from services.weekly_report_service import WeeklyReportService
+from services.export_service import ExportService
+from services.export_cache import ExportCache
+from services.year_plan import year_plan_cache
+from utils.date_utils import current_school_year
+from utils.holidays import holiday_calendar_cache
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def seed(db, subjects: int, lessons_per_subject: int, classes: int) -> User:
+    rnd = random.Random(42)
+    user = User(username="bench", password_hash="x", full_name="Giáo viên Benchmark")
+    db.add(user)
+    db.commit()
+
+    class_objs = [Class(user_id=user.id, class_name=f"{i + 1}A") for i in range(classes)]
+    db.add_all(class_objs)
+    db.commit()
+
+    names = [f"MÔN {i}" for i in range(subjects)]
+    # TKB dùng chung (class_id NULL) và TKB riêng của từng lớp
+    db.bulk_save_objects([
+        Timetable(
+            user_id=user.id,
+            class_id=class_id,
+            day_of_week=day,
+            period_index=period,
+            subject_name=rnd.choice(names),
+        )
+        for class_id in [None] + [c.id for c in class_objs]
+        for day in range(2, 7)
+        for period in range(1, 6)
+    ])
+    db.bulk_save_objects([
+        TeachingProgram(
+            user_id=user.id,
+            subject_name=name,
+            lesson_index=index,
+            lesson_name=f"{name} - Bài {index}",
+        )
+        for name in names
+        for index in range(1, lessons_per_subject + 1)
+    ])
+    db.add(Holiday(
+        user_id=user.id,
+        holiday_name="Ngày Nhà giáo Việt Nam",
+        holiday_date=date(current_school_year(), 11, 20),
+    ))
+    db.commit()
+    return user
+
+
+def measure(name: str, counter: QueryCounter, fn):
+    year_plan_cache.clear()
+    holiday_calendar_cache.clear()
+    misses_before = year_plan_cache.misses
+    queries_before = counter.count
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<42} {elapsed * 1000:>9.1f} ms"
+        f" {counter.count - queries_before:>8} queries"
+        f" {year_plan_cache.misses - misses_before:>6} compiles"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ReportEngine")
+    parser.add_argument("--weeks", type=int, default=40)
+    parser.add_argument("--subjects", type=int, default=8)
+    parser.add_argument("--lessons", type=int, default=400)
+    parser.add_argument("--classes", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_logging("WARNING", "console")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = seed(db, args.subjects, args.lessons, args.classes)
+    counter = QueryCounter()
+    weekly_service = WeeklyReportService(db)
+    export_cache = ExportCache(max_bytes=100 * 1024 * 1024)
+    export_service = ExportService(cache=export_cache)
+    weeks = range(1, args.weeks + 1)
+
+    def json_all_weeks():
+        for week in weeks:
+            weekly_service.generate_weekly_report(user.id, week)
+
+    def json_rebuild_per_week():
+        # Không có cache: mỗi request tải lại dữ liệu và compile lại
+        for week in weeks:
+            year_plan_cache.clear()
+            holiday_calendar_cache.clear()
+            weekly_service.generate_weekly_report(user.id, week)
+
+    def preview():
+        report = weekly_service.report_engine.build_report(user, 1, args.weeks)
+        export_service.render_preview_html(report)
+
+    def export_all_weeks_excel():
+        export_cache.clear()
+        report = weekly_service.report_engine.build_report(user, 1, args.weeks)
+        export_service.export_all_weeks_excel(report).read()
+
+    def export_all_weeks_excel_cached():
+        # Nội dung không đổi: dùng lại file trong export cache, không render lại
+        report = weekly_service.report_engine.build_report(user, 1, args.weeks)
+        export_service.export_all_weeks_excel(report).read()
+
+    def json_then_exports():
+        json_all_weeks()
+        preview()
+        export_all_weeks_excel()
+
+    class_ids = [c.id for c in db.query(Class).filter(Class.user_id == user.id)]
+
+    def class_reports_one_by_one():
+        for class_id in class_ids:
+            weekly_service.report_engine.build_report(user, 1, args.weeks, class_id)
+
+    def class_reports_batched():
+        weekly_service.report_engine.build_class_reports(user, 1, args.weeks)
+
+    print(f"{'scenario':<42} {'time':>12} {'queries':>16} {'compiles':>8}")
+    measure(f"JSON tuần 1-{args.weeks}, không cache", counter, json_rebuild_per_week)
+    measure(f"JSON tuần 1-{args.weeks}, engine dùng chung", counter, json_all_weeks)
+    measure(f"preview tuần 1-{args.weeks}", counter, preview)
+    measure(f"export Excel tuần 1-{args.weeks}", counter, export_all_weeks_excel)
+    measure(f"export Excel tuần 1-{args.weeks}, có export cache", counter, export_all_weeks_excel_cached)
+    measure("JSON + preview + Excel (một plan)", counter, json_then_exports)
+    measure(f"{len(class_ids)} lớp, từng lớp một", counter, class_reports_one_by_one)
+    measure(f"{len(class_ids)} lớp, tải chung một lần", counter, class_reports_batched)
+
+    print(f"export cache: {export_cache.stats()}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
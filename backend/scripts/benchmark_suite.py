@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Bộ benchmark cho WeeklyReportService và ExportService trên dữ liệu sinh ngẫu nhiên
+(giáo viên, lớp, TKB, CTGD, log đã sửa và ngày nghỉ) với kích thước cấu hình được.
+
+Mỗi kịch bản chạy nguội (xóa cache lịch năm, ngày nghỉ và export trước mỗi lần),
+ghi thời gian (trung vị, p95, nhỏ nhất), bộ nhớ đỉnh (tracemalloc, đo ở một lần chạy riêng)
+và số query ra JSON. Có --baseline thì so với kết quả đã lưu, trả mã lỗi 1 nếu chậm hơn
+quá --tolerance, tốn bộ nhớ hơn quá --tolerance hoặc nhiều query hơn.
+
+Chạy:
+    python scripts/benchmark_suite.py --size medium --output baseline.json
+    python scripts/benchmark_suite.py --size medium --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+_db_dir = tempfile.mkdtemp(prefix="lbg_bench_suite_")
+os.environ["SQLITE_DB_PATH"] = os.path.join(_db_dir, "bench.db")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_FORMAT", "console")
+
+from sqlalchemy import event
+
+from core.config import settings
+from core.database import Base, SessionLocal, engine
+from core.logging_config import setup_logging
+from models import Class, Holiday, TeachingProgram, Timetable, User, WeeklyLog
+from services.export_cache import ExportCache
+from services.export_service import ExportService
+from services.preview_renderer import iter_preview_html
+from services.weekly_report_service import WeeklyReportService
+from services.year_plan import year_plan_cache
+from utils.date_utils import current_school_year
+from utils.holidays import holiday_calendar_cache
+
+# Kích thước dữ liệu có sẵn; tham số dòng lệnh ghi đè từng giá trị
+SIZES = {
+    "small": {"users": 2, "classes": 1, "subjects": 6, "lessons": 150, "holidays": 5, "logs": 20, "weeks": 10},
+    "medium": {"users": 10, "classes": 3, "subjects": 8, "lessons": 400, "holidays": 15, "logs": 100, "weeks": 35},
+    "large": {"users": 50, "classes": 5, "subjects": 12, "lessons": 800, "holidays": 30, "logs": 400, "weeks": 40},
+}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def seed(db, params: dict) -> None:
+    rnd = random.Random(42)
+    year = current_school_year()
+    subjects = [f"MÔN {i}" for i in range(params["subjects"])]
+    for user_index in range(params["users"]):
+        user = User(
+            username=f"gv{user_index}",
+            password_hash="x",
+            full_name=f"Giáo viên {user_index}",
+            school_name="Trường Benchmark",
+        )
+        db.add(user)
+        db.flush()
+        classes = [
+            Class(
+                user_id=user.id,
+                class_name=f"{class_index + 1}A{user_index}",
+                school_year=f"{year}-{year + 1}",
+                reviewer_name="Tổ trưởng",
+                location="Long Tiên",
+            )
+            for class_index in range(params["classes"])
+        ]
+        db.add_all(classes)
+        db.flush()
+        class_ids = [c.id for c in classes]
+
+        db.bulk_save_objects([
+            Timetable(
+                user_id=user.id,
+                class_id=class_id,
+                day_of_week=day,
+                period_index=period,
+                subject_name=rnd.choice(subjects),
+            )
+            for class_id in [None] + class_ids
+            for day in range(2, 7)
+            for period in range(1, 6)
+        ])
+        db.bulk_save_objects([
+            TeachingProgram(
+                user_id=user.id,
+                subject_name=name,
+                lesson_index=index,
+                lesson_name=f"{name} - Bài {index}: {rnd.choice(['Ôn tập', 'Luyện tập', 'Bài mới'])}",
+            )
+            for name in subjects
+            for index in range(1, params["lessons"] + 1)
+        ])
+        db.bulk_save_objects([
+            WeeklyLog(
+                user_id=user.id,
+                class_id=rnd.choice(class_ids),
+                week_number=rnd.randint(1, params["weeks"]),
+                day_of_week=rnd.randint(2, 6),
+                period_index=rnd.randint(1, 5),
+                subject_name=rnd.choice(subjects),
+                lesson_name="Bài đã sửa",
+                notes=rnd.choice(["", "GDKNS", "Lồng ghép ATGT"]),
+            )
+            for _ in range(params["logs"])
+        ])
+        first_day = date(year, 9, 5)
+        db.bulk_save_objects([
+            Holiday(
+                user_id=user.id,
+                holiday_name=f"Nghỉ {index}",
+                holiday_date=first_day + timedelta(days=rnd.randint(0, 250)),
+            )
+            for index in range(params["holidays"])
+        ])
+    db.commit()
+
+
+def clear_caches(export_cache: ExportCache) -> None:
+    year_plan_cache.clear()
+    holiday_calendar_cache.clear()
+    export_cache.clear()
+
+
+def run_scenario(fn, counter: QueryCounter, export_cache: ExportCache, repeat: int) -> dict:
+    # Lần chạy đầu gồm chi phí một lần (import, đăng ký font), không tính
+    clear_caches(export_cache)
+    fn()
+
+    samples = []
+    queries = 0
+    for _ in range(repeat):
+        clear_caches(export_cache)
+        queries_before = counter.count
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+        queries = counter.count - queries_before
+
+    # tracemalloc làm chậm nên đo bộ nhớ ở một lần chạy riêng
+    clear_caches(export_cache)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples.sort()
+    return {
+        "latency_ms": {
+            "median": round(statistics.median(samples) * 1000, 2),
+            "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+            "min": round(samples[0] * 1000, 2),
+        },
+        "peak_memory_kb": round(peak / 1024, 1),
+        "queries": queries,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    In bảng so sánh, trả về danh sách kịch bản kém hơn baseline
+    """
+    regressions = []
+    print(f"\n{'so với baseline':<44} {'t. nhỏ nhất':>10} {'bộ nhớ':>10} {'query':>8}")
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            print(f"{name:<44} {'(mới)':>10}")
+            continue
+        # So thời gian nhỏ nhất: ít bị nhiễu bởi tải máy hơn trung vị
+        latency = current["latency_ms"]["min"] / max(base["latency_ms"]["min"], 0.01)
+        memory = current["peak_memory_kb"] / max(base["peak_memory_kb"], 0.1)
+        queries = current["queries"] - base["queries"]
+        print(f"{name:<44} {latency:>9.2f}x {memory:>9.2f}x {queries:>+8d}")
+        if latency > 1 + tolerance or memory > 1 + tolerance or queries > 0:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark export và báo giảng")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    for key in SIZES["small"]:
+        parser.add_argument(f"--{key}", type=int, help="ghi đè giá trị của --size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="ghi kết quả JSON ra file")
+    parser.add_argument("--baseline", help="file JSON kết quả trước để so sánh")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="mức chậm hơn cho phép (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    params = dict(SIZES[args.size])
+    for key in params:
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+
+    setup_logging("WARNING", "console")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    start = time.perf_counter()
+    seed(db, params)
+    print(f"dữ liệu {args.size}: {params} (sinh trong {time.perf_counter() - start:.1f}s)")
+
+    counter = QueryCounter()
+    export_cache = ExportCache(max_bytes=256 * 1024 * 1024)
+    weekly_service = WeeklyReportService(db)
+    export_service = ExportService(cache=export_cache)
+    engine_ = weekly_service.report_engine
+    user = db.query(User).order_by(User.id).first()
+    class_id = db.query(Class.id).filter(Class.user_id == user.id).order_by(Class.id).first()[0]
+    weeks = params["weeks"]
+
+    def build_report():
+        return engine_.build_report(user, 1, weeks, class_id)
+
+    scenarios = {
+        f"build_report tuần 1-{weeks}": lambda: list(build_report().weeks),
+        "generate_weekly_report 1 tuần": lambda: weekly_service.generate_weekly_report(user.id, 1, class_id),
+        f"generate_weekly_report tuần 1-{weeks}": lambda: [
+            weekly_service.generate_weekly_report(user.id, week, class_id) for week in range(1, weeks + 1)
+        ],
+        "export_pdf 1 tuần": lambda: export_service.export_pdf(
+            engine_.build_report(user, 1, 1, class_id)
+        ).read(),
+        "export_excel 1 tuần": lambda: export_service.export_excel(
+            engine_.build_report(user, 1, 1, class_id)
+        ).read(),
+        f"export_all_weeks_excel tuần 1-{weeks}": lambda: export_service.export_all_weeks_excel(
+            build_report()
+        ).read(),
+        f"preview_all_weeks tuần 1-{weeks}": lambda: "".join(iter_preview_html(build_report())),
+        f"build_class_reports mọi giáo viên, tuần 1-{weeks}": lambda: [
+            list(report.weeks)
+            for other in db.query(User).order_by(User.id).all()
+            for report in engine_.build_class_reports(other, 1, weeks)
+        ],
+    }
+
+    print(f"{'kịch bản':<44} {'trung vị':>10} {'p95':>10} {'bộ nhớ đỉnh':>12} {'query':>6}")
+    results = {}
+    for name, fn in scenarios.items():
+        result = results[name] = run_scenario(fn, counter, export_cache, args.repeat)
+        print(
+            f"{name:<44} {result['latency_ms']['median']:>7.1f} ms {result['latency_ms']['p95']:>7.1f} ms"
+            f" {result['peak_memory_kb']:>9.0f} KB {result['queries']:>6}"
+        )
+    db.close()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pdf_renderer": settings.PDF_RENDERER,
+            "size": args.size,
+            "params": params,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nđã ghi {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("params") != params:
+            print("cảnh báo: baseline dùng dữ liệu kích thước khác")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nkém hơn baseline: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark bộ nhớ của WeeklyGrid cho 40 tuần x N lớp, so với dạng list dict cũ
+(25 dict mỗi tuần), và thời gian serialize ra JSON.
+
+Không cần database: TKB và CTGD được sinh ngẫu nhiên trong bộ nhớ.
+
+Chạy: python scripts/benchmark_weekly_grid.py [--classes 5] [--weeks 40]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from services.year_plan import DAYS, PERIODS, YearPlan
+from utils.date_utils import get_school_year_calendar, school_year_start
+
+
+def make_plan(rnd: random.Random, subjects: int, lessons: int, weeks: int) -> YearPlan:
+    names = [f"MÔN {i}" for i in range(subjects)]
+    slots = {
+        (day, period): rnd.choice(names)
+        for day in range(2, len(DAYS) + 2)
+        for period in PERIODS
+    }
+    programs = [
+        SimpleNamespace(
+            subject_name=name,
+            lesson_index=index,
+            lesson_name=f"{name} - Bài {index}: nội dung bài học",
+            class_id=None,
+        )
+        for name in names
+        for index in range(1, lessons + 1)
+    ]
+    calendar = get_school_year_calendar(school_year_start(), weeks)
+    return YearPlan.compile(slots, programs, [], None, calendar, weeks)
+
+
+def retained(fn):
+    """
+    (kết quả, số byte còn giữ sau khi fn chạy xong)
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WeeklyGrid")
+    parser.add_argument("--classes", type=int, default=5)
+    parser.add_argument("--weeks", type=int, default=40)
+    parser.add_argument("--subjects", type=int, default=8)
+    parser.add_argument("--lessons", type=int, default=400)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    plans = [make_plan(rnd, args.subjects, args.lessons, args.weeks) for _ in range(args.classes)]
+    weeks = range(1, args.weeks + 1)
+
+    grids, grid_bytes = retained(lambda: [plan.week(w) for plan in plans for w in weeks])
+    dicts, dict_bytes = retained(lambda: [grid.to_dict() for grid in grids])
+
+    dict_json = timed(lambda: [json.dumps(d, ensure_ascii=False) for d in dicts])
+    grid_json = timed(lambda: [grid.to_json() for grid in grids])
+    assert all(json.loads(g.to_json()) == d for g, d in zip(grids, dicts))
+
+    total = len(grids)
+    print(f"{args.classes} lớp x {args.weeks} tuần = {total} tuần")
+    print(f"{'':<28} {'bộ nhớ giữ lại':>16} {'mỗi tuần':>12} {'JSON':>10}")
+    print(
+        f"{'list dict (cũ)':<28} {dict_bytes / 1024:>13.1f} KB"
+        f" {dict_bytes / total:>10.0f} B {dict_json * 1000:>7.1f} ms"
+    )
+    print(
+        f"{'WeeklyGrid':<28} {grid_bytes / 1024:>13.1f} KB"
+        f" {grid_bytes / total:>10.0f} B {grid_json * 1000:>7.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
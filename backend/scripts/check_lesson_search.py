@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Kiểm tra ba cách tìm bài học của LessonSearchRepository (FTS5 của SQLite, LIKE trên
+translate() của Postgres, lọc bằng Python) trả về cùng các dòng cho cùng một truy vấn.
+
+Chạy trên SQLite tạm: hàm lower/translate/regexp_replace của Postgres được giả lập bằng
+Python trên connection để chạy được nhánh Postgres. Có DATABASE_URL trỏ tới Postgres thì
+nhánh Postgres chạy thật, FTS5 bị bỏ qua.
+
+Trả mã lỗi 1 nếu có truy vấn cho kết quả khác nhau.
+
+Chạy: python scripts/check_lesson_search.py
+"""
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+if not os.environ.get("DATABASE_URL"):
+    os.environ["SQLITE_DB_PATH"] = os.path.join(
+        tempfile.mkdtemp(prefix="lbg_check_search_"), "check.db"
+    )
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_FORMAT", "console")
+
+from sqlalchemy import event
+
+from core.database import Base, SessionLocal, engine
+from core.logging_config import setup_logging
+from models import TeachingProgram, User
+from repositories.lesson_search_repository import LessonSearchRepository
+from utils.text_utils import search_tokens
+
+LESSONS = [
+    ("TIẾNG VIỆT", "Tiếng Việt: Đọc hiểu"),
+    ("TIẾNG VIỆT", "Đọc - Viết chữ hoa"),
+    ("TIẾNG VIỆT", "Luyện từ và câu (tiết 2)"),
+    ("TOÁN", "Phép cộng có nhớ trong phạm vi 100"),
+    ("TOÁN", "Bài 12:Ôn tập phép trừ"),
+    ("TOÁN", "Giảm giá 50% cho bài tập_về nhà"),
+    ("TOÁN", "Phân số a/b và 100%"),
+    ("TNXH", "Cộng đồng địa phương"),
+    ("TNXH", "Thực vật sống ở đâu?"),
+    ("ĐẠO ĐỨC", "Quý trọng thời gian"),
+]
+
+QUERIES = [
+    ("doc", None),
+    ("Đọc hiểu", None),
+    ("viet", None),
+    ("iet", None),  # giữa từ: không được khớp
+    ("cong", None),
+    ("cong", "TOÁN"),
+    ("on tap", None),
+    ("tiet 2", None),
+    ("50", None),
+    ("%", None),
+    ("10%", None),
+    ("tap_", None),
+    ("tap_ve", None),
+    ("a_", None),
+    ("b", None),
+    ("100", None),
+    ("dau", None),
+    ("quy trong", None),
+]
+
+# Token đưa thẳng vào _search_translate: %, _ và \ phải là ký tự thường, không phải wildcard
+RAW_TOKENS = [["%"], ["_"], ["10%"], ["t_p"], ["\\"], ["b%"]]
+
+
+def _install_postgres_functions(dbapi_conn, connection_record):
+    # lower() của SQLite chỉ xử lý ASCII, translate/regexp_replace không có sẵn
+    dbapi_conn.create_function("lower", 1, lambda value: value.lower() if value else value)
+    dbapi_conn.create_function(
+        "translate",
+        3,
+        lambda value, source, target: value.translate(str.maketrans(source, target)),
+    )
+
+    def regexp_replace(value, pattern, replacement, flags):
+        # Chỉ cần đúng mẫu [^[:alnum:]]+ mà _search_translate dùng
+        assert pattern == "[^[:alnum:]]+" and flags == "g", pattern
+        return re.sub(r"[\W_]+", replacement, value)
+
+    dbapi_conn.create_function("regexp_replace", 4, regexp_replace)
+
+
+def main() -> int:
+    setup_logging()
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _install_postgres_functions)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    user = User(username="check_lesson_search", password_hash="x", full_name="Check")
+    db.add(user)
+    db.commit()
+    db.add_all(
+        TeachingProgram(
+            user_id=user.id, subject_name=subject, lesson_index=index, lesson_name=name
+        )
+        for index, (subject, name) in enumerate(LESSONS, start=1)
+    )
+    db.commit()
+
+    repo = LessonSearchRepository(db)
+    backends = {"python": repo._search_python, "translate": repo._search_translate}
+    if engine.dialect.name == "sqlite" and repo._ensure_fts():
+        repo.reindex_user(user.id)
+        db.commit()
+        backends["fts"] = repo._search_fts
+
+    failures = 0
+    for query, subject_name in QUERIES:
+        tokens = search_tokens(query)
+        # search() trả [] khi truy vấn không có từ nào (ví dụ chỉ có "%")
+        results = {
+            name: sorted(
+                p.lesson_name for p in (search(user.id, tokens, subject_name, 100) if tokens else [])
+            )
+            for name, search in backends.items()
+        }
+        expected = results["python"]
+        ok = all(rows == expected for rows in results.values())
+        failures += not ok
+        print(f"{'OK ' if ok else 'KHÁC'} {query!r:<14} {subject_name or '':<6} {expected}")
+        if not ok:
+            for name, rows in results.items():
+                print(f"       {name:<10} {rows}")
+
+    for tokens in RAW_TOKENS:
+        rows = repo._search_translate(user.id, tokens, None, 100)
+        failures += bool(rows)
+        print(f"{'OK ' if not rows else 'KHÁC'} raw {tokens!r:<10} {[p.lesson_name for p in rows]}")
+
+    db.query(TeachingProgram).filter(TeachingProgram.user_id == user.id).delete()
+    db.query(User).filter(User.id == user.id).delete()
+    db.commit()
+    db.close()
+    total = len(QUERIES) + len(RAW_TOKENS)
+    print(f"\n{total - failures}/{total} truy vấn đúng trên {', '.join(backends)}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -275,7 +275,7 @@ def main():
         import_tkb_from_image_data(user_id=args.user_id)
     else:
         logger.info("Sử dụng --from-image để import từ dữ liệu hình ảnh")
-        logger.info("Hoặc tạo file Excel/Word với format tương tự và sử dụng excel_service.process_tkb_file")
+        logger.info("Hoặc tạo file Excel/Word với format tương tự và sử dụng excel_service.process_tkb")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+from collections import deque
+from concurrent.futures import Future
+from io import BytesIO
+from typing import Callable, Deque, Iterator, List, Tuple
+import re
+import zipfile
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.database import SessionLocal
+from core.logging_config import get_logger
+from repositories.user_repository import UserRepository
+from services.export_jobs import ExportJobRunner, export_job_runner
+from services.export_service import EXPORT_KINDS, ExportService
+from services.report_engine import ReportEngine
+from services.report_models import Report
+
+logger = get_logger(__name__)
+
+# Loại file trong ZIP export cả trường: PDF hoặc Excel một sheet mỗi tuần
+BULK_EXPORT_KINDS = {"pdf": "pdf", "excel": "excel_all"}
+
+
+def render_export_bytes(kind: str, report: Report) -> bytes:
+    """
+    Chạy trong process của pool: một file export của một giáo viên/lớp
+    """
+    buffer = BytesIO()
+    ExportService().render(kind, report, buffer)
+    return buffer.getvalue()
+
+
+class ZipStream:
+    """
+    File chỉ ghi cho zipfile: giữ các byte vừa ghi cho tới khi drain() lấy ra stream đi.
+    Không có seek nên zipfile ghi kích thước sau mỗi file (data descriptor)
+    thay vì quay lại sửa header, cả ZIP không bao giờ nằm trọn trong bộ nhớ.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _safe_name(value: str) -> str:
+    # Giữ tiếng Việt, bỏ ký tự làm hỏng đường dẫn trong ZIP
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", value).strip("._") or "_"
+
+
+class BulkExportService:
+    """
+    Export lịch báo giảng của mọi giáo viên và mọi lớp thành một ZIP stream.
+    Các file render trên pool export (tối đa EXPORT_WORKERS process), chỉ
+    BULK_EXPORT_MAX_IN_FLIGHT file chờ ghi cùng lúc nên bộ nhớ không tăng theo số lớp.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        runner: ExportJobRunner = export_job_runner,
+        max_in_flight: int = settings.BULK_EXPORT_MAX_IN_FLIGHT,
+    ):
+        self.session_factory = session_factory
+        self.runner = runner
+        self.max_in_flight = max(1, max_in_flight)
+
+    def filename(self, kind: str, start_week: int, end_week: int) -> str:
+        return f"bao_giang_toan_truong_{kind}_tuan_{start_week}_{end_week}.zip"
+
+    def iter_zip(self, kind: str, start_week: int, end_week: int) -> Iterator[bytes]:
+        """
+        Các đoạn byte của ZIP, mỗi file được ghi vào ZIP theo đúng thứ tự duyệt ngay khi
+        render xong. Dùng session riêng vì generator chạy sau khi request đã trả về.
+        """
+        export_kind = BULK_EXPORT_KINDS[kind]
+        suffix, _ = EXPORT_KINDS[export_kind]
+        stream = ZipStream()
+        pending: Deque[Tuple[str, Future]] = deque()
+        db = self.session_factory()
+        files = 0
+        total_bytes = 0
+        try:
+            # File đã nén sẵn (PDF, xlsx) nên lưu thẳng, không nén lại
+            with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_STORED) as archive:
+
+                def write_oldest() -> bytes:
+                    arcname, future = pending.popleft()
+                    archive.writestr(arcname, future.result())
+                    return stream.drain()
+
+                for name, report in self._iter_reports(db, start_week, end_week):
+                    pending.append((
+                        name + suffix,
+                        self.runner.run(render_export_bytes, export_kind, report),
+                    ))
+                    if len(pending) >= self.max_in_flight:
+                        data = write_oldest()
+                        files += 1
+                        total_bytes += len(data)
+                        yield data
+                while pending:
+                    data = write_oldest()
+                    files += 1
+                    total_bytes += len(data)
+                    yield data
+            # Central directory ở cuối ZIP
+            data = stream.drain()
+            total_bytes += len(data)
+            yield data
+            logger.info(
+                "Bulk export completed",
+                kind=kind,
+                start_week=start_week,
+                end_week=end_week,
+                files=files,
+                bytes=total_bytes,
+            )
+        finally:
+            # Client ngắt kết nối giữa chừng: bỏ các file chưa render
+            for _, future in pending:
+                future.cancel()
+            db.close()
+
+    def _iter_reports(
+        self, db: Session, start_week: int, end_week: int
+    ) -> Iterator[Tuple[str, Report]]:
+        """
+        (đường dẫn trong ZIP không kèm đuôi, report) cho từng lớp của từng giáo viên;
+        giáo viên chưa tạo lớp thì một report chung
+        """
+        engine = ReportEngine(db)
+        for user in UserRepository(db).get_all():
+            folder = f"{user.id}_{_safe_name(user.username)}"
+            has_classes = False
+            for report in engine.iter_class_reports(user, start_week, end_week):
+                has_classes = True
+                class_name = _safe_name(report.class_name or "")
+                yield f"{folder}/{report.class_id}_{class_name}", report
+            if not has_classes:
+                yield f"{folder}/chung", engine.build_report(user, start_week, end_week)
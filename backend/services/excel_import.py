@@ -0,0 +1,194 @@
+from io import BytesIO
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from zipfile import BadZipFile
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+# Cột ngày của file TKB -> day_of_week
+TKB_DAY_COLUMNS: Dict[str, int] = {
+    "Thứ 2": 2,
+    "Thứ 3": 3,
+    "Thứ 4": 4,
+    "Thứ 5": 5,
+    "Thứ 6": 6,
+}
+TKB_PERIOD_COLUMN = "Tiết"
+TKB_COLUMNS = ["day_of_week", "period_index", "subject_name"]
+
+CTGD_SUBJECT_COLUMN = "Môn học"
+CTGD_INDEX_COLUMN = "Tiết thứ"
+CTGD_NAME_COLUMN = "Tên bài"
+CTGD_REQUIRED_COLUMNS = [CTGD_SUBJECT_COLUMN, CTGD_INDEX_COLUMN, CTGD_NAME_COLUMN]
+CTGD_COLUMNS = ["subject_name", "lesson_index", "lesson_name"]
+# Tiết thứ lớn hơn thì báo lỗi dòng (1e20 không đổi được sang int, cũng không có môn nào dài vậy)
+CTGD_MAX_LESSON_INDEX = 10_000
+
+# "Tiết 3" -> 3, giống int(str.replace("Tiết", "")) trước đây
+_PERIOD_PATTERN = r"^Tiết\s*(\d+)$"
+# str() của ô trống (None của openpyxl, NaN của pandas)
+_BLANK_VALUES = ["", "nan", "none"]
+
+
+class CtgdParseResult(NamedTuple):
+    programs: pd.DataFrame  # subject_name, lesson_index, lesson_name
+    errors: List[Dict[str, Any]]  # {"row", "column", "message"}, row là số dòng trong Excel
+
+
+def read_first_sheet(contents: bytes, usecols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Sheet đầu tiên của file Excel, dòng đầu là tên cột (như pd.read_excel mặc định).
+    Đọc bằng openpyxl read_only: stream từng dòng, không dựng cây ô của cả workbook
+    và không parse các sheet khác. Có usecols thì chỉ dựng các cột đó (cột thiếu bị bỏ qua).
+    """
+    try:
+        workbook = load_workbook(BytesIO(contents), read_only=True, data_only=True)
+    except (InvalidFileException, BadZipFile):
+        # Không phải .xlsx (vd .xls): để pandas tự chọn engine
+        return pd.read_excel(
+            BytesIO(contents),
+            usecols=None if usecols is None else (lambda name: name in usecols),
+        )
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        data = list(rows)
+    finally:
+        workbook.close()
+
+    if header is None:
+        return pd.DataFrame()
+    width = max([len(header)] + [len(row) for row in data])
+    names = _column_names(list(header) + [None] * (width - len(header)))
+    return pd.DataFrame({
+        name: [row[i] if i < len(row) else None for row in data]
+        for i, name in enumerate(names)
+        if usecols is None or name in usecols
+    })
+
+
+def _column_names(header: List) -> List:
+    """
+    Tên cột như pandas: ô trống thành "Unnamed: i", tên trùng thêm ".1", ".2"...
+    """
+    names = []
+    seen: Dict = {}
+    for i, name in enumerate(header):
+        if name is None:
+            name = f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def parse_tkb(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    TKB dạng bảng (cột "Tiết" và các cột "Thứ 2".."Thứ 6") thành các dòng
+    day_of_week, period_index, subject_name. Dòng không phải "Tiết N" (N từ 1 đến 5)
+    và ô trống bị bỏ; thứ tự theo dòng rồi theo thứ như khi duyệt từng dòng.
+    """
+    day_columns = [column for column in TKB_DAY_COLUMNS if column in df.columns]
+    if TKB_PERIOD_COLUMN not in df.columns or not day_columns:
+        return pd.DataFrame(columns=TKB_COLUMNS)
+
+    periods = pd.to_numeric(
+        df[TKB_PERIOD_COLUMN].astype(str).str.strip().str.extract(_PERIOD_PATTERN, expand=False),
+        errors="coerce",
+    ).to_numpy()
+    valid = (periods >= 1) & (periods <= 5)
+
+    # Melt các cột ngày: trải bảng (dòng x ngày) theo thứ tự dòng, khỏi phải sort lại
+    cells = df.loc[valid, day_columns].to_numpy(dtype=object)
+    subjects = pd.Series(cells.ravel(), dtype=object).astype(str).str.strip()
+    keep = (~subjects.str.lower().isin(_BLANK_VALUES)).to_numpy()
+    return pd.DataFrame({
+        "day_of_week": np.tile([TKB_DAY_COLUMNS[c] for c in day_columns], len(cells))[keep],
+        "period_index": np.repeat(periods[valid].astype(int), len(day_columns))[keep],
+        "subject_name": subjects.to_numpy()[keep],
+    })
+
+
+def parse_ctgd(df: pd.DataFrame) -> CtgdParseResult:
+    """
+    CTGD (cột "Môn học", "Tiết thứ", "Tên bài") thành các dòng subject_name, lesson_index,
+    lesson_name. Dòng lỗi không bị bỏ qua âm thầm mà được liệt kê trong errors;
+    dòng trống hoàn toàn thì bỏ. Trùng (môn, tiết) thì giữ dòng sau cùng như khi tra cứu
+    trong YearPlan, các dòng trước được báo lỗi.
+    Chỉ dùng phép toán theo cột (và hash khi tìm trùng) nên thời gian tăng tuyến tính.
+    """
+    rows = pd.Series(np.arange(len(df)) + 2, index=df.index)  # dòng 1 là tên cột
+    subjects = _text(df[CTGD_SUBJECT_COLUMN])
+    names = _text(df[CTGD_NAME_COLUMN])
+    raw_index = _text(df[CTGD_INDEX_COLUMN])
+    numbers = pd.to_numeric(raw_index, errors="coerce")
+
+    missing_index = raw_index.eq("")
+    positive_integer = numbers.ge(1) & numbers.mod(1).eq(0)
+    empty = subjects.eq("") & names.eq("") & missing_index
+    checks = [
+        (subjects.eq(""), CTGD_SUBJECT_COLUMN, "Missing subject"),
+        (missing_index, CTGD_INDEX_COLUMN, "Missing lesson index"),
+        (
+            ~missing_index & ~positive_integer,
+            CTGD_INDEX_COLUMN,
+            "Lesson index must be a positive integer: " + raw_index,
+        ),
+        (
+            positive_integer & numbers.gt(CTGD_MAX_LESSON_INDEX),
+            CTGD_INDEX_COLUMN,
+            f"Lesson index must not exceed {CTGD_MAX_LESSON_INDEX}: " + raw_index,
+        ),
+        (names.eq(""), CTGD_NAME_COLUMN, "Missing lesson name"),
+    ]
+    invalid = pd.Series(False, index=df.index)
+    errors = []
+    for mask, column, message in checks:
+        mask = mask & ~empty
+        invalid |= mask
+        errors.append(pd.DataFrame({
+            "row": rows[mask],
+            "column": column,
+            "message": message[mask] if isinstance(message, pd.Series) else message,
+        }))
+
+    programs = pd.DataFrame({
+        "subject_name": subjects,
+        "lesson_index": numbers,
+        "lesson_name": names,
+        "row": rows,
+    })[~invalid & ~empty]
+    programs["lesson_index"] = programs["lesson_index"].astype(int)
+
+    keys = ["subject_name", "lesson_index"]
+    duplicated = programs.duplicated(keys, keep="last")
+    if duplicated.any():
+        kept_row = programs.groupby(keys)["row"].transform("max")
+        duplicates = programs[duplicated]
+        errors.append(pd.DataFrame({
+            "row": duplicates["row"],
+            "column": CTGD_INDEX_COLUMN,
+            "message": "Duplicate lesson " + duplicates["subject_name"] + " "
+            + duplicates["lesson_index"].astype(str) + ", replaced by row "
+            + kept_row[duplicated].astype(str),
+        }))
+        programs = programs[~duplicated]
+
+    report = pd.concat(errors).sort_values("row", kind="stable")
+    return CtgdParseResult(
+        programs=programs[CTGD_COLUMNS].reset_index(drop=True),
+        errors=[
+            {"row": int(row), "column": column, "message": message}
+            for row, column, message in report.itertuples(index=False)
+        ],
+    )
+
+
+def _text(column: pd.Series) -> pd.Series:
+    # Ô trống (None/NaN) thành "", còn lại str() rồi bỏ khoảng trắng hai đầu
+    return column.astype(object).where(column.notna(), "").astype(str).str.strip()
@@ -1,71 +1,67 @@
 from sqlalchemy.orm import Session
-from fastapi import UploadFile
-from typing import Dict, List
-import pandas as pd
-from io import BytesIO
+from typing import Any, Callable, Dict, Optional
 
 from repositories.timetable_repository import TimetableRepository
 from repositories.teaching_program_repository import TeachingProgramRepository
+from repositories.lesson_search_repository import LessonSearchRepository
+from services.excel_import import (
+    CTGD_REQUIRED_COLUMNS,
+    parse_ctgd,
+    parse_tkb,
+    read_first_sheet,
+)
+from services.year_plan import year_plan_cache
 from core.exceptions import BadRequestException, ValidationException
 from core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Số lỗi tối đa trả về khi upload CTGD (error_count vẫn là tổng số)
+MAX_REPORTED_ERRORS = 200
+
+# progress(số dòng hợp lệ đọc được, số dòng đã insert)
+ImportProgressCallback = Callable[[int, int], None]
+
 
 class ExcelService:
     def __init__(self, db: Session):
         self.db = db
         self.timetable_repo = TimetableRepository(db)
         self.teaching_program_repo = TeachingProgramRepository(db)
+        self.lesson_search_repo = LessonSearchRepository(db)
     
-    def process_tkb_file(
-        self, file: UploadFile, user_id: int
+    def process_tkb(
+        self,
+        contents: bytes,
+        user_id: int,
+        progress: Optional[ImportProgressCallback] = None,
     ) -> Dict[str, int]:
         try:
-            contents = file.file.read()
-            df = pd.read_excel(BytesIO(contents))
-            
-            self.timetable_repo.delete_by_user_id(user_id)
-            
-            day_mapping = {
-                "Thứ 2": 2,
-                "Thứ 3": 3,
-                "Thứ 4": 4,
-                "Thứ 5": 5,
-                "Thứ 6": 6,
-            }
+            rows = parse_tkb(read_first_sheet(contents))
             
-            timetables = []
-            records_count = 0
+            timetables = [
+                {
+                    "user_id": user_id,
+                    "day_of_week": day_of_week,
+                    "period_index": period_index,
+                    "subject_name": subject_name,
+                }
+                for day_of_week, period_index, subject_name in zip(
+                    rows["day_of_week"].tolist(),
+                    rows["period_index"].tolist(),
+                    rows["subject_name"].tolist(),
+                )
+            ]
+            records_count = len(timetables)
+            if progress:
+                progress(records_count, 0)
             
-            for _, row in df.iterrows():
-                period_str = str(row.get("Tiết", "")).strip()
-                
-                if not period_str or not period_str.startswith("Tiết"):
-                    continue
-                
-                try:
-                    period_index = int(period_str.replace("Tiết", "").strip())
-                except (ValueError, AttributeError):
-                    continue
-                
-                if period_index < 1 or period_index > 5:
-                    continue
-                
-                for day_name, day_of_week in day_mapping.items():
-                    subject = str(row.get(day_name, "")).strip()
-                    
-                    if subject and subject.lower() not in ["", "nan", "none"]:
-                        timetables.append({
-                            "user_id": user_id,
-                            "day_of_week": day_of_week,
-                            "period_index": period_index,
-                            "subject_name": subject,
-                        })
-                        records_count += 1
+            self.timetable_repo.replace_by_user_id(
+                user_id, timetables, _batch_progress(progress, records_count)
+            )
+            self.db.commit()
             
-            if timetables:
-                self.timetable_repo.bulk_create(timetables)
+            year_plan_cache.invalidate(user_id)
             
             logger.info(
                 "TKB processed",
@@ -75,19 +71,25 @@ class ExcelService:
             
             return {"records_processed": records_count}
         except Exception as e:
+            self.db.rollback()
             logger.error("Error processing TKB file", error=str(e), exc_info=True)
             raise BadRequestException(f"Error processing TKB file: {str(e)}")
     
-    def process_ctgd_file(
-        self, file: UploadFile, user_id: int
-    ) -> Dict[str, int]:
+    def process_ctgd(
+        self,
+        contents: bytes,
+        user_id: int,
+        progress: Optional[ImportProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """
+        Thay CTGD của user bằng các dòng hợp lệ trong file. Dòng lỗi (thiếu cột,
+        tiết không phải số nguyên dương, trùng môn/tiết) được trả về trong errors.
+        """
         try:
-            contents = file.file.read()
-            df = pd.read_excel(BytesIO(contents))
+            df = read_first_sheet(contents, usecols=CTGD_REQUIRED_COLUMNS)
             
-            required_columns = ["Môn học", "Tiết thứ", "Tên bài"]
             missing_columns = [
-                col for col in required_columns if col not in df.columns
+                col for col in CTGD_REQUIRED_COLUMNS if col not in df.columns
             ]
             
             if missing_columns:
@@ -95,45 +97,57 @@ class ExcelService:
                     f"Missing required columns: {', '.join(missing_columns)}"
                 )
             
-            self.teaching_program_repo.delete_by_user_id(user_id)
-            
-            programs = []
-            records_count = 0
+            result = parse_ctgd(df)
             
-            for _, row in df.iterrows():
-                subject = str(row.get("Môn học", "")).strip()
-                lesson_index = row.get("Tiết thứ")
-                lesson_name = str(row.get("Tên bài", "")).strip()
-                
-                if not subject or not lesson_name:
-                    continue
-                
-                try:
-                    lesson_index = int(lesson_index)
-                except (ValueError, TypeError):
-                    continue
-                
-                programs.append({
+            programs = [
+                {
                     "user_id": user_id,
-                    "subject_name": subject,
+                    "subject_name": subject_name,
                     "lesson_index": lesson_index,
                     "lesson_name": lesson_name,
-                })
-                records_count += 1
+                }
+                for subject_name, lesson_index, lesson_name in zip(
+                    result.programs["subject_name"].tolist(),
+                    result.programs["lesson_index"].tolist(),
+                    result.programs["lesson_name"].tolist(),
+                )
+            ]
+            records_count = len(programs)
+            if progress:
+                progress(records_count, 0)
             
-            if programs:
-                self.teaching_program_repo.bulk_create(programs)
+            self.teaching_program_repo.replace_by_user_id(
+                user_id, programs, _batch_progress(progress, records_count)
+            )
+            # Chỉ mục tìm bài dựng lại trong cùng transaction với CTGD mới
+            self.lesson_search_repo.reindex_user(user_id)
+            self.db.commit()
+            
+            year_plan_cache.invalidate(user_id)
             
             logger.info(
                 "CTGD processed",
                 user_id=user_id,
                 records_count=records_count,
+                error_count=len(result.errors),
             )
             
-            return {"records_processed": records_count}
+            return {
+                "records_processed": records_count,
+                "error_count": len(result.errors),
+                "errors": result.errors[:MAX_REPORTED_ERRORS],
+            }
         except ValidationException:
             raise
         except Exception as e:
+            self.db.rollback()
             logger.error("Error processing CTGD file", error=str(e), exc_info=True)
             raise BadRequestException(f"Error processing CTGD file: {str(e)}")
 
+
+def _batch_progress(
+    progress: Optional[ImportProgressCallback], records_count: int
+) -> Optional[Callable[[int], None]]:
+    if progress is None:
+        return None
+    return lambda loaded: progress(records_count, loaded)
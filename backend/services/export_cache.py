@@ -0,0 +1,136 @@
+from collections import OrderedDict
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from threading import Lock
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator
+import hashlib
+
+from core.config import settings
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ExportFile:
+    """
+    File export đã render nằm trong buffer, đọc dần theo chunk để stream về client
+    """
+
+    __slots__ = ("stream", "size")
+
+    def __init__(self, stream: BinaryIO, size: int):
+        self.stream = stream
+        self.size = size
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            while True:
+                chunk = self.stream.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            self.stream.close()
+
+    def read(self) -> bytes:
+        try:
+            return self.stream.read()
+        finally:
+            self.stream.close()
+
+
+class ExportCache:
+    """
+    Cache file export theo nội dung: key là hash của dữ liệu report và tùy chọn render,
+    nên cùng nội dung thì dùng lại bản đã render, khác nội dung thì không lẫn nhau.
+    Giữ trong bộ nhớ, giới hạn tổng dung lượng, bản ít dùng gần đây nhất bị bỏ trước (LRU).
+    """
+
+    def __init__(self, max_bytes: int, spool_max_bytes: int = settings.EXPORT_SPOOL_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # File lớn hơn mức này không giữ trong cache để một export không đẩy hết các bản khác
+        self.max_entry_bytes = max_bytes // 4
+        self.spool_max_bytes = spool_max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(parts: Iterable[str]) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_or_render(self, key: str, render: Callable[[BinaryIO], None]) -> ExportFile:
+        """
+        Nội dung file của key; chưa có thì gọi render(buffer) để tạo.
+        Buffer nằm trong bộ nhớ, chỉ tràn ra file tạm (tự xóa) khi vượt spool_max_bytes.
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return ExportFile(BytesIO(data), len(data))
+            self.misses += 1
+
+        buffer = SpooledTemporaryFile(max_size=self.spool_max_bytes)
+        try:
+            render(buffer)
+            size = buffer.tell()
+            buffer.seek(0)
+        except Exception:
+            buffer.close()
+            raise
+
+        if size > self.max_entry_bytes:
+            return ExportFile(buffer, size)
+
+        with buffer:
+            data = buffer.read()
+        with self._lock:
+            self._add(key, data)
+            self._evict(keep=key)
+        return ExportFile(BytesIO(data), size)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _add(self, key: str, data: bytes) -> None:
+        if key in self._entries:
+            self._total_bytes -= len(self._entries[key])
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+        self._total_bytes += len(data)
+
+    def _evict(self, keep: str = None) -> None:
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            self._total_bytes -= len(self._entries.pop(key))
+            self.evictions += 1
+            logger.debug("Export cache entry evicted", key=key)
+
+
+export_cache = ExportCache(max_bytes=settings.EXPORT_CACHE_MAX_BYTES)
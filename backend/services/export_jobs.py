@@ -0,0 +1,436 @@
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+import multiprocessing
+import os
+import uuid
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.database import SessionLocal
+from core.exceptions import BadRequestException, NotFoundException
+from core.logging_config import get_logger, setup_logging
+from models import ExportJob, User
+from repositories.export_job_repository import ExportJobRepository
+from services.export_cache import ExportCache
+from services.export_service import EXPORT_KINDS, ExportService
+from services.pdf_renderer import get_pdf_styles
+from services.parallel_pdf import merge_pdfs, pdf_chunks, render_pdf_chunk
+from services.report_models import Report
+from services.weekly_report_service import WeeklyReportService
+
+logger = get_logger(__name__)
+
+JOBS_DIR = os.path.join(settings.EXPORT_DIR, "jobs")
+
+
+def job_path(job: ExportJob) -> str:
+    suffix, _ = EXPORT_KINDS[job.kind]
+    return os.path.join(JOBS_DIR, f"{job.id}{suffix}")
+
+
+def _progress_path(path: str) -> str:
+    return f"{path}.progress"
+
+
+def _write_progress(path: str, done: int, total: int) -> None:
+    # Ghi ra file tạm rồi đổi tên để process API không đọc phải file dở
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(f"{done} {total}")
+    os.replace(tmp_path, path)
+
+
+def _read_progress(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        with open(path) as f:
+            done, total = f.read().split()
+        return int(done), int(total)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def init_export_worker() -> None:
+    # Process con được spawn mới: cấu hình log giống process API, đăng ký font PDF một lần
+    setup_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+    get_pdf_styles()
+
+
+def render_export_job(kind: str, report: Report, path: str) -> int:
+    """
+    Chạy trong process của pool: render report ra file kết quả, trả về số byte.
+    File progress tồn tại trong lúc render, báo số tuần đã xong cho API.
+    """
+    progress_path = _progress_path(path)
+    tmp_path = f"{path}.tmp"
+    _write_progress(progress_path, 0, len(report.weeks))
+    try:
+        with open(tmp_path, "wb") as output:
+            ExportService().render(
+                kind,
+                report,
+                output,
+                lambda done, total: _write_progress(progress_path, done, total),
+            )
+        os.replace(tmp_path, path)
+    finally:
+        _remove(tmp_path)
+    return os.path.getsize(path)
+
+
+class _PdfParts:
+    """
+    Các nhóm tuần của một job PDF đang render song song, ghép lại khi đủ
+    """
+
+    def __init__(self, chunks: List[Report], futures: List[Future]):
+        self.weeks = [len(chunk.weeks) for chunk in chunks]
+        self.total_weeks = sum(self.weeks)
+        self.futures = futures
+        self.done_weeks = 0
+        self.remaining = len(futures)
+        self.failed = False
+        self.lock = Lock()
+
+
+class ExportJobRunner:
+    """
+    Render export ở nền trong process pool, tối đa EXPORT_WORKERS process.
+    Trạng thái job nằm trong bảng export_jobs, file kết quả nằm trong EXPORT_DIR/jobs.
+    PDF được chia thành nhóm tuần render song song trên cùng pool rồi ghép lại.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[str, List[Future]] = {}
+        self._lock = Lock()
+
+    def submit(self, job: ExportJob, reports: List[Report]) -> None:
+        """
+        reports: mỗi lớp một report; Excel chỉ nhận một report
+        """
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        if job.kind == "pdf":
+            self._submit_pdf(job, reports)
+            return
+
+        job_id, path = job.id, job_path(job)
+        with self._lock:
+            future = self._submit_task(render_export_job, job.kind, reports[0], path)
+            self._futures[job_id] = [future]
+        future.add_done_callback(lambda f: self._on_done(job_id, path, f))
+
+    def run(self, fn, *args) -> Future:
+        """
+        Chạy một hàm bất kỳ trên cùng pool, dùng chung giới hạn EXPORT_WORKERS process
+        """
+        with self._lock:
+            return self._submit_task(fn, *args)
+
+    def progress(self, job: ExportJob) -> Optional[Tuple[int, int]]:
+        """
+        (số tuần đã render, tổng số tuần) nếu job đang chạy
+        """
+        return _read_progress(_progress_path(job_path(job)))
+
+    def recover(self) -> None:
+        """
+        Gọi lúc khởi động: job pending của lần chạy trước không còn ai render nữa
+        """
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        db = SessionLocal()
+        try:
+            repo = ExportJobRepository(db)
+            count = repo.fail_pending("Interrupted by server restart")
+            if count:
+                logger.warning("Export jobs interrupted", count=count)
+            purge_expired_jobs(repo)
+        finally:
+            db.close()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn thay vì fork: process API có nhiều thread (event loop, threadpool)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_export_worker,
+            )
+        return self._executor
+
+    def _submit_task(self, fn, *args) -> Future:
+        try:
+            return self._get_executor().submit(fn, *args)
+        except BrokenProcessPool:
+            # Một process con chết (ví dụ bị OOM kill) làm hỏng cả pool, tạo pool mới
+            self._executor = None
+            return self._get_executor().submit(fn, *args)
+
+    def _submit_pdf(self, job: ExportJob, reports: List[Report]) -> None:
+        job_id, path = job.id, job_path(job)
+        chunks = pdf_chunks(reports)
+        with self._lock:
+            futures = [self._submit_task(render_pdf_chunk, chunk) for chunk in chunks]
+            self._futures[job_id] = futures
+        parts = _PdfParts(chunks, futures)
+        _write_progress(_progress_path(path), 0, parts.total_weeks)
+        for index, future in enumerate(futures):
+            future.add_done_callback(
+                lambda f, index=index: self._on_pdf_chunk_done(job_id, path, parts, index, f)
+            )
+
+    def _on_pdf_chunk_done(
+        self, job_id: str, path: str, parts: _PdfParts, index: int, future: Future
+    ) -> None:
+        error = _future_error(future)
+        with parts.lock:
+            if parts.failed:
+                return
+            if error is not None:
+                parts.failed = True
+            else:
+                parts.remaining -= 1
+                parts.done_weeks += parts.weeks[index]
+            finished = parts.remaining == 0
+
+        if error is not None:
+            for other in parts.futures:
+                other.cancel()
+            self._finish(job_id, path, error=error)
+            return
+        if not finished:
+            _write_progress(_progress_path(path), parts.done_weeks, parts.total_weeks)
+            return
+
+        # Nhóm cuối xong: ghép theo đúng thứ tự nhóm (chạy trong thread quản lý của pool)
+        tmp_path = f"{path}.tmp"
+        try:
+            results = [f.result() for f in parts.futures]
+            with open(tmp_path, "wb") as output:
+                if len(results) == 1:
+                    output.write(results[0])
+                else:
+                    merge_pdfs(results, output)
+            os.replace(tmp_path, path)
+        except Exception as exc:
+            _remove(tmp_path)
+            self._finish(job_id, path, error=exc)
+            return
+        self._finish(job_id, path, file_size=os.path.getsize(path))
+
+    def _on_done(self, job_id: str, path: str, future: Future) -> None:
+        error = _future_error(future)
+        if error is not None:
+            self._finish(job_id, path, error=error)
+        else:
+            self._finish(job_id, path, file_size=future.result())
+
+    def _finish(
+        self,
+        job_id: str,
+        path: str,
+        file_size: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+        db = SessionLocal()
+        try:
+            repo = ExportJobRepository(db)
+            if error is not None:
+                logger.error("Export job failed", job_id=job_id, error=str(error))
+                repo.finish(job_id, "error", error=str(error) or type(error).__name__)
+            else:
+                repo.finish(job_id, "completed", file_size=file_size)
+                logger.info("Export job completed", job_id=job_id)
+        finally:
+            db.close()
+            # Xóa sau khi ghi trạng thái để API không thấy job pending mà mất tiến độ
+            _remove(_progress_path(path))
+
+
+def _future_error(future: Future) -> Optional[BaseException]:
+    if future.cancelled():
+        return CancelledError("Cancelled")
+    return future.exception()
+
+
+def purge_expired_jobs(repo: ExportJobRepository) -> None:
+    before = datetime.now() - timedelta(hours=settings.EXPORT_JOB_TTL_HOURS)
+    for job in repo.delete_created_before(before):
+        _remove(job_path(job))
+
+
+export_job_runner = ExportJobRunner(max_workers=settings.EXPORT_WORKERS)
+
+# Kiểm tra trùng và tạo job phải liền nhau, nếu không hai request giống nhau cùng tạo job
+_create_lock = Lock()
+
+
+class ExportJobService:
+    def __init__(self, db: Session, runner: ExportJobRunner = export_job_runner):
+        self.repo = ExportJobRepository(db)
+        self.weekly_service = WeeklyReportService(db)
+        self.export_service = ExportService()
+        self.runner = runner
+
+    def create_job(
+        self,
+        user: User,
+        kind: str,
+        start_week: int,
+        end_week: int,
+        class_id: Optional[int] = None,
+        class_ids: Optional[List[int]] = None,
+    ) -> ExportJob:
+        """
+        class_ids: in nhiều lớp trong một file PDF, mỗi lớp nối tiếp theo thứ tự truyền vào
+        """
+        if start_week > end_week:
+            raise BadRequestException("start_week must not be greater than end_week")
+        if kind == "excel" and start_week != end_week:
+            raise BadRequestException("Excel export covers a single week, use excel_all for a range")
+        if class_ids and kind != "pdf":
+            raise BadRequestException("Multiple classes are only supported for PDF export")
+        if class_ids and class_id is not None:
+            raise BadRequestException("Use either class_id or class_ids")
+
+        purge_expired_jobs(self.repo)
+        self.weekly_service.ensure_default_holidays(user.id)
+        report_engine = self.weekly_service.report_engine
+        if class_ids:
+            class_ids = list(dict.fromkeys(class_ids))
+            by_class = {
+                report.class_id: report
+                for report in report_engine.build_class_reports(user, start_week, end_week, class_ids)
+            }
+            missing = [cid for cid in class_ids if cid not in by_class]
+            if missing:
+                raise NotFoundException("Class", missing[0])
+            reports = [by_class[cid] for cid in class_ids]
+            content_key = ExportCache.make_key(
+                [kind, *(self.export_service.content_key(kind, report) for report in reports)]
+            )
+        else:
+            reports = [report_engine.build_report(user, start_week, end_week, class_id)]
+            content_key = self.export_service.content_key(kind, reports[0])
+        class_ids_value = _format_class_ids(class_ids)
+
+        with _create_lock:
+            existing = self._find_reusable(user.id, content_key, class_id, class_ids_value)
+            if existing:
+                logger.info("Export job deduplicated", job_id=existing.id, user_id=user.id)
+                return existing
+            if self.repo.count_pending(user.id) >= settings.EXPORT_MAX_ACTIVE_JOBS_PER_USER:
+                raise BadRequestException("Too many export jobs in progress, please wait")
+            job = self.repo.create(
+                id=uuid.uuid4().hex,
+                user_id=user.id,
+                class_id=class_id,
+                class_ids=class_ids_value,
+                kind=kind,
+                start_week=start_week,
+                end_week=end_week,
+                content_key=content_key,
+                status="pending",
+                created_at=datetime.now(),
+            )
+
+        self.runner.submit(job, reports)
+        return job
+
+    def get_job(self, user_id: int, job_id: str) -> ExportJob:
+        job = self.repo.get_by_user_and_id(user_id, job_id)
+        if not job:
+            raise NotFoundException("Export job", job_id)
+        return job
+
+    def describe(self, job: ExportJob) -> Dict[str, Any]:
+        status, progress = job.status, 0
+        if job.status == "completed":
+            progress = 100
+        elif job.status == "pending":
+            running = self.runner.progress(job)
+            if running:
+                done, total = running
+                status = "running"
+                # Còn bước ghi file sau tuần cuối nên chưa báo 100
+                progress = min(99, done * 100 // max(total, 1))
+        return {
+            "id": job.id,
+            "kind": job.kind,
+            "start_week": job.start_week,
+            "end_week": job.end_week,
+            "class_id": job.class_id,
+            "class_ids": _parse_class_ids(job.class_ids),
+            "status": status,
+            "progress": progress,
+            "file_size": job.file_size,
+            "error": job.error,
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+        }
+
+    def get_result(self, user_id: int, job_id: str) -> Tuple[str, str, str]:
+        """
+        (đường dẫn file, media type, tên file tải về) của job đã xong
+        """
+        job = self.get_job(user_id, job_id)
+        path = job_path(job)
+        if job.status != "completed":
+            raise BadRequestException(f"Export job is not completed (status: {job.status})")
+        if not os.path.exists(path):
+            raise NotFoundException("Export file", job_id)
+
+        suffix, media_type = EXPORT_KINDS[job.kind]
+        if job.start_week == job.end_week:
+            filename = f"bao_giang_tuan_{job.start_week}{suffix}"
+        else:
+            filename = f"bao_giang_tuan_{job.start_week}_{job.end_week}{suffix}"
+        class_ids = _parse_class_ids(job.class_ids)
+        if class_ids:
+            filename = f"{filename[:-len(suffix)]}_{len(class_ids)}_lop{suffix}"
+        return path, media_type, filename
+
+    def _find_reusable(
+        self,
+        user_id: int,
+        content_key: str,
+        class_id: Optional[int],
+        class_ids: Optional[str],
+    ) -> Optional[ExportJob]:
+        # Job giống hệt đang chờ hoặc đã xong mà file còn thì dùng lại
+        for job in self.repo.get_by_content_key(user_id, content_key):
+            if job.class_id != class_id or job.class_ids != class_ids:
+                continue
+            if job.status == "pending":
+                return job
+            if job.status == "completed" and os.path.exists(job_path(job)):
+                return job
+        return None
+
+
+def _format_class_ids(class_ids: Optional[List[int]]) -> Optional[str]:
+    return ",".join(str(cid) for cid in class_ids) if class_ids else None
+
+
+def _parse_class_ids(value: Optional[str]) -> Optional[List[int]]:
+    return [int(cid) for cid in value.split(",")] if value else None
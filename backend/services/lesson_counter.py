@@ -0,0 +1,71 @@
+from typing import Dict, List
+
+
+class LessonCounter:
+    """
+    Bộ đếm tiết lũy kế theo môn, dùng prefix sum trên số tiết thực dạy mỗi tuần
+    (đã trừ tiết rơi vào ngày nghỉ và tính cả tiết do giáo viên ghi đè).
+
+    lesson_index của tiết thứ n trong tuần w = offset + prefix[w - 1] + n,
+    tra cứu một tuần là O(số môn). Cập nhật một tuần chỉ tính lại phần prefix phía sau.
+    """
+
+    def __init__(self, offsets: Dict[str, int], max_weeks: int):
+        self.offsets = offsets
+        self.max_weeks = max_weeks
+        # taught[subject][w] = số tiết đã dạy trong tuần w (w từ 1)
+        # prefix[subject][w] = tổng số tiết đã dạy từ tuần 1 đến tuần w, prefix[...][0] = 0
+        self._taught: Dict[str, List[int]] = {}
+        self._prefix: Dict[str, List[int]] = {}
+
+    def load(self, weekly_counts: Dict[int, Dict[str, int]]) -> None:
+        """
+        Nạp số tiết của mọi tuần và dựng prefix sum trong một lượt
+        """
+        self._taught = {}
+        for week_number, counts in weekly_counts.items():
+            for subject, count in counts.items():
+                self._row(subject)[week_number] = count
+        self._prefix = {}
+        for subject in self._taught:
+            self._rebuild_prefix(subject, 1)
+
+    def set_week(self, week_number: int, counts: Dict[str, int]) -> List[str]:
+        """
+        Cập nhật số tiết của một tuần, trả về các môn bị thay đổi
+        """
+        changed = []
+        for subject in set(counts) | set(self._subjects_taught_in(week_number)):
+            row = self._row(subject)
+            count = counts.get(subject, 0)
+            if row[week_number] != count:
+                row[week_number] = count
+                self._rebuild_prefix(subject, week_number)
+                changed.append(subject)
+        return changed
+
+    def week_start(self, week_number: int) -> Dict[str, int]:
+        """
+        lesson_index ngay trước tiết đầu tiên của mỗi môn trong tuần
+        """
+        return {
+            subject: self.offsets.get(subject, 0) + prefix[week_number - 1]
+            for subject, prefix in self._prefix.items()
+        }
+
+    def _subjects_taught_in(self, week_number: int) -> List[str]:
+        return [s for s, row in self._taught.items() if row[week_number]]
+
+    def _row(self, subject: str) -> List[int]:
+        row = self._taught.get(subject)
+        if row is None:
+            row = [0] * (self.max_weeks + 1)
+            self._taught[subject] = row
+            self._prefix[subject] = [0] * (self.max_weeks + 1)
+        return row
+
+    def _rebuild_prefix(self, subject: str, from_week: int) -> None:
+        taught = self._taught[subject]
+        prefix = self._prefix.setdefault(subject, [0] * (self.max_weeks + 1))
+        for week_number in range(from_week, self.max_weeks + 1):
+            prefix[week_number] = prefix[week_number - 1] + taught[week_number]
@@ -0,0 +1,52 @@
+from concurrent.futures import Executor
+from dataclasses import replace
+from io import BytesIO
+from typing import BinaryIO, Iterable, List
+
+from pypdf import PdfWriter
+
+from core.config import settings
+from services.export_service import ExportService
+from services.report_models import Report
+
+
+def pdf_chunks(reports: Iterable[Report], chunk_weeks: int = settings.EXPORT_PDF_CHUNK_WEEKS) -> List[Report]:
+    """
+    Chia các report (mỗi lớp một report) thành từng nhóm chunk_weeks tuần, giữ nguyên thứ tự.
+    Mỗi tuần luôn bắt đầu ở trang mới nên ghép PDF các nhóm lại ra đúng file render một lần.
+    """
+    chunks = []
+    for report in reports:
+        for start in range(0, len(report.weeks), chunk_weeks):
+            chunks.append(replace(report, weeks=report.weeks[start:start + chunk_weeks]))
+    return chunks
+
+
+def render_pdf_chunk(report: Report) -> bytes:
+    """
+    Chạy trong process của pool: PDF của một nhóm tuần
+    """
+    buffer = BytesIO()
+    ExportService().render("pdf", report, buffer)
+    return buffer.getvalue()
+
+
+def merge_pdfs(parts: Iterable[bytes], output: BinaryIO) -> None:
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(BytesIO(part))
+    writer.write(output)
+    writer.close()
+
+
+def render_pdf_parallel(
+    reports: List[Report],
+    executor: Executor,
+    output: BinaryIO,
+    chunk_weeks: int = settings.EXPORT_PDF_CHUNK_WEEKS,
+) -> None:
+    """
+    Render các nhóm tuần song song trên executor rồi ghép thành một PDF
+    """
+    chunks = pdf_chunks(reports, chunk_weeks)
+    merge_pdfs(executor.map(render_pdf_chunk, chunks), output)
@@ -0,0 +1,322 @@
+from typing import BinaryIO, Callable, List, Optional, Sequence, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+
+from core.logging_config import get_logger
+from services.pdf_renderer import (
+    PAGE_MARGIN_BOTTOM,
+    PAGE_MARGIN_TOP,
+    PAGE_SIZE,
+    SIGNATURE_COL_WIDTHS,
+    SIGNATURE_GAP,
+    TABLE_COL_WIDTHS,
+    TABLE_HEADER,
+    TITLE_COL_WIDTHS,
+    TITLE_GAP,
+    PdfStyles,
+    get_pdf_styles,
+    render_pdf,
+    signature_rows,
+)
+from services.report_models import Report, WeeklyGrid
+from utils.date_utils import format_vietnamese_date
+
+logger = get_logger(__name__)
+
+# Hình học giống hệt SimpleDocTemplate + Table của render_pdf: lề trái/phải mặc định 1 inch,
+# frame đệm 6pt, ô đệm 6pt hai bên và 3pt trên dưới, hàng tiêu đề bảng đệm 8pt
+FRAME_PADDING = 6
+CELL_PADDING_X = 6
+CELL_PADDING_Y = 3
+HEADER_PADDING_Y = 8
+HEADER_FONT_SIZE = 10
+HEADER_LEADING = 12
+HEADER_BACKGROUND = colors.HexColor("#4472C4")
+ROW_BACKGROUNDS = (colors.white, colors.HexColor("#F2F2F2"))
+GRID_WIDTH = 0.5
+
+PAGE_WIDTH, PAGE_HEIGHT = PAGE_SIZE
+CONTENT_LEFT = inch + FRAME_PADDING
+CONTENT_WIDTH = PAGE_WIDTH - 2 * inch - 2 * FRAME_PADDING
+CONTENT_TOP = PAGE_HEIGHT - PAGE_MARGIN_TOP - FRAME_PADDING
+CONTENT_HEIGHT = PAGE_HEIGHT - PAGE_MARGIN_TOP - PAGE_MARGIN_BOTTOM - 2 * FRAME_PADDING
+
+
+class _DoesNotFit(Exception):
+    """
+    Tuần không vừa bố cục cố định một trang (quá nhiều dòng, từ dài hơn ô)
+    """
+
+
+class _Wrapper:
+    """
+    Ngắt dòng như Paragraph (tham lam theo từ), chỉ tính khi chuỗi dài hơn ô; nhớ kết quả
+    vì tên bài lặp lại giữa các tuần
+    """
+
+    def __init__(self, font: str, size: float):
+        self.font = font
+        self.size = size
+        self._cache = {}
+
+    def __call__(self, text: str, width: float) -> List[str]:
+        key = (text, width)
+        lines = self._cache.get(key)
+        if lines is None:
+            lines = self._cache[key] = self._wrap(text, width)
+        return lines
+
+    def _wrap(self, text: str, width: float) -> List[str]:
+        words = text.split()
+        if not words:
+            return []
+        line = " ".join(words)
+        if stringWidth(line, self.font, self.size) <= width:
+            return [line]
+        space = stringWidth(" ", self.font, self.size)
+        lines = []
+        current: List[str] = []
+        current_width = 0.0
+        for word in words:
+            word_width = stringWidth(word, self.font, self.size)
+            if word_width > width:
+                # Paragraph sẽ cắt từ dài (splitLongWords), để render_pdf xử lý
+                raise _DoesNotFit(word)
+            if current and current_width + space + word_width > width:
+                lines.append(" ".join(current))
+                current, current_width = [word], word_width
+            elif current:
+                current.append(word)
+                current_width += space + word_width
+            else:
+                current, current_width = [word], word_width
+        lines.append(" ".join(current))
+        return lines
+
+
+class _Layout:
+    """
+    Font và bộ ngắt dòng dùng cho cả file
+    """
+
+    def __init__(self, styles: PdfStyles):
+        self.styles = styles
+        self.cell = _Wrapper(styles.cell.fontName, styles.cell.fontSize)
+        self.title = _Wrapper(styles.title.fontName, styles.title.fontSize)
+        self.signature = _Wrapper(styles.signature_left.fontName, styles.signature_left.fontSize)
+
+
+def render_pdf_canvas(
+    report: Report, output: BinaryIO, progress: Optional[Callable[[int, int], None]] = None
+) -> None:
+    """
+    Cùng kết quả với render_pdf nhưng vẽ thẳng lưới cố định lên canvas, không qua
+    bước layout của Platypus. Tuần nào không vừa một trang thì cả file render bằng
+    render_pdf (canvas chỉ ghi ra output khi save nên chưa có gì bị ghi).
+    """
+    layout = _Layout(get_pdf_styles())
+    canvas = Canvas(output, pagesize=PAGE_SIZE)
+    signature = signature_rows(report)
+    try:
+        for index, week in enumerate(report.weeks):
+            _draw_week(canvas, layout, week, signature)
+            canvas.showPage()
+            if progress:
+                progress(index + 1, len(report.weeks))
+    except _DoesNotFit as exc:
+        logger.info(
+            "PDF week does not fit fixed layout, using flow layout",
+            user_id=report.user_id,
+            reason=str(exc),
+        )
+        render_pdf(report, output, progress)
+        return
+
+    canvas.save()
+    logger.info(
+        "PDF exported",
+        user_id=report.user_id,
+        start_week=report.start_week,
+        end_week=report.end_week,
+        renderer="canvas",
+    )
+
+
+def _draw_week(
+    canvas: Canvas,
+    layout: _Layout,
+    week: WeeklyGrid,
+    signature: Sequence[Tuple[str, str]],
+) -> None:
+    styles = layout.styles
+    cell, title = styles.cell, styles.title
+
+    # Tính toàn bộ bố cục trước khi vẽ để biết tuần có vừa một trang không
+    title_widths = TITLE_COL_WIDTHS
+    title_cells = [
+        layout.title(f"TUẦN : {week.week_number}", title_widths[0] - 2 * CELL_PADDING_X),
+        layout.title(
+            f"Từ ngày : {format_vietnamese_date(week.start_date)} đến ngày : {format_vietnamese_date(week.end_date)}",
+            title_widths[1] - 2 * CELL_PADDING_X,
+        ),
+    ]
+    title_height = _row_height(title_cells, title.leading)
+
+    text_widths = [width - 2 * CELL_PADDING_X for width in TABLE_COL_WIDTHS]
+    rows = []
+    for _, label, day_date, cells in week.days():
+        for cell_idx, i in enumerate(cells):
+            rows.append([
+                [label, day_date.strftime("%d/%m")] if cell_idx == 0 else None,
+                layout.cell(str(week.period(i)), text_widths[1]),
+                layout.cell(week.lesson(i) or "", text_widths[2]),
+                layout.cell(week.note(i) or "", text_widths[3]),
+            ])
+    row_heights = [HEADER_LEADING + 2 * HEADER_PADDING_Y] + [
+        _row_height(row, cell.leading) for row in rows
+    ]
+    table_height = sum(row_heights)
+
+    signature_widths = SIGNATURE_COL_WIDTHS
+    signature_cells = [
+        [
+            layout.signature(left, signature_widths[0] - 2 * CELL_PADDING_X),
+            layout.signature(right, signature_widths[1] - 2 * CELL_PADDING_X),
+        ]
+        for left, right in signature
+    ]
+    signature_heights = [
+        _row_height(row, styles.signature_left.leading) for row in signature_cells
+    ]
+
+    total = title_height + TITLE_GAP + table_height + SIGNATURE_GAP + sum(signature_heights)
+    if total > CONTENT_HEIGHT:
+        raise _DoesNotFit(f"week {week.week_number} is {total:.0f}pt high")
+
+    # Tiêu đề: hai đoạn căn giữa trong ô, VALIGN MIDDLE
+    y = CONTENT_TOP - title_height
+    x = _centered_x(sum(title_widths))
+    canvas.setFillColor(title.textColor)
+    canvas.setFont(title.fontName, title.fontSize)
+    for lines, width in zip(title_cells, title_widths):
+        _draw_lines(
+            canvas, lines, x, y, width, title_height, title.fontSize, title.leading, align="center"
+        )
+        x += width
+
+    # Bảng: nền, chữ rồi tới lưới (cùng thứ tự với Table.draw)
+    y -= TITLE_GAP + table_height
+    x0 = _centered_x(sum(TABLE_COL_WIDTHS))
+    col_x = [x0]
+    for width in TABLE_COL_WIDTHS:
+        col_x.append(col_x[-1] + width)
+    row_y = [y + table_height]
+    for height in row_heights:
+        row_y.append(row_y[-1] - height)
+
+    canvas.setFillColor(HEADER_BACKGROUND)
+    canvas.rect(x0, row_y[1], col_x[-1] - x0, row_heights[0], stroke=0, fill=1)
+    for index in range(1, len(row_heights)):
+        canvas.setFillColor(ROW_BACKGROUNDS[(index - 1) % 2])
+        canvas.rect(x0, row_y[index + 1], col_x[-1] - x0, row_heights[index], stroke=0, fill=1)
+
+    canvas.setFillColor(colors.white)
+    canvas.setFont(styles.font_bold, HEADER_FONT_SIZE)
+    header_y = row_y[1] + (row_heights[0] + HEADER_LEADING) / 2 - HEADER_FONT_SIZE
+    for col, text in enumerate(TABLE_HEADER):
+        if col < 2:
+            canvas.drawCentredString((col_x[col] + col_x[col + 1]) / 2, header_y, text)
+        else:
+            canvas.drawString(col_x[col] + CELL_PADDING_X, header_y, text)
+
+    canvas.setFillColor(cell.textColor)
+    canvas.setFont(cell.fontName, cell.fontSize)
+    for index, row in enumerate(rows, start=1):
+        bottom, height = row_y[index + 1], row_heights[index]
+        for col, lines in enumerate(row):
+            if lines:
+                _draw_lines(
+                    canvas, lines, col_x[col], bottom, TABLE_COL_WIDTHS[col],
+                    height, cell.fontSize, cell.leading,
+                )
+
+    canvas.saveState()
+    canvas.setStrokeColor(colors.black)
+    canvas.setLineWidth(GRID_WIDTH)
+    canvas.setLineCap(1)
+    canvas.setLineJoin(1)
+    canvas.lines(
+        [(x0, row, col_x[-1], row) for row in row_y]
+        + [(col, row_y[-1], col, row_y[0]) for col in col_x]
+    )
+    canvas.restoreState()
+
+    # Chữ ký: VALIGN BOTTOM
+    y -= SIGNATURE_GAP
+    x = _centered_x(sum(signature_widths))
+    left_style, right_style = styles.signature_left, styles.signature_right
+    canvas.setFillColor(left_style.textColor)
+    canvas.setFont(left_style.fontName, left_style.fontSize)
+    for (left, right), height in zip(signature_cells, signature_heights):
+        y -= height
+        _draw_lines(
+            canvas, left, x, y, signature_widths[0], height,
+            left_style.fontSize, left_style.leading, valign="bottom",
+        )
+        _draw_lines(
+            canvas, right, x + signature_widths[0], y, signature_widths[1], height,
+            right_style.fontSize, right_style.leading, align="right", valign="bottom",
+        )
+
+
+def _row_height(row: Sequence[Optional[List[str]]], leading: float) -> float:
+    """
+    Chiều cao hàng như Table: ô nhiều dòng nhất cộng đệm trên dưới.
+    Ô None là chuỗi rỗng của Table (vẫn cao một dòng), ô [] là Paragraph rỗng (cao 0).
+    """
+    lines = max(1 if value is None else len(value) for value in row)
+    return lines * leading + 2 * CELL_PADDING_Y
+
+
+def _centered_x(width: float) -> float:
+    # hAlign CENTER trong frame, kể cả khi bảng rộng hơn frame
+    return CONTENT_LEFT + (CONTENT_WIDTH - width) / 2
+
+
+def _draw_lines(
+    canvas: Canvas,
+    lines: List[str],
+    x: float,
+    bottom: float,
+    width: float,
+    height: float,
+    font_size: float,
+    leading: float,
+    align: str = "left",
+    valign: str = "middle",
+) -> None:
+    """
+    Vẽ các dòng của một ô như Paragraph trong Table: giữa ô theo chiều dọc hoặc sát đáy,
+    dòng đầu có baseline cách đỉnh đoạn văn đúng một cỡ chữ
+    """
+    if not lines:
+        return
+    text_height = len(lines) * leading
+    if valign == "bottom":
+        top = bottom + CELL_PADDING_Y + text_height
+    else:
+        top = bottom + (height + text_height) / 2
+    baseline = top - font_size
+    left = x + CELL_PADDING_X
+    text_width = width - 2 * CELL_PADDING_X
+    for line in lines:
+        if align == "center":
+            canvas.drawCentredString(left + text_width / 2, baseline, line)
+        elif align == "right":
+            canvas.drawRightString(left + text_width, baseline, line)
+        else:
+            canvas.drawString(left, baseline, line)
+        baseline -= leading
@@ -0,0 +1,247 @@
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Lock
+from typing import BinaryIO, Callable, Dict, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from core.config import settings
+from core.logging_config import get_logger
+from services.report_models import Report, WeeklyGrid
+from utils.date_utils import format_vietnamese_date
+
+logger = get_logger(__name__)
+
+# Tên font đăng ký với ReportLab (TTF Unicode, có đủ dấu tiếng Việt)
+PDF_FONT = "LBGSans"
+PDF_FONT_BOLD = "LBGSans-Bold"
+# Font có sẵn của ReportLab, không có dấu tiếng Việt; chỉ dùng khi thiếu file TTF
+FALLBACK_FONT = "Helvetica"
+FALLBACK_FONT_BOLD = "Helvetica-Bold"
+
+PAGE_SIZE = A4
+PAGE_MARGIN_TOP = 2*cm
+PAGE_MARGIN_BOTTOM = 2*cm
+TITLE_GAP = 0.3*cm
+SIGNATURE_GAP = 1*cm
+
+TABLE_HEADER = ["THỨ / NGÀY", "TIẾT", "TÊN BÀI DẠY", "Lồng ghép"]
+# DejaVu rộng hơn Helvetica: cột ngày rộng hơn và cỡ 13 để tiêu đề không xuống dòng
+TITLE_COL_WIDTHS = [4.5*cm, 13.5*cm]
+TABLE_COL_WIDTHS = [3*cm, 1.5*cm, 8*cm, 4*cm]
+SIGNATURE_COL_WIDTHS = [8*cm, 8*cm]
+
+
+@dataclass(frozen=True)
+class PdfStyles:
+    """
+    Style dùng chung cho mọi PDF, tạo một lần mỗi process và không bị sửa sau đó
+    """
+    font: str
+    font_bold: str
+    title: ParagraphStyle
+    cell: ParagraphStyle
+    signature_left: ParagraphStyle
+    signature_right: ParagraphStyle
+    title_table: TableStyle
+    table: TableStyle
+    signature_table: TableStyle
+
+
+_styles: Optional[PdfStyles] = None
+_styles_lock = Lock()
+
+
+def register_pdf_fonts() -> Tuple[str, str]:
+    """
+    Đăng ký font TTF (PDF_FONT_PATH, PDF_FONT_BOLD_PATH) một lần cho cả process.
+    Trả về (font thường, font đậm); thiếu file font thì dùng Helvetica và ghi cảnh báo.
+    """
+    registered = pdfmetrics.getRegisteredFontNames()
+    if PDF_FONT in registered and PDF_FONT_BOLD in registered:
+        return PDF_FONT, PDF_FONT_BOLD
+    try:
+        pdfmetrics.registerFont(TTFont(PDF_FONT, settings.PDF_FONT_PATH))
+        pdfmetrics.registerFont(TTFont(PDF_FONT_BOLD, settings.PDF_FONT_BOLD_PATH))
+    except Exception as exc:
+        logger.warning(
+            "PDF font not available, falling back to Helvetica",
+            font_path=settings.PDF_FONT_PATH,
+            bold_font_path=settings.PDF_FONT_BOLD_PATH,
+            error=str(exc),
+        )
+        return FALLBACK_FONT, FALLBACK_FONT_BOLD
+    # Cho phép <b> trong Paragraph chọn đúng font đậm
+    pdfmetrics.registerFontFamily(
+        PDF_FONT, normal=PDF_FONT, bold=PDF_FONT_BOLD, italic=PDF_FONT, boldItalic=PDF_FONT_BOLD
+    )
+    logger.info("PDF fonts registered", font_path=settings.PDF_FONT_PATH)
+    return PDF_FONT, PDF_FONT_BOLD
+
+
+def get_pdf_styles() -> PdfStyles:
+    global _styles
+    if _styles is None:
+        with _styles_lock:
+            if _styles is None:
+                _styles = _build_styles(*register_pdf_fonts())
+    return _styles
+
+
+def _build_styles(font: str, font_bold: str) -> PdfStyles:
+    sample = getSampleStyleSheet()
+    return PdfStyles(
+        font=font,
+        font_bold=font_bold,
+        title=ParagraphStyle(
+            "LBGTitle",
+            parent=sample["Heading1"],
+            fontSize=13,
+            textColor=colors.HexColor("#000000"),
+            spaceAfter=10,
+            alignment=TA_CENTER,
+            fontName=font_bold,
+        ),
+        cell=ParagraphStyle(
+            "LBGCell", parent=sample["Normal"], fontName=font, fontSize=9, alignment=TA_LEFT
+        ),
+        signature_left=ParagraphStyle(
+            "LBGSignatureLeft", parent=sample["Normal"], fontName=font, fontSize=10, alignment=TA_LEFT
+        ),
+        signature_right=ParagraphStyle(
+            "LBGSignatureRight", parent=sample["Normal"], fontName=font, fontSize=10, alignment=TA_RIGHT
+        ),
+        title_table=TableStyle([
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ]),
+        table=TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#4472C4")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ("ALIGN", (2, 0), (2, -1), "LEFT"),
+            ("ALIGN", (3, 0), (3, -1), "LEFT"),
+            ("FONTNAME", (0, 0), (-1, 0), font_bold),
+            ("FONTSIZE", (0, 0), (-1, 0), 10),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+            ("TOPPADDING", (0, 0), (-1, 0), 8),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#F2F2F2")]),
+        ]),
+        signature_table=TableStyle([
+            ("VALIGN", (0, 0), (-1, -1), "BOTTOM"),
+        ]),
+    )
+
+
+class _Escaper:
+    """
+    Escape chữ cho markup của Paragraph, mỗi chuỗi một lần cho cả file
+    (tên bài và ghi chú lặp lại rất nhiều giữa các tuần)
+    """
+
+    def __init__(self):
+        self._cache: Dict[str, str] = {}
+
+    def __call__(self, text: Optional[str]) -> str:
+        if not text:
+            return ""
+        escaped = self._cache.get(text)
+        if escaped is None:
+            escaped = self._cache[text] = escape(text)
+        return escaped
+
+
+def render_pdf(
+    report: Report, output: BinaryIO, progress: Optional[Callable[[int, int], None]] = None
+) -> None:
+    """
+    PDF của report: mỗi tuần một trang gồm tiêu đề, bảng tiết dạy và phần chữ ký
+    """
+    styles = get_pdf_styles()
+    text = _Escaper()
+    doc = SimpleDocTemplate(
+        output, pagesize=PAGE_SIZE, topMargin=PAGE_MARGIN_TOP, bottomMargin=PAGE_MARGIN_BOTTOM
+    )
+    story = []
+
+    # Phần chữ ký giống nhau ở mọi tuần, chỉ escape một lần
+    signature_texts = tuple(
+        (text(left), text(right)) for left, right in signature_rows(report)
+    )
+
+    for index, week in enumerate(report.weeks):
+        if index > 0:
+            story.append(PageBreak())
+        story.extend(_week_flowables(week, styles, text, signature_texts))
+        if progress:
+            progress(index + 1, len(report.weeks))
+
+    doc.build(story)
+    logger.info(
+        "PDF exported",
+        user_id=report.user_id,
+        start_week=report.start_week,
+        end_week=report.end_week,
+    )
+
+
+def signature_rows(report: Report) -> Tuple[Tuple[str, str], ...]:
+    """
+    Các dòng (trái, phải) của phần chữ ký, chưa escape
+    """
+    return (
+        ("Duyệt của Tổ trưởng CM", f"{report.location} ngày ... tháng ... năm {datetime.now().year}"),
+        ("", "GVPT"),
+        (report.reviewer_name or "", report.teacher_name or ""),
+    )
+
+
+def _week_flowables(
+    week: WeeklyGrid, styles: PdfStyles, text: _Escaper, signature_texts: tuple
+) -> list:
+    title_table = Table(
+        [[
+            Paragraph(f"TUẦN : {week.week_number}", styles.title),
+            Paragraph(
+                f"Từ ngày : {format_vietnamese_date(week.start_date)} đến ngày : {format_vietnamese_date(week.end_date)}",
+                styles.title,
+            ),
+        ]],
+        colWidths=TITLE_COL_WIDTHS,
+    )
+    title_table.setStyle(styles.title_table)
+
+    rows = [TABLE_HEADER]
+    cell = styles.cell
+    for _, label, day_date, cells in week.days():
+        day = Paragraph(f"{label}<br/>{day_date.strftime('%d/%m')}", cell)
+        for cell_idx, i in enumerate(cells):
+            rows.append([
+                day if cell_idx == 0 else "",
+                Paragraph(str(week.period(i)), cell),
+                Paragraph(text(week.lesson(i)), cell),
+                Paragraph(text(week.note(i)), cell),
+            ])
+    table = Table(rows, colWidths=TABLE_COL_WIDTHS)
+    table.setStyle(styles.table)
+
+    signature_table = Table(
+        [
+            [Paragraph(left, styles.signature_left), Paragraph(right, styles.signature_right)]
+            for left, right in signature_texts
+        ],
+        colWidths=SIGNATURE_COL_WIDTHS,
+    )
+    signature_table.setStyle(styles.signature_table)
+
+    return [title_table, Spacer(1, TITLE_GAP), table, Spacer(1, SIGNATURE_GAP), signature_table]
@@ -0,0 +1,223 @@
+from datetime import date
+from html import escape
+from typing import Iterator, Optional
+import hashlib
+
+from services.report_models import Report, WeeklyGrid
+
+
+PREVIEW_CSS = """* {
+    font-family: "Times New Roman", Times, serif;
+    color: #000000;
+}
+body {
+    font-family: "Times New Roman", Times, serif;
+    margin: 0;
+    padding: 20px;
+    background: #ffffff;
+    color: #000000;
+}
+.container {
+    background: #ffffff;
+    padding: 30px;
+    margin-bottom: 40px;
+    page-break-after: always;
+    color: #000000;
+}
+.container:last-child {
+    page-break-after: auto;
+}
+.header {
+    text-align: center;
+    margin-bottom: 25px;
+    color: #000000;
+}
+.header h1 {
+    font-size: 18px;
+    font-weight: bold;
+    margin: 0 0 10px 0;
+    text-transform: uppercase;
+    color: #000000;
+}
+.header .week-info {
+    font-size: 14px;
+    margin-top: 5px;
+    color: #000000;
+}
+table {
+    width: 100%;
+    border-collapse: collapse;
+    margin-bottom: 30px;
+    font-size: 13px;
+    border: 2px solid #000000;
+}
+th, td {
+    border: 1px solid #000000;
+    padding: 8px 10px;
+    text-align: left;
+    vertical-align: top;
+    color: #000000;
+}
+th {
+    background-color: #e8e8e8;
+    color: #000000;
+    font-weight: bold;
+    text-align: center;
+    font-size: 13px;
+    border: 1px solid #000000;
+}
+td {
+    font-size: 12px;
+    color: #000000;
+    background-color: #ffffff;
+    border: 1px solid #000000;
+}
+tr:nth-child(even) td {
+    background-color: #ffffff;
+}
+.day-cell {
+    text-align: center;
+    font-weight: bold;
+    vertical-align: middle;
+}
+.period-cell {
+    text-align: center;
+    width: 50px;
+}
+.lesson-cell {
+    min-width: 300px;
+}
+.integrated-cell {
+    width: 150px;
+}
+.signature-section {
+    margin-top: 40px;
+    display: flex;
+    justify-content: space-between;
+    font-size: 12px;
+    color: #000000;
+}
+.signature-left {
+    text-align: left;
+    color: #000000;
+}
+.signature-right {
+    text-align: right;
+    color: #000000;
+}
+.signature-line {
+    margin-top: 50px;
+    border-top: 1px solid #000000;
+    padding-top: 5px;
+    text-align: center;
+    color: #000000;
+}
+"""
+
+# Đổi khi CSS đổi, dùng làm ETag và tham số ?v= để trình duyệt cache lâu dài
+PREVIEW_CSS_VERSION = hashlib.sha256(PREVIEW_CSS.encode("utf-8")).hexdigest()[:12]
+# Đường dẫn tương đối với /weekly-report/preview
+PREVIEW_CSS_URL = f"preview.css?v={PREVIEW_CSS_VERSION}"
+
+# Template được dựng sẵn một lần; mỗi tuần chỉ điền giá trị và nối list một lần
+_HEAD = (
+    '<!DOCTYPE html>\n<html lang="vi">\n<head>\n'
+    '<meta charset="UTF-8">\n'
+    '<meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+    "<title>Preview - Tuần {start_week} đến {end_week}</title>\n"
+    '<link rel="stylesheet" href="{css_url}">\n'
+    "</head>\n<body>\n"
+)
+
+_WEEK_START = (
+    '<div class="container">\n'
+    '<div class="header">\n'
+    "<h1>LỊCH BÁO GIẢNG</h1>\n"
+    '<div class="week-info">\n'
+    "<strong>TUẦN: {week_number}</strong><br/>\n"
+    "Từ ngày: {start_date} đến ngày: {end_date}\n"
+    "</div>\n</div>\n"
+    "<table>\n<thead>\n<tr>\n"
+    '<th style="width: 150px;">THỨ/NGÀY</th>\n'
+    '<th style="width: 60px;">TIẾT</th>\n'
+    "<th>TÊN BÀI DẠY</th>\n"
+    '<th style="width: 120px;">Lồng ghép</th>\n'
+    "</tr>\n</thead>\n<tbody>\n"
+)
+
+_DAY_CELL = '<td rowspan="{rowspan}" class="day-cell">{label}<br/>{date}</td>\n'
+
+_ROW = (
+    '<td class="period-cell">{period}</td>\n'
+    '<td class="lesson-cell">{lesson}</td>\n'
+    '<td class="integrated-cell">{note}</td>\n'
+    "</tr>\n"
+)
+
+_WEEK_END = (
+    "</tbody>\n</table>\n"
+    '<div class="signature-section">\n'
+    '<div class="signature-left">\n'
+    "<div><strong>Duyệt của Tổ trưởng chuyên môn</strong></div>\n"
+    '<div class="signature-line">{reviewer}</div>\n'
+    "</div>\n"
+    '<div class="signature-right">\n'
+    "<div>{signed_at}</div>\n"
+    '<div style="margin-top: 10px;"><strong>GVPT</strong></div>\n'
+    '<div class="signature-line">{teacher}</div>\n'
+    "</div>\n</div>\n</div>\n"
+)
+
+_TAIL = "</body>\n</html>\n"
+
+
+def iter_preview_html(
+    report: Report, css_url: str = PREVIEW_CSS_URL, today: Optional[date] = None
+) -> Iterator[str]:
+    """
+    HTML preview theo từng phần: phần đầu trang trước, sau đó mỗi tuần một chunk,
+    để trình duyệt hiển thị ngay tuần đầu mà không chờ render cả khoảng tuần
+    """
+    today = today or date.today()
+    yield _HEAD.format(
+        start_week=report.start_week,
+        end_week=report.end_week,
+        css_url=escape(css_url),
+    )
+
+    # Phần chữ ký giống nhau ở mọi tuần
+    week_end = _WEEK_END.format(
+        reviewer=escape(report.reviewer_name or ""),
+        signed_at=escape(
+            f"{report.location}, ngày {today.day} tháng {today.month} năm {today.year}"
+        ),
+        teacher=escape(report.teacher_name or ""),
+    )
+    for week in report.weeks:
+        yield _render_week(week) + week_end
+
+    yield _TAIL
+
+
+def _render_week(week: WeeklyGrid) -> str:
+    parts = [
+        _WEEK_START.format(
+            week_number=week.week_number,
+            start_date=week.start_date.strftime("%d/%m/%Y"),
+            end_date=week.end_date.strftime("%d/%m/%Y"),
+        )
+    ]
+    for _, label, day_date, cells in week.days():
+        day_cell = _DAY_CELL.format(
+            rowspan=len(cells), label=label, date=day_date.strftime("%d/%m/%Y")
+        )
+        for cell_idx, i in enumerate(cells):
+            parts.append("<tr>\n")
+            if cell_idx == 0:
+                parts.append(day_cell)
+            parts.append(_ROW.format(
+                period=week.period(i),
+                lesson=escape(week.lesson_display(i)),
+                note=escape(week.note(i)),
+            ))
+    return "".join(parts)
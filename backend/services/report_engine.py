@@ -0,0 +1,213 @@
+from sqlalchemy.orm import Session
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from repositories.timetable_repository import TimetableRepository
+from repositories.teaching_program_repository import TeachingProgramRepository
+from repositories.weekly_log_repository import WeeklyLogRepository
+from services.report_models import Report, WeeklyGrid
+from services.slot_index import SlotIndex
+from services.year_plan import MAX_WEEKS, PlanWeeks, YearPlan, year_plan_cache
+from models import User, Class, TeachingProgram, WeeklyLog
+from utils.date_utils import SchoolYearCalendar, get_school_year_calendar, school_year_start
+from utils.holidays import get_holiday_calendar
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class _PlanSources(NamedTuple):
+    slots: SlotIndex
+    teaching_programs: List[TeachingProgram]
+    weekly_logs: List[WeeklyLog]
+
+
+class ReportEngine:
+    """
+    Engine duy nhất tính lịch báo giảng. JSON, HTML preview, PDF và Excel
+    đều render từ Report do engine này tạo ra.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.timetable_repo = TimetableRepository(db)
+        self.teaching_program_repo = TeachingProgramRepository(db)
+        self.weekly_log_repo = WeeklyLogRepository(db)
+
+    def get_calendar(
+        self, user_id: int, class_id: Optional[int] = None
+    ) -> SchoolYearCalendar:
+        """
+        Lịch tuần theo năm học của lớp (Class.school_year), mặc định năm học hiện tại
+        """
+        return self._calendar_for(self._get_class(user_id, class_id))
+
+    def get_year_plan(self, user_id: int, class_id: Optional[int] = None) -> YearPlan:
+        calendar = self.get_calendar(user_id, class_id)
+
+        def build() -> YearPlan:
+            sources = _PlanSources(
+                SlotIndex(self.timetable_repo.get_by_user_id(user_id)),
+                self.teaching_program_repo.get_by_user_id(user_id),
+                self.weekly_log_repo.get_by_user_and_week_range(
+                    user_id, 1, MAX_WEEKS, class_id
+                ),
+            )
+            return self._compile(user_id, class_id, calendar, sources)
+
+        return year_plan_cache.get_or_build(
+            (user_id, class_id, calendar.first_monday), build
+        )
+
+    def get_week(
+        self, user_id: int, week_number: int, class_id: Optional[int] = None
+    ) -> WeeklyGrid:
+        return self.get_year_plan(user_id, class_id).week(week_number)
+
+    def get_weeks(
+        self,
+        user_id: int,
+        start_week: int,
+        end_week: int,
+        class_id: Optional[int] = None,
+    ) -> List[WeeklyGrid]:
+        plan = self.get_year_plan(user_id, class_id)
+        return [plan.week(w) for w in range(start_week, end_week + 1)]
+
+    def build_report(
+        self,
+        user: User,
+        start_week: int,
+        end_week: int,
+        class_id: Optional[int] = None,
+    ) -> Report:
+        plan = self.get_year_plan(user.id, class_id)
+        return self._new_report(
+            user, plan, start_week, end_week, class_id, self._get_class(user.id, class_id)
+        )
+
+    def build_class_reports(
+        self,
+        user: User,
+        start_week: int,
+        end_week: int,
+        class_ids: Optional[Iterable[int]] = None,
+    ) -> List[Report]:
+        """
+        Report cho mọi lớp của giáo viên (hoặc các lớp trong class_ids).
+        TKB, CTGD và log được tải một lần cho tất cả các lớp rồi chia theo lớp trong bộ nhớ;
+        lớp nào đã có plan trong cache thì không cần tải.
+        """
+        reports = list(self.iter_class_reports(user, start_week, end_week, class_ids))
+        logger.info(
+            "Class reports built",
+            user_id=user.id,
+            classes=len(reports),
+            start_week=start_week,
+            end_week=end_week,
+        )
+        return reports
+
+    def iter_class_reports(
+        self,
+        user: User,
+        start_week: int,
+        end_week: int,
+        class_ids: Optional[Iterable[int]] = None,
+        batch_size: int = 100,
+    ) -> Iterator[Report]:
+        """
+        Như build_class_reports nhưng trả từng report một: lớp được đọc theo lô
+        (yield_per) nên giáo viên nhiều lớp cũng không phải giữ hết trong bộ nhớ
+        """
+        query = self.db.query(Class).filter(Class.user_id == user.id)
+        if class_ids is not None:
+            query = query.filter(Class.id.in_(list(class_ids)))
+
+        loaded: List[_PlanSources] = []
+
+        def load_sources() -> _PlanSources:
+            if not loaded:
+                loaded.append(_PlanSources(
+                    SlotIndex(self.timetable_repo.get_by_user_id(user.id)),
+                    self.teaching_program_repo.get_by_user_id(user.id),
+                    self.weekly_log_repo.get_by_user_and_week_range(user.id, 1, MAX_WEEKS),
+                ))
+            return loaded[0]
+
+        for class_obj in query.order_by(Class.id).yield_per(batch_size):
+            calendar = self._calendar_for(class_obj)
+
+            def build(class_id=class_obj.id, calendar=calendar) -> YearPlan:
+                sources = load_sources()
+                return self._compile(user.id, class_id, calendar, sources._replace(
+                    weekly_logs=_scope_to_class(sources.weekly_logs, class_id),
+                ))
+
+            plan = year_plan_cache.get_or_build(
+                (user.id, class_obj.id, calendar.first_monday), build
+            )
+            yield self._new_report(user, plan, start_week, end_week, class_obj.id, class_obj)
+
+    def _compile(
+        self,
+        user_id: int,
+        class_id: Optional[int],
+        calendar: SchoolYearCalendar,
+        sources: _PlanSources,
+    ) -> YearPlan:
+        return YearPlan.compile(
+            sources.slots.for_class(class_id),
+            _scope_to_class(sources.teaching_programs, class_id),
+            sources.weekly_logs,
+            get_holiday_calendar(
+                self.db, user_id,
+                calendar.first_monday, calendar.end_date, calendar.first_monday,
+            ),
+            calendar,
+        )
+
+    def _new_report(
+        self,
+        user: User,
+        plan: YearPlan,
+        start_week: int,
+        end_week: int,
+        class_id: Optional[int],
+        class_obj: Optional[Class],
+    ) -> Report:
+        report = Report(
+            user_id=user.id,
+            teacher_name=user.full_name,
+            weeks=PlanWeeks(plan, start_week, end_week),
+            class_id=class_id,
+        )
+        if class_obj:
+            report.class_name = class_obj.class_name
+            report.reviewer_name = class_obj.reviewer_name
+            if class_obj.teacher_name:
+                report.teacher_name = class_obj.teacher_name
+            if class_obj.location:
+                report.location = class_obj.location
+        return report
+
+    def _calendar_for(self, class_obj: Optional[Class]) -> SchoolYearCalendar:
+        start_date = school_year_start(class_obj.school_year if class_obj else None)
+        return get_school_year_calendar(start_date, MAX_WEEKS)
+
+    def _get_class(self, user_id: int, class_id: Optional[int]) -> Optional[Class]:
+        if not class_id:
+            return None
+        return (
+            self.db.query(Class)
+            .filter(Class.id == class_id, Class.user_id == user_id)
+            .first()
+        )
+
+
+def _scope_to_class(rows: list, class_id: Optional[int]) -> list:
+    """
+    Dòng của lớp class_id cộng dòng dùng chung (class_id NULL); không chọn lớp thì lấy hết
+    """
+    if class_id is None:
+        return rows
+    return [row for row in rows if row.class_id is None or row.class_id == class_id]
@@ -0,0 +1,196 @@
+from array import array
+from dataclasses import dataclass, field
+from datetime import date
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import json
+
+
+DAY_LABELS = ["Thứ 2", "Thứ 3", "Thứ 4", "Thứ 5", "Thứ 6"]
+PERIODS = [1, 2, 3, 4, 5]
+GRID_SIZE = len(DAY_LABELS) * len(PERIODS)
+
+
+class StringPool:
+    """
+    Bảng intern cho tên môn, tên bài và ghi chú dùng chung giữa các tuần của một plan.
+    Id 0 luôn là chuỗi rỗng. Chuỗi JSON của mỗi giá trị chỉ được encode một lần.
+    """
+
+    __slots__ = ("values", "_ids", "_json", "_lock")
+
+    def __init__(self):
+        self.values: List[str] = [""]
+        self._ids: Dict[str, int] = {"": 0}
+        self._json: List[str] = []
+        self._lock = Lock()
+
+    def intern(self, value: Optional[str]) -> int:
+        if not value:
+            return 0
+        string_id = self._ids.get(value)
+        if string_id is None:
+            with self._lock:
+                string_id = self._ids.get(value)
+                if string_id is None:
+                    string_id = len(self.values)
+                    self.values.append(value)
+                    self._ids[value] = string_id
+        return string_id
+
+    def __getstate__(self) -> List[str]:
+        # Lock không pickle được; Report được pickle khi gửi sang process render export
+        return self.values
+
+    def __setstate__(self, values: List[str]) -> None:
+        self.values = values
+        self._ids = {value: string_id for string_id, value in enumerate(values)}
+        self._json = []
+        self._lock = Lock()
+
+    def json_values(self) -> List[str]:
+        with self._lock:
+            for value in self.values[len(self._json):]:
+                self._json.append(json.dumps(value, ensure_ascii=False))
+            return self._json
+
+
+class WeeklyGrid:
+    """
+    Lịch báo giảng một tuần dạng lưới 5 ngày x 5 tiết, lưu bằng mảng id trỏ vào StringPool.
+    Ô i ứng với ngày i // 5 (Thứ 2 = 0) và tiết i % 5 + 1.
+    """
+
+    __slots__ = (
+        "week_number", "start_date", "end_date", "dates", "pool",
+        "subjects", "lessons", "notes", "holidays",
+    )
+
+    def __init__(
+        self,
+        week_number: int,
+        start_date: date,
+        end_date: date,
+        dates: Sequence[date],
+        pool: StringPool,
+    ):
+        self.week_number = week_number
+        self.start_date = start_date
+        self.end_date = end_date
+        self.dates = dates
+        self.pool = pool
+        self.subjects = array("I", bytes(4 * GRID_SIZE))
+        self.lessons = array("I", bytes(4 * GRID_SIZE))
+        self.notes = array("I", bytes(4 * GRID_SIZE))
+        self.holidays = bytearray(GRID_SIZE)
+
+    def set_cell(
+        self, i: int, subject: str, lesson: str, notes: str = "", holiday: bool = False
+    ) -> None:
+        intern = self.pool.intern
+        self.subjects[i] = intern(subject)
+        self.lessons[i] = intern(lesson)
+        self.notes[i] = intern(notes)
+        self.holidays[i] = holiday
+
+    def days(self) -> Iterator[Tuple[int, str, date, range]]:
+        """
+        (day_of_week, nhãn, ngày, chỉ số các ô của ngày)
+        """
+        size = len(PERIODS)
+        for day_idx, label in enumerate(DAY_LABELS):
+            yield day_idx + 2, label, self.dates[day_idx], range(day_idx * size, (day_idx + 1) * size)
+
+    def period(self, i: int) -> int:
+        return PERIODS[i % len(PERIODS)]
+
+    def subject(self, i: int) -> str:
+        return self.pool.values[self.subjects[i]]
+
+    def lesson(self, i: int) -> str:
+        return self.pool.values[self.lessons[i]]
+
+    def note(self, i: int) -> str:
+        return self.pool.values[self.notes[i]]
+
+    def is_holiday(self, i: int) -> bool:
+        return bool(self.holidays[i])
+
+    def lesson_display(self, i: int) -> str:
+        values = self.pool.values
+        if self.subjects[i]:
+            return f"{values[self.subjects[i]]} - {values[self.lessons[i]]}"
+        return values[self.lessons[i]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Định dạng JSON của API /weekly-report/{week_number}
+        """
+        values = self.pool.values
+        size = len(PERIODS)
+        return {
+            "week_number": self.week_number,
+            "data": [
+                {
+                    "day_of_week": DAY_LABELS[i // size],
+                    "period_index": PERIODS[i % size],
+                    "subject_name": values[subject],
+                    "lesson_name": values[lesson],
+                    "notes": values[note],
+                }
+                for i, (subject, lesson, note) in enumerate(
+                    zip(self.subjects, self.lessons, self.notes)
+                )
+            ],
+        }
+
+    def to_json(self) -> str:
+        """
+        Cùng nội dung với to_dict() nhưng ghép thẳng chuỗi JSON từ giá trị đã encode sẵn
+        """
+        encoded = self.pool.json_values()
+        size = len(PERIODS)
+        rows = [
+            f'{{"day_of_week":{_DAY_LABELS_JSON[i // size]},"period_index":{PERIODS[i % size]},'
+            f'"subject_name":{encoded[subject]},"lesson_name":{encoded[lesson]},'
+            f'"notes":{encoded[note]}}}'
+            for i, (subject, lesson, note) in enumerate(
+                zip(self.subjects, self.lessons, self.notes)
+            )
+        ]
+        return f'{{"week_number":{self.week_number},"data":[{",".join(rows)}]}}'
+
+
+_DAY_LABELS_JSON = [json.dumps(label, ensure_ascii=False) for label in DAY_LABELS]
+
+
+@dataclass
+class Report:
+    """
+    Mô hình trung gian dùng chung cho JSON, HTML preview, PDF và Excel
+    """
+    user_id: int
+    teacher_name: str
+    weeks: Sequence[WeeklyGrid]  # list hoặc PlanWeeks (materialize từng tuần khi đọc)
+    class_id: Optional[int] = None
+    class_name: Optional[str] = None
+    reviewer_name: Optional[str] = None
+    location: str = "Long Tiên"
+    start_week: int = field(init=False)
+    end_week: int = field(init=False)
+
+    def __post_init__(self):
+        self.start_week = self.weeks[0].week_number if self.weeks else 0
+        self.end_week = self.weeks[-1].week_number if self.weeks else 0
+
+    def content_parts(self) -> Iterator[str]:
+        """
+        Mọi dữ liệu hiển thị trong file export, dùng làm key cho cache export
+        """
+        yield self.teacher_name or ""
+        yield self.reviewer_name or ""
+        yield self.location or ""
+        for week in self.weeks:
+            yield ",".join(d.isoformat() for d in week.dates)
+            yield f"{week.start_date.isoformat()},{week.end_date.isoformat()}"
+            yield week.to_json()
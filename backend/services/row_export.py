@@ -0,0 +1,145 @@
+from io import StringIO
+from typing import Callable, Iterator, Optional
+import csv
+import json
+
+from sqlalchemy.orm import Session
+
+from core.database import SessionLocal
+from core.exceptions import NotFoundException
+from core.logging_config import get_logger
+from repositories.user_repository import UserRepository
+from services.report_engine import ReportEngine
+from services.report_models import Report, WeeklyGrid
+
+logger = get_logger(__name__)
+
+# Cột của export dạng bảng, mỗi dòng một (tuần, ngày, tiết, lớp)
+ROW_COLUMNS = (
+    "teacher_name", "class_id", "class_name", "week_number", "date", "day_of_week",
+    "day_label", "period_index", "subject_name", "lesson_name", "notes", "is_holiday",
+)
+
+# format -> (đuôi file, media type)
+ROW_EXPORT_FORMATS = {
+    "csv": (".csv", "text/csv"),
+    "jsonl": (".jsonl", "application/x-ndjson"),
+}
+
+
+class RowExportService:
+    """
+    Export lịch báo giảng thành CSV hoặc JSON Lines cho hệ thống khác đọc.
+    Đi từng lớp (cursor theo lô) và từng tuần (materialize khi đọc), mỗi tuần một chunk,
+    nên bộ nhớ không tăng theo số lớp hay số tuần.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+
+    def filename(self, format: str, start_week: int, end_week: int) -> str:
+        suffix, _ = ROW_EXPORT_FORMATS[format]
+        return f"bao_giang_tuan_{start_week}_{end_week}{suffix}"
+
+    def iter_export(
+        self,
+        format: str,
+        user_id: int,
+        start_week: int,
+        end_week: int,
+        class_id: Optional[int] = None,
+    ) -> Iterator[str]:
+        """
+        Dùng session riêng vì generator chạy sau khi request đã trả về
+        """
+        render_week = _csv_week if format == "csv" else _jsonl_week
+        db = self.session_factory()
+        rows = 0
+        try:
+            if format == "csv":
+                yield _csv_line(ROW_COLUMNS)
+            for report in self._iter_reports(db, user_id, start_week, end_week, class_id):
+                for week in report.weeks:
+                    yield render_week(report, week)
+                    rows += len(week.subjects)
+            logger.info(
+                "Row export completed",
+                user_id=user_id,
+                format=format,
+                start_week=start_week,
+                end_week=end_week,
+                rows=rows,
+            )
+        finally:
+            db.close()
+
+    def _iter_reports(
+        self,
+        db: Session,
+        user_id: int,
+        start_week: int,
+        end_week: int,
+        class_id: Optional[int],
+    ) -> Iterator[Report]:
+        user = UserRepository(db).get_by_id(user_id)
+        if user is None:
+            raise NotFoundException("User", user_id)
+        engine = ReportEngine(db)
+        if class_id is not None:
+            yield engine.build_report(user, start_week, end_week, class_id)
+            return
+
+        found = False
+        for report in engine.iter_class_reports(user, start_week, end_week):
+            found = True
+            yield report
+        if not found:
+            # Giáo viên chưa tạo lớp: dữ liệu chung
+            yield engine.build_report(user, start_week, end_week)
+
+
+def _week_rows(report: Report, week: WeeklyGrid) -> Iterator[tuple]:
+    values = week.pool.values
+    for day_of_week, label, day_date, cells in week.days():
+        date_text = day_date.isoformat()
+        for i in cells:
+            yield (
+                report.teacher_name or "",
+                report.class_id,
+                report.class_name or "",
+                week.week_number,
+                date_text,
+                day_of_week,
+                label,
+                week.period(i),
+                values[week.subjects[i]],
+                values[week.lessons[i]],
+                values[week.notes[i]],
+                week.is_holiday(i),
+            )
+
+
+def _csv_line(values) -> str:
+    buffer = StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue()
+
+
+def _csv_week(report: Report, week: WeeklyGrid) -> str:
+    buffer = StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in _week_rows(report, week):
+        # None -> ô trống, bool -> 0/1 cho dễ đọc ở phía nhận
+        writer.writerow(
+            "" if value is None else int(value) if isinstance(value, bool) else value
+            for value in row
+        )
+    return buffer.getvalue()
+
+
+def _jsonl_week(report: Report, week: WeeklyGrid) -> str:
+    return "".join(
+        json.dumps(dict(zip(ROW_COLUMNS, row)), ensure_ascii=False) + "\n"
+        for row in _week_rows(report, week)
+    )
+
@@ -0,0 +1,42 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models import Timetable
+
+Slot = Tuple[int, int]
+
+
+class SlotIndex:
+    """
+    Chỉ mục TKB theo (class_id, day_of_week, period_index), dựng một lần từ toàn bộ
+    timetable của user. Mỗi lớp lấy TKB của chính nó, slot trống thì dùng dòng
+    không gắn lớp (class_id NULL). Trùng slot trong cùng lớp thì lấy dòng đầu tiên.
+    """
+
+    def __init__(self, timetables: Iterable[Timetable]):
+        self._by_class: Dict[Optional[int], Dict[Slot, str]] = {}
+        # Không chọn lớp: giữ cách cũ, dòng đầu tiên của bất kỳ lớp nào
+        self._any: Dict[Slot, str] = {}
+        for t in timetables:
+            slot = (t.day_of_week, t.period_index)
+            self._by_class.setdefault(t.class_id, {}).setdefault(slot, t.subject_name)
+            self._any.setdefault(slot, t.subject_name)
+
+    @property
+    def class_ids(self) -> List[int]:
+        return [class_id for class_id in self._by_class if class_id is not None]
+
+    def for_class(self, class_id: Optional[int]) -> Dict[Slot, str]:
+        if class_id is None:
+            return dict(self._any)
+        slots = dict(self._by_class.get(None, {}))
+        slots.update(self._by_class.get(class_id, {}))
+        return slots
+
+    def get(self, class_id: Optional[int], day_of_week: int, period_index: int) -> Optional[str]:
+        if class_id is None:
+            return self._any.get((day_of_week, period_index))
+        slot = (day_of_week, period_index)
+        subject = self._by_class.get(class_id, {}).get(slot)
+        if subject is None:
+            subject = self._by_class.get(None, {}).get(slot)
+        return subject
@@ -0,0 +1,277 @@
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import uuid
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.database import SessionLocal
+from core.exceptions import BadRequestException, NotFoundException
+from core.logging_config import get_logger
+from models import ImportProgress
+from repositories.import_progress_repository import ImportProgressRepository
+from repositories.teaching_program_repository import TeachingProgramRepository
+from repositories.timetable_repository import TimetableRepository
+from services.excel_service import ExcelService
+from services.export_jobs import ExportJobRunner, export_job_runner
+from services.year_plan import year_plan_cache
+
+logger = get_logger(__name__)
+
+UPLOAD_KINDS = ("tkb", "ctgd")
+
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def spool_upload(file: UploadFile, path: str) -> str:
+    """
+    Chép file upload ra đĩa theo từng khối (file.size không phải lúc nào cũng có),
+    vượt MAX_UPLOAD_SIZE thì dừng và xóa file. Trả về sha256 (hex) của nội dung.
+    """
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with open(path, "wb") as output:
+            while chunk := file.file.read(_COPY_CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_SIZE:
+                    raise BadRequestException(
+                        f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE / 1024 / 1024}MB"
+                    )
+                digest.update(chunk)
+                output.write(chunk)
+    except Exception:
+        _remove(path)
+        raise
+    return digest.hexdigest()
+
+
+def run_upload_job(job_id: str) -> None:
+    """
+    Chạy trong process của pool: parse file đã lưu và thay TKB/CTGD của user.
+    Tiến độ ghi vào import_progress bằng session riêng để API đọc được ngay.
+    """
+    db = SessionLocal()
+    progress_db = SessionLocal()
+    repo = ImportProgressRepository(progress_db)
+    job = repo.get_by_job_id(job_id)
+    if job is None:
+        db.close()
+        progress_db.close()
+        return
+    # Mỗi lần cập nhật tiến độ là một commit làm job hết hạn, lấy sẵn các giá trị cần dùng
+    kind, user_id, path = job.kind, job.user_id, job.file_path
+    try:
+        repo.update(job_id, status="in_progress")
+        with open(path, "rb") as f:
+            contents = f.read()
+        service = ExcelService(db)
+        process = service.process_tkb if kind == "tkb" else service.process_ctgd
+        result = process(
+            contents,
+            user_id,
+            lambda parsed, inserted: repo.update(
+                job_id, rows_parsed=parsed, rows_inserted=inserted
+            ),
+        )
+        repo.update(
+            job_id,
+            status="completed",
+            result=json.dumps(result, ensure_ascii=False),
+            finished_at=datetime.now(),
+        )
+        logger.info("Upload job completed", job_id=job_id, kind=kind)
+    except Exception as exc:
+        db.rollback()
+        error = exc.detail if isinstance(exc, HTTPException) else str(exc) or type(exc).__name__
+        logger.error("Upload job failed", job_id=job_id, kind=kind, error=error)
+        repo.update(job_id, status="error", error=error, finished_at=datetime.now())
+    finally:
+        db.close()
+        progress_db.close()
+        _remove(path)
+
+
+def _on_upload_done(job_id: str, user_id: int, future: Future) -> None:
+    # Worker là process khác nên cache lịch năm của process API phải xóa ở đây
+    year_plan_cache.invalidate(user_id)
+    error = "Cancelled" if future.cancelled() else future.exception()
+    if error is None:
+        return
+    # run_upload_job tự ghi lỗi của nó; tới đây là process con chết giữa chừng
+    logger.error("Upload job crashed", job_id=job_id, error=str(error))
+    db = SessionLocal()
+    try:
+        ImportProgressRepository(db).update(
+            job_id,
+            status="error",
+            error=str(error) or type(error).__name__,
+            finished_at=datetime.now(),
+        )
+    finally:
+        db.close()
+
+
+def purge_expired_uploads(repo: ImportProgressRepository) -> None:
+    before = datetime.now() - timedelta(hours=settings.UPLOAD_JOB_TTL_HOURS)
+    for path in repo.delete_finished_before(before):
+        _remove(path)
+
+
+def recover_upload_jobs() -> None:
+    """
+    Gọi lúc khởi động: job chưa xong của lần chạy trước không còn ai xử lý,
+    file tạm của chúng cũng không còn ai đọc
+    """
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    db = SessionLocal()
+    try:
+        repo = ImportProgressRepository(db)
+        count = repo.fail_active("Interrupted by server restart")
+        if count:
+            logger.warning("Upload jobs interrupted", count=count)
+        purge_expired_uploads(repo)
+    finally:
+        db.close()
+    for name in os.listdir(settings.UPLOAD_DIR):
+        _remove(os.path.join(settings.UPLOAD_DIR, name))
+
+
+# Kiểm tra job đang chạy và tạo job phải liền nhau, nếu không hai upload cùng lúc
+# sẽ cùng xóa rồi ghi dữ liệu của user
+_create_lock = Lock()
+
+
+class UploadJobService:
+    """
+    Upload TKB/CTGD: request chỉ lưu file ra UPLOAD_DIR và tạo job (bảng import_progress),
+    parse và insert chạy nền trên pool của ExportJobRunner; client hỏi tiến độ theo job id.
+    """
+
+    def __init__(self, db: Session, runner: ExportJobRunner = export_job_runner):
+        self.repo = ImportProgressRepository(db)
+        self.timetable_repo = TimetableRepository(db)
+        self.teaching_program_repo = TeachingProgramRepository(db)
+        self.runner = runner
+
+    def create_job(self, user_id: int, kind: str, file: UploadFile) -> ImportProgress:
+        purge_expired_uploads(self.repo)
+        job_id = uuid.uuid4().hex
+        suffix = os.path.splitext(file.filename or "")[1].lower()
+        path = os.path.join(settings.UPLOAD_DIR, f"{job_id}{suffix}")
+        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+        content_hash = spool_upload(file, path)
+
+        with _create_lock:
+            if self.repo.has_active(user_id, kind):
+                _remove(path)
+                raise BadRequestException(
+                    f"A previous {kind.upper()} upload is still being processed, please wait"
+                )
+            now = datetime.now()
+            previous = self._unchanged_upload(user_id, kind, content_hash)
+            if previous is not None:
+                # File y hệt lần upload thành công trước: không parse, không ghi lại, không xóa cache
+                _remove(path)
+                result = {**json.loads(previous.result), "unchanged": True}
+                logger.info(
+                    "Upload unchanged, skipped",
+                    user_id=user_id,
+                    kind=kind,
+                    previous_job_id=previous.job_id,
+                )
+                return self.repo.create(
+                    job_id=job_id,
+                    user_id=user_id,
+                    kind=kind,
+                    file_path=path,
+                    table_index=0,
+                    row_index=0,
+                    lesson_counter=0,
+                    rows_parsed=previous.rows_parsed,
+                    rows_inserted=previous.rows_inserted,
+                    status="completed",
+                    result=json.dumps(result, ensure_ascii=False),
+                    content_hash=content_hash,
+                    created_at=now.date(),
+                    updated_at=now.date(),
+                    finished_at=now,
+                )
+            job = self.repo.create(
+                job_id=job_id,
+                user_id=user_id,
+                kind=kind,
+                file_path=path,
+                table_index=0,
+                row_index=0,
+                lesson_counter=0,
+                rows_parsed=0,
+                rows_inserted=0,
+                status="pending",
+                content_hash=content_hash,
+                created_at=now.date(),
+                updated_at=now.date(),
+            )
+
+        try:
+            future = self.runner.run(run_upload_job, job_id)
+        except Exception as exc:
+            # Không đưa được vào pool: đánh dấu lỗi để user upload lại được
+            self.repo.update(job_id, status="error", error=str(exc), finished_at=datetime.now())
+            _remove(path)
+            raise
+        future.add_done_callback(lambda f: _on_upload_done(job_id, user_id, f))
+        return job
+
+    def _unchanged_upload(
+        self, user_id: int, kind: str, content_hash: str
+    ) -> Optional[ImportProgress]:
+        previous = self.repo.get_last_completed(user_id, kind)
+        if previous is None or previous.content_hash != content_hash or not previous.result:
+            return None
+        # Dữ liệu đã bị thay bằng đường khác (script import) thì phải import lại
+        repo = self.timetable_repo if kind == "tkb" else self.teaching_program_repo
+        if repo.count_by_user_id(user_id) != json.loads(previous.result)["records_processed"]:
+            return None
+        return previous
+
+    def get_job(self, user_id: int, job_id: str) -> ImportProgress:
+        job = self.repo.get_by_user_and_job_id(user_id, job_id)
+        if not job:
+            raise NotFoundException("Upload job", job_id)
+        return job
+
+    def describe(self, job: ImportProgress) -> Dict[str, Any]:
+        parsed, inserted = job.rows_parsed or 0, job.rows_inserted or 0
+        if job.status == "completed":
+            progress = 100
+        elif parsed:
+            # Còn bước dựng lại chỉ mục tìm bài sau lô cuối nên chưa báo 100
+            progress = min(99, inserted * 100 // parsed)
+        else:
+            progress = 0
+        return {
+            "id": job.job_id,
+            "kind": job.kind,
+            "status": job.status,
+            "rows_parsed": parsed,
+            "rows_inserted": inserted,
+            "progress": progress,
+            "result": json.loads(job.result) if job.result else None,
+            "error": job.error,
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+        }
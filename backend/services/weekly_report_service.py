@@ -1,11 +1,17 @@
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
-from collections import defaultdict
+from typing import List, Dict, Any, Optional
 
 from repositories.timetable_repository import TimetableRepository
 from repositories.teaching_program_repository import TeachingProgramRepository
 from repositories.weekly_log_repository import WeeklyLogRepository
-from models import User, Holiday
+from repositories.lesson_search_repository import LessonSearchRepository
+from services.report_engine import ReportEngine
+from services.report_models import WeeklyGrid
+from services.year_plan import HOLIDAY_SUBJECT, update_cached_week, year_plan_cache
+from utils.date_utils import current_school_year
+from utils.holidays import create_default_holidays
+from models import Class, Holiday, TeachingProgram
+from core.exceptions import NotFoundException
 from core.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -17,95 +23,27 @@ class WeeklyReportService:
         self.timetable_repo = TimetableRepository(db)
         self.teaching_program_repo = TeachingProgramRepository(db)
         self.weekly_log_repo = WeeklyLogRepository(db)
+        self.lesson_search_repo = LessonSearchRepository(db)
+        self.report_engine = ReportEngine(db)
     
     def generate_weekly_report(
-        self, user_id: int, week_number: int
+        self, user_id: int, week_number: int, class_id: Optional[int] = None
     ) -> Dict[str, Any]:
-        timetables = self.timetable_repo.get_by_user_id(user_id)
-        teaching_programs = self.teaching_program_repo.get_by_user_id(user_id)
-        weekly_logs = self.weekly_log_repo.get_by_user_and_week(
-            user_id, week_number
-        )
-        
-        days = ["Thứ 2", "Thứ 3", "Thứ 4", "Thứ 5", "Thứ 6"]
-        periods = [1, 2, 3, 4, 5]
-        
-        subject_lesson_map = self._build_lesson_map(teaching_programs)
-        log_map = self._build_log_map(weekly_logs)
-        
-        # Tính số tiết mỗi tuần cho mỗi môn (dựa trên TKB)
-        # Chỉ đếm các slot (day_of_week, period_index) duy nhất cho mỗi môn
-        subject_periods_per_week = defaultdict(set)
-        for t in timetables:
-            # Dùng set để tránh đếm trùng (nếu có nhiều lớp cùng môn cùng slot)
-            subject_periods_per_week[t.subject_name].add((t.day_of_week, t.period_index))
-        
-        # Chuyển set thành số lượng
-        subject_periods_per_week_count = {
-            subject: len(slots) for subject, slots in subject_periods_per_week.items()
-        }
-        
-        # Tìm lesson_index nhỏ nhất cho mỗi môn (để tính offset)
-        subject_min_lesson_index = {}
-        for tp in teaching_programs:
-            if tp.subject_name not in subject_min_lesson_index:
-                subject_min_lesson_index[tp.subject_name] = tp.lesson_index
-            else:
-                subject_min_lesson_index[tp.subject_name] = min(
-                    subject_min_lesson_index[tp.subject_name], tp.lesson_index
-                )
-        
-        report_data = []
-        lesson_counter = defaultdict(lambda: defaultdict(int))
-        
-        for day_idx, day in enumerate(days, start=2):
-            for period in periods:
-                timetable = self._find_timetable(
-                    timetables, day_idx, period
-                )
-                
-                if (day_idx, period) in log_map:
-                    log_entry = log_map[(day_idx, period)]
-                    report_data.append({
-                        "day_of_week": day,
-                        "period_index": period,
-                        "subject_name": log_entry["subject_name"],
-                        "lesson_name": log_entry["lesson_name"],
-                        "notes": log_entry.get("notes", ""),
-                    })
-                elif timetable:
-                    subject = timetable.subject_name
-                    lesson_counter[subject][week_number] += 1
-                    
-                    # Tính lesson_index: (tuần - 1) * số tiết/tuần + số tiết trong tuần
-                    periods_per_week = subject_periods_per_week_count.get(subject, 5)
-                    lesson_index = (week_number - 1) * periods_per_week + lesson_counter[subject][week_number]
-                    
-                    # Nếu môn có offset (lesson_index nhỏ nhất > 1), cộng thêm offset
-                    min_index = subject_min_lesson_index.get(subject, 1)
-                    if min_index > 1:
-                        lesson_index = lesson_index + (min_index - 1)
-                    
-                    lesson_name = subject_lesson_map.get(
-                        (subject, lesson_index), ""
-                    )
-                    report_data.append({
-                        "day_of_week": day,
-                        "period_index": period,
-                        "subject_name": subject,
-                        "lesson_name": lesson_name,
-                        "notes": "",
-                    })
-                else:
-                    report_data.append({
-                        "day_of_week": day,
-                        "period_index": period,
-                        "subject_name": "",
-                        "lesson_name": "",
-                        "notes": "",
-                    })
-        
-        return {"week_number": week_number, "data": report_data}
+        return self.report_engine.get_week(user_id, week_number, class_id).to_dict()
+    
+    def get_weekly_grid(
+        self, user_id: int, week_number: int, class_id: Optional[int] = None
+    ) -> WeeklyGrid:
+        return self.report_engine.get_week(user_id, week_number, class_id)
+    
+    def get_weekly_grids(
+        self,
+        user_id: int,
+        start_week: int,
+        end_week: int,
+        class_id: Optional[int] = None,
+    ) -> List[WeeklyGrid]:
+        return self.report_engine.get_weeks(user_id, start_week, end_week, class_id)
     
     def save_weekly_report(
         self, user_id: int, week_number: int, logs: List[Dict[str, Any]]
@@ -123,11 +61,22 @@ class WeeklyReportService:
                 "notes": log.get("notes", ""),
             }
             for log in logs
+            # Ô nghỉ lễ được tính từ bảng holidays, không lưu thành log
+            if log["subject_name"] != HOLIDAY_SUBJECT
         ]
         
         if log_dicts:
             self.weekly_log_repo.bulk_create(log_dicts)
         
+        # Chỉ tính lại tuần này và các tuần sau trong plan đang cache
+        update_cached_week(
+            user_id,
+            week_number,
+            lambda class_id: self.weekly_log_repo.get_by_user_and_week(
+                user_id, week_number, class_id
+            ),
+        )
+        
         logger.info(
             "Weekly report saved",
             user_id=user_id,
@@ -137,57 +86,74 @@ class WeeklyReportService:
         
         return {"message": "Weekly report saved successfully"}
     
-    def _build_lesson_map(self, teaching_programs) -> Dict[tuple, str]:
-        return {
-            (tp.subject_name, tp.lesson_index): tp.lesson_name
-            for tp in teaching_programs
-        }
-    
-    def _build_log_map(self, weekly_logs) -> Dict[tuple, Dict[str, str]]:
-        return {
-            (log.day_of_week, log.period_index): {
-                "subject_name": log.subject_name,
-                "lesson_name": log.lesson_name,
-                "notes": log.notes or "",
-            }
-            for log in weekly_logs
-        }
-    
-    def _find_timetable(self, timetables, day_of_week: int, period_index: int):
-        # Tìm timetable cho slot này
-        # Nếu có nhiều timetable (nhiều lớp), chỉ lấy 1 cái đầu tiên
-        # Để tránh trùng lặp, có thể group theo subject_name và lấy 1
-        matching = [
-            t
-            for t in timetables
-            if t.day_of_week == day_of_week
-            and t.period_index == period_index
-        ]
-        if not matching:
-            return None
-        
-        # Nếu có nhiều timetable cho cùng slot, chỉ lấy 1 cái (theo subject_name đầu tiên)
-        # Group theo subject_name và lấy subject đầu tiên
-        subjects = {}
-        for t in matching:
-            if t.subject_name not in subjects:
-                subjects[t.subject_name] = t
-        
-        # Trả về timetable đầu tiên (có thể có nhiều lớp cùng môn)
-        return matching[0]
-    
-    def get_data_for_export(
-        self, user: User, week_number: int
-    ) -> tuple:
-        timetables = self.timetable_repo.get_by_user_id(user.id)
-        teaching_programs = self.teaching_program_repo.get_by_user_id(user.id)
-        weekly_logs = self.weekly_log_repo.get_by_user_and_week(
-            user.id, week_number
+    def patch_weekly_report(
+        self,
+        user_id: int,
+        week_number: int,
+        cells: List[Dict[str, Any]],
+        class_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Chỉ ghi các ô bị sửa thay vì xóa và ghi lại cả tuần
+        """
+        if class_id is not None and not self.db.query(Class.id).filter(
+            Class.id == class_id, Class.user_id == user_id
+        ).first():
+            raise NotFoundException("Class", class_id)
+
+        upserts = {}
+        deletes = []
+        for cell in cells:
+            slot = (cell["day_of_week"], cell["period_index"])
+            # Ô nghỉ lễ được tính từ bảng holidays, không lưu thành log
+            if cell.get("deleted") or cell["subject_name"] == HOLIDAY_SUBJECT:
+                upserts.pop(slot, None)
+                deletes.append(slot)
+            else:
+                upserts[slot] = {
+                    "subject_name": cell["subject_name"],
+                    "lesson_name": cell["lesson_name"],
+                    "notes": cell.get("notes") or "",
+                }
+                if slot in deletes:
+                    deletes.remove(slot)
+
+        counts = self.weekly_log_repo.apply_cell_changes(
+            user_id, week_number, class_id, upserts, deletes
         )
-        
-        return timetables, teaching_programs, weekly_logs
+
+        update_cached_week(
+            user_id,
+            week_number,
+            lambda plan_class_id: self.weekly_log_repo.get_by_user_and_week(
+                user_id, week_number, plan_class_id
+            ),
+        )
+
+        return {"message": "Weekly report updated successfully", **counts}
+    
+    def search_lessons(
+        self,
+        user_id: int,
+        query: str,
+        subject_name: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[TeachingProgram]:
+        return self.lesson_search_repo.search(user_id, query, subject_name, limit)
     
     def get_holidays_for_user(self, user_id: int) -> list:
         holidays = self.db.query(Holiday).filter(Holiday.user_id == user_id).all()
         return holidays
-
+    
+    def ensure_default_holidays(self, user_id: int) -> None:
+        # Tự động tạo ngày nghỉ lễ mặc định nếu chưa có
+        if self.db.query(Holiday.id).filter(Holiday.user_id == user_id).first():
+            return
+        # Năm học trải qua hai năm dương lịch (Tết rơi vào năm sau)
+        start_year = current_school_year()
+        created = sum(
+            create_default_holidays(self.db, user_id, year)
+            for year in (start_year, start_year + 1)
+        )
+        if created:
+            year_plan_cache.invalidate(user_id)
@@ -0,0 +1,252 @@
+from collections import defaultdict
+from collections.abc import Sequence
+from threading import RLock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models import TeachingProgram, WeeklyLog
+from services.lesson_counter import LessonCounter
+from services.report_models import DAY_LABELS, PERIODS, StringPool, WeeklyGrid
+from core.cache import UserScopedCache
+from core.config import settings
+from core.logging_config import get_logger
+from utils.date_utils import SchoolYearCalendar, get_school_year_calendar, school_year_start
+from utils.holidays import HolidayCalendar
+
+logger = get_logger(__name__)
+
+DAYS = DAY_LABELS
+MAX_WEEKS = 40
+
+HOLIDAY_SUBJECT = "NGHỈ LỄ"
+
+# Nguồn của một ô trong bố cục tuần
+_HOLIDAY = "holiday"
+_LOG = "log"
+_TIMETABLE = "timetable"
+
+
+class YearPlan:
+    """
+    Lịch báo giảng cả năm đã được biên dịch sẵn cho một user/lớp.
+    Bố cục từng ô (nghỉ lễ / log / TKB) và số tiết thực dạy mỗi tuần được tính một lần
+    khi compile; lesson_index lấy từ prefix sum của LessonCounter nên tra cứu một tuần
+    là O(số môn) và sửa log một tuần chỉ tính lại các tuần phía sau.
+    """
+
+    def __init__(
+        self,
+        slots: Dict[Tuple[int, int], str],
+        teaching_programs: List[TeachingProgram],
+        holidays: Optional[HolidayCalendar],
+        calendar: SchoolYearCalendar,
+        max_weeks: int = MAX_WEEKS,
+    ):
+        self.calendar = calendar
+        self.max_weeks = max_weeks
+        self._holidays = holidays
+        self._lock = RLock()
+
+        self._lesson_map = {
+            (tp.subject_name, tp.lesson_index): tp.lesson_name
+            for tp in teaching_programs
+        }
+
+        # (day_of_week, period_index) -> môn, đã chọn theo lớp bởi SlotIndex
+        self._timetable_map = slots
+
+        # lesson_index nhỏ nhất cho mỗi môn (để tính offset)
+        subject_min_lesson_index = {}
+        for tp in teaching_programs:
+            current = subject_min_lesson_index.get(tp.subject_name)
+            if current is None or tp.lesson_index < current:
+                subject_min_lesson_index[tp.subject_name] = tp.lesson_index
+        offsets = {
+            subject: min_index - 1
+            for subject, min_index in subject_min_lesson_index.items()
+            if min_index > 1
+        }
+
+        self.counter = LessonCounter(offsets, max_weeks)
+        self._layouts: Dict[int, tuple] = {}
+        self._weeks: Dict[int, WeeklyGrid] = {}
+        self._slots: Dict[tuple, tuple] = {}
+        self._pool = StringPool()
+
+    @classmethod
+    def compile(
+        cls,
+        slots: Dict[Tuple[int, int], str],
+        teaching_programs: List[TeachingProgram],
+        weekly_logs: List[WeeklyLog],
+        holidays: Optional[HolidayCalendar] = None,
+        calendar: Optional[SchoolYearCalendar] = None,
+        max_weeks: int = MAX_WEEKS,
+    ) -> "YearPlan":
+        if calendar is None:
+            calendar = get_school_year_calendar(school_year_start(), max_weeks)
+
+        plan = cls(slots, teaching_programs, holidays, calendar, max_weeks)
+
+        logs_by_week = defaultdict(list)
+        for log in weekly_logs:
+            logs_by_week[log.week_number].append(log)
+
+        weekly_counts = {}
+        for week_number in range(1, max_weeks + 1):
+            layout, counts = plan._layout_week(week_number, logs_by_week.get(week_number, []))
+            plan._layouts[week_number] = layout
+            weekly_counts[week_number] = counts
+        plan.counter.load(weekly_counts)
+        return plan
+
+    def week(self, week_number: int) -> WeeklyGrid:
+        with self._lock:
+            week = self._weeks.get(week_number)
+            if week is None:
+                week = self._materialize(week_number)
+                self._weeks[week_number] = week
+            return week
+
+    def update_week(self, week_number: int, weekly_logs: List[WeeklyLog]) -> None:
+        """
+        Áp dụng log mới của một tuần: chỉ tuần đó và các tuần sau có môn bị đổi số tiết
+        mới phải dựng lại.
+        """
+        with self._lock:
+            layout, counts = self._layout_week(week_number, weekly_logs)
+            self._layouts[week_number] = layout
+            self._weeks.pop(week_number, None)
+            changed = set(self.counter.set_week(week_number, counts))
+            if not changed:
+                return
+            for later in range(week_number + 1, self.max_weeks + 1):
+                if changed & self._subjects_in(later):
+                    self._weeks.pop(later, None)
+
+    def _layout_week(self, week_number: int, weekly_logs: List[WeeklyLog]):
+        """
+        Xác định nguồn của từng ô và đếm số tiết thực dạy của mỗi môn trong tuần.
+        Ô: (HOLIDAY, holiday_name) | (LOG, log_entry) | (TIMETABLE, subject) | None,
+        các tuple ô giống nhau được dùng chung giữa các tuần.
+        """
+        log_map = {
+            (log.day_of_week, log.period_index): (
+                log.subject_name, log.lesson_name, log.notes or ""
+            )
+            # Log của riêng lớp ghi đè log dùng chung (class_id NULL) ở cùng ô
+            for log in sorted(weekly_logs, key=lambda log: log.class_id is not None)
+        }
+        week_start, week_end = self.calendar.week_dates(week_number)
+        counts = defaultdict(int)
+        dates = []
+        slots = []
+
+        for day_idx in range(2, len(DAYS) + 2):
+            day_date = self.calendar.day_date(week_number, day_idx)
+            holiday = self._holidays.get(day_date) if self._holidays else None
+            dates.append(day_date)
+
+            for period in PERIODS:
+                if holiday is not None:
+                    slots.append(self._slot(_HOLIDAY, holiday.holiday_name))
+                elif (day_idx, period) in log_map:
+                    log_entry = log_map[(day_idx, period)]
+                    # Tiết giáo viên ghi đè vẫn tiêu tốn một tiết của môn được ghi
+                    if log_entry[0]:
+                        counts[log_entry[0]] += 1
+                    slots.append((_LOG, log_entry))
+                elif (day_idx, period) in self._timetable_map:
+                    subject = self._timetable_map[(day_idx, period)]
+                    counts[subject] += 1
+                    slots.append(self._slot(_TIMETABLE, subject))
+                else:
+                    slots.append(None)
+
+        return (week_start, week_end, tuple(dates), tuple(slots)), dict(counts)
+
+    def _slot(self, kind: str, value: str) -> tuple:
+        return self._slots.setdefault((kind, value), (kind, value))
+
+    def _subjects_in(self, week_number: int) -> set:
+        slots = self._layouts[week_number][3]
+        return {
+            slot[1] for slot in slots
+            if slot is not None and slot[0] == _TIMETABLE
+        }
+
+    def _materialize(self, week_number: int) -> WeeklyGrid:
+        week_start, week_end, dates, slots = self._layouts[week_number]
+        lesson_index = self.counter.week_start(week_number)
+        grid = WeeklyGrid(week_number, week_start, week_end, dates, self._pool)
+
+        for i, slot in enumerate(slots):
+            if slot is None:
+                continue
+            if slot[0] == _HOLIDAY:
+                grid.set_cell(i, HOLIDAY_SUBJECT, slot[1], holiday=True)
+            elif slot[0] == _LOG:
+                subject, lesson_name, notes = slot[1]
+                if subject:
+                    lesson_index[subject] = lesson_index.get(subject, 0) + 1
+                grid.set_cell(i, subject, lesson_name, notes)
+            else:
+                subject = slot[1]
+                lesson_index[subject] = lesson_index.get(subject, 0) + 1
+                grid.set_cell(
+                    i, subject, self._lesson_map.get((subject, lesson_index[subject]), "")
+                )
+
+        return grid
+
+
+class PlanWeeks(Sequence):
+    """
+    Các tuần start..end của một plan, chỉ materialize WeeklyGrid khi được đọc tới.
+    Dựng Report là O(1) nên preview stream được tuần đầu ngay, không chờ cả khoảng tuần.
+    """
+
+    __slots__ = ("plan", "start_week", "end_week")
+
+    def __init__(self, plan: YearPlan, start_week: int, end_week: int):
+        self.plan = plan
+        self.start_week = start_week
+        self.end_week = end_week
+
+    def __len__(self) -> int:
+        return max(0, self.end_week - self.start_week + 1)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.plan.week(self.start_week + index)
+
+    def __reduce__(self):
+        # Pickle sang process render export: chỉ gửi các tuần, không gửi cả plan
+        return (list, (list(self),))
+
+
+def update_cached_week(
+    user_id: int,
+    week_number: int,
+    load_logs: Callable[[Optional[int]], List[WeeklyLog]],
+) -> None:
+    """
+    Cập nhật log của một tuần cho mọi plan đang cache của user thay vì xóa cả plan.
+    load_logs(class_id) trả về log của tuần đó theo phạm vi lớp của plan.
+    """
+    # Trước khi lấy entries: plan đang dựng từ log cũ sẽ không được lưu vào cache
+    year_plan_cache.mark_changed(user_id)
+    for key, plan in year_plan_cache.entries_for(user_id):
+        plan.update_week(week_number, load_logs(key[1]))
+
+
+# Xóa theo user khi TKB, CTGD hoặc ngày nghỉ thay đổi
+year_plan_cache = UserScopedCache(
+    "year_plan",
+    max_entries=settings.YEAR_PLAN_CACHE_SIZE,
+    ttl_seconds=settings.YEAR_PLAN_CACHE_TTL_SECONDS,
+)
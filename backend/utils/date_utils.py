@@ -1,21 +1,106 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import re
+
+from core.config import settings
+
+DEFAULT_MAX_WEEKS = 40
+
+_SCHOOL_YEAR_PATTERN = re.compile(r"^\s*(\d{4})\s*[-/]\s*(\d{4})\s*$")
+
+
+class SchoolYearCalendar:
+    """
+    Lịch tuần của một năm học, tính sẵn một lần.
+    Tuần 1 bắt đầu từ thứ 2 đầu tiên kể từ ngày khai giảng; năm học kéo dài qua
+    hai năm dương lịch nên mọi ngày được tính từ ngày bắt đầu, không từ năm hiện tại.
+    """
+
+    def __init__(self, start_date: date, max_weeks: int = DEFAULT_MAX_WEEKS):
+        self.start_date = start_date
+        self.max_weeks = max_weeks
+        self.first_monday = start_date + timedelta(days=-start_date.weekday() % 7)
+        self.end_date = self.first_monday + timedelta(days=7 * max_weeks - 1)
+        # days[w - 1][d] = ngày thứ d + 2 của tuần w (Thứ 2 = 2 ... Chủ nhật = 8)
+        self.days: List[Tuple[date, ...]] = [
+            tuple(self.first_monday + timedelta(days=7 * w + d) for d in range(7))
+            for w in range(max_weeks)
+        ]
+
+    @property
+    def start_year(self) -> int:
+        return self.start_date.year
+
+    def week_dates(self, week_number: int) -> Tuple[date, date]:
+        """
+        (thứ 2, thứ 6) của tuần
+        """
+        return self.day_date(week_number, 2), self.day_date(week_number, 6)
+
+    def day_date(self, week_number: int, day_of_week: int) -> date:
+        if 1 <= week_number <= self.max_weeks:
+            return self.days[week_number - 1][day_of_week - 2]
+        return self.first_monday + timedelta(days=7 * (week_number - 1) + day_of_week - 2)
+
+    def week_of(self, day: date) -> Optional[int]:
+        if day < self.first_monday:
+            return None
+        return (day - self.first_monday).days // 7 + 1
+
+
+def parse_school_year(school_year: Optional[str]) -> Optional[int]:
+    """
+    "2025-2026" -> 2025; None nếu không đúng định dạng
+    """
+    if not school_year:
+        return None
+    match = _SCHOOL_YEAR_PATTERN.match(school_year)
+    if not match or int(match.group(2)) != int(match.group(1)) + 1:
+        return None
+    return int(match.group(1))
+
+
+def current_school_year(today: Optional[date] = None) -> int:
+    today = today or date.today()
+    if (today.month, today.day) < (settings.SCHOOL_YEAR_START_MONTH, settings.SCHOOL_YEAR_START_DAY):
+        return today.year - 1
+    return today.year
+
+
+def school_year_start(school_year: Optional[str] = None, today: Optional[date] = None) -> date:
+    """
+    Ngày bắt đầu năm học: lấy từ SCHOOL_YEAR_START_DATES nếu có cấu hình riêng,
+    nếu không thì ngày mặc định (SCHOOL_YEAR_START_MONTH/DAY) của năm bắt đầu.
+    school_year dạng "2025-2026"; để trống thì dùng năm học hiện tại.
+    """
+    start_year = parse_school_year(school_year)
+    if start_year is None:
+        start_year = current_school_year(today)
+
+    configured = settings.SCHOOL_YEAR_START_DATES.get(f"{start_year}-{start_year + 1}")
+    if configured:
+        return datetime.strptime(configured, "%Y-%m-%d").date()
+    return date(start_year, settings.SCHOOL_YEAR_START_MONTH, settings.SCHOOL_YEAR_START_DAY)
+
+
+@lru_cache(maxsize=64)
+def get_school_year_calendar(start_date: date, max_weeks: int = DEFAULT_MAX_WEEKS) -> SchoolYearCalendar:
+    return SchoolYearCalendar(start_date, max_weeks)
 
 
 def get_week_dates(year: int, week_number: int, start_date: datetime = None) -> tuple:
     if start_date is None:
-        start_date = datetime(year, 9, 1)
-    
-    first_monday = start_date
-    while first_monday.weekday() != 0:
-        first_monday += timedelta(days=1)
-    
-    week_start = first_monday + timedelta(weeks=week_number - 1)
-    week_end = week_start + timedelta(days=4)
-    
-    return week_start, week_end
+        start_date = datetime(year, settings.SCHOOL_YEAR_START_MONTH, settings.SCHOOL_YEAR_START_DAY)
 
+    calendar = get_school_year_calendar(start_date.date() if isinstance(start_date, datetime) else start_date)
+    week_start, week_end = calendar.week_dates(week_number)
 
-def format_vietnamese_date(date: datetime) -> str:
-    return f"{date.day} / {date.month} / {date.year}"
+    return (
+        datetime.combine(week_start, datetime.min.time()),
+        datetime.combine(week_end, datetime.min.time()),
+    )
 
 
+def format_vietnamese_date(date: datetime) -> str:
+    return f"{date.day} / {date.month} / {date.year}"
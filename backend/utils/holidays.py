@@ -1,6 +1,107 @@
-from datetime import date
-from typing import List, Dict
+from collections import namedtuple
+from datetime import date, timedelta
+from typing import List, Dict, Optional, Iterable
+
 from models import Holiday
+from core.cache import UserScopedCache
+from core.config import settings
+from utils.date_utils import get_school_year_calendar, school_year_start
+
+HolidayEntry = namedtuple("HolidayEntry", "holiday_id holiday_name moved_to_date")
+
+
+class HolidayCalendar:
+    """
+    Chỉ mục ngày -> ngày nghỉ cho một khoảng thời gian (thường là một năm học).
+    Khoảng ngày, ngày lẻ/chẵn và giới hạn theo tuần được mở rộng sẵn khi dựng,
+    tra cứu một ngày là O(1). Nếu nhiều ngày nghỉ trùng một ngày, ngày nghỉ đứng trước thắng.
+    """
+
+    def __init__(self, start: date, end: date, days: Dict[date, HolidayEntry]):
+        self.start = start
+        self.end = end
+        self._days = days
+
+    @classmethod
+    def build(
+        cls,
+        holidays: Iterable[Holiday],
+        start: date,
+        end: date,
+        first_monday: Optional[date] = None,
+    ) -> "HolidayCalendar":
+        """
+        first_monday: thứ 2 của tuần 1, dùng cho ngày nghỉ chỉ áp dụng trong một tuần
+        """
+        days: Dict[date, HolidayEntry] = {}
+        for h in holidays:
+            if h.start_date and h.end_date:
+                first, last = max(h.start_date, start), min(h.end_date, end)
+            elif h.holiday_date and start <= h.holiday_date <= end:
+                first = last = h.holiday_date
+            else:
+                continue
+
+            entry = HolidayEntry(
+                h.id, h.holiday_name, h.moved_to_date if h.is_moved else None
+            )
+            day = first
+            while day <= last:
+                if (
+                    not (h.is_odd_day and day.day % 2 == 0)
+                    and not (h.is_even_day and day.day % 2 == 1)
+                    and _in_week(day, h.week_number, first_monday)
+                ):
+                    days.setdefault(day, entry)
+                day += timedelta(days=1)
+
+        return cls(start, end, days)
+
+    def get(self, day: date) -> Optional[HolidayEntry]:
+        return self._days.get(day)
+
+    def __contains__(self, day: date) -> bool:
+        return day in self._days
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+
+def _in_week(day: date, week_number: Optional[int], first_monday: Optional[date]) -> bool:
+    if not week_number:
+        return True
+    if first_monday is None or day < first_monday:
+        return False
+    return (day - first_monday).days // 7 + 1 == week_number
+
+
+holiday_calendar_cache = UserScopedCache(
+    "holiday_calendar",
+    max_entries=settings.YEAR_PLAN_CACHE_SIZE,
+    ttl_seconds=settings.YEAR_PLAN_CACHE_TTL_SECONDS,
+)
+
+
+def get_holiday_calendar(
+    db, user_id: int, start: date, end: date, first_monday: Optional[date] = None
+) -> HolidayCalendar:
+    """
+    HolidayCalendar của user cho khoảng [start, end], cache tới khi bảng holidays thay đổi
+    """
+    def build() -> HolidayCalendar:
+        holidays = (
+            db.query(Holiday)
+            .filter(Holiday.user_id == user_id)
+            .order_by(Holiday.id)
+            .all()
+        )
+        return HolidayCalendar.build(holidays, start, end, first_monday)
+
+    return holiday_calendar_cache.get_or_build((user_id, start, end, first_monday), build)
+
+
+def invalidate_holiday_calendar(user_id: int) -> None:
+    holiday_calendar_cache.invalidate(user_id)
 
 
 def get_vietnam_holidays(year: int) -> List[Dict[str, any]]:
@@ -46,19 +147,12 @@ def create_default_holidays(db, user_id: int, year: int = None):
     if year is None:
         year = datetime.now().year
     
-    existing_holidays = db.query(Holiday).filter(
-        Holiday.user_id == user_id,
-        Holiday.holiday_date >= date(year, 1, 1),
-        Holiday.holiday_date <= date(year, 12, 31),
-    ).all()
-    
-    existing_dates = {h.holiday_date for h in existing_holidays}
-    
     default_holidays = get_vietnam_holidays(year)
     new_holidays = []
     
     for holiday_data in default_holidays:
-        if holiday_data["date"] not in existing_dates:
+        # Bỏ qua ngày đã nghỉ sẵn (kể cả nằm trong khoảng nghỉ do user tạo)
+        if holiday_data["date"] not in _calendar_containing(db, user_id, holiday_data["date"]):
             new_holiday = Holiday(
                 user_id=user_id,
                 holiday_date=holiday_data["date"],
@@ -70,7 +164,21 @@ def create_default_holidays(db, user_id: int, year: int = None):
     if new_holidays:
         db.bulk_save_objects(new_holidays)
         db.commit()
+        invalidate_holiday_calendar(user_id)
     
     return len(new_holidays)
 
 
+def _calendar_containing(db, user_id: int, day: date) -> HolidayCalendar:
+    """
+    HolidayCalendar của năm học chứa day, cùng khoảng và first_monday như ReportEngine
+    để ngày nghỉ theo số tuần được tính giống lịch báo giảng
+    """
+    for start_year in (day.year - 1, day.year):
+        calendar = get_school_year_calendar(school_year_start(f"{start_year}-{start_year + 1}"))
+        if calendar.first_monday <= day <= calendar.end_date:
+            return get_holiday_calendar(
+                db, user_id, calendar.first_monday, calendar.end_date, calendar.first_monday
+            )
+    # Ngoài năm học (nghỉ hè, trước tuần 1): ngày nghỉ theo số tuần không áp dụng
+    return get_holiday_calendar(db, user_id, date(day.year, 1, 1), date(day.year, 12, 31))
@@ -0,0 +1,29 @@
+import re
+import unicodedata
+from typing import List
+
+# Chữ và số liền nhau, "_" là dấu tách từ như tokenizer unicode61 của FTS5
+_TOKEN_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Chữ có dấu tiếng Việt (chữ thường) và chữ không dấu tương ứng, dùng cho translate() của Postgres
+VIETNAMESE_ACCENTED = (
+    "àáảãạăằắẳẵặâầấẩẫậèéẻẽẹêềếểễệìíỉĩịòóỏõọôồốổỗộơờớởỡợùúủũụưừứửữựỳýỷỹỵđ"
+)
+VIETNAMESE_PLAIN = (
+    "aaaaaaaaaaaaaaaaaeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyyd"
+)
+
+
+def normalize_vietnamese(text: str) -> str:
+    """
+    Chữ thường, bỏ dấu tiếng Việt ("Tiếng Việt - Đọc" -> "tieng viet - doc")
+    """
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFD", text.lower())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.replace("đ", "d")
+
+
+def search_tokens(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(normalize_vietnamese(text))
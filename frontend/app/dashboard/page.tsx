@@ -280,11 +280,11 @@ export default function DashboardPage() {
   const handleFileUpload = async (type: 'tkb' | 'ctgd', file: File) => {
     try {
       if (type === 'tkb') {
-        await uploadAPI.uploadTKB(file)
-        alert('Upload TKB thành công!')
+        const result = await uploadAPI.uploadTKB(file)
+        alert(result?.unchanged ? 'File TKB không thay đổi so với lần upload trước' : 'Upload TKB thành công!')
       } else {
-        await uploadAPI.uploadCTGD(file)
-        alert('Upload CTGD thành công!')
+        const result = await uploadAPI.uploadCTGD(file)
+        alert(result?.unchanged ? 'File CTGD không thay đổi so với lần upload trước' : 'Upload CTGD thành công!')
       }
       loadActiveWeek()
       loadSubjects()
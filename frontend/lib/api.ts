@@ -112,7 +112,7 @@ export const uploadAPI = {
     const response = await api.post(`${API_V1_PREFIX}/upload/tkb`, formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
     })
-    return response.data
+    return waitForUploadJob(response.data.id)
   },
   uploadCTGD: async (file: File, classId?: number, subject?: string) => {
     const formData = new FormData()
@@ -126,25 +126,62 @@ export const uploadAPI = {
     const response = await api.post(`${API_V1_PREFIX}/upload/ctgd`, formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
     })
+    return waitForUploadJob(response.data.id)
+  },
+  getUploadJob: async (jobId: string) => {
+    const response = await api.get(`${API_V1_PREFIX}/upload/jobs/${jobId}`)
     return response.data
   },
 }
 
+// Server xử lý upload nền: hỏi trạng thái job tới khi xong, lỗi thì ném theo dạng lỗi axios
+const UPLOAD_POLL_INTERVAL_MS = 1000
+
+async function waitForUploadJob(jobId: string) {
+  while (true) {
+    const job = await uploadAPI.getUploadJob(jobId)
+    if (job.status === 'completed') {
+      return job.result
+    }
+    if (job.status === 'error') {
+      throw { response: { data: { detail: job.error } }, formattedMessage: job.error }
+    }
+    await new Promise((resolve) => setTimeout(resolve, UPLOAD_POLL_INTERVAL_MS))
+  }
+}
+
 export const weeklyReportAPI = {
   getWeeklyReport: async (weekNumber: number, classId?: number) => {
     const params = classId ? { class_id: classId } : {}
     const response = await api.get(`${API_V1_PREFIX}/weekly-report/${weekNumber}`, { params })
     return response.data
   },
+  getWeeklyReportRange: async (startWeek: number, endWeek: number, classId?: number) => {
+    const params: any = { start_week: startWeek, end_week: endWeek }
+    if (classId) params.class_id = classId
+    const response = await api.get(`${API_V1_PREFIX}/weekly-report/range`, { params })
+    return response.data
+  },
   saveWeeklyReport: async (weekNumber: number, logs: any[], classId?: number) => {
     const data = classId ? { logs, class_id: classId } : { logs }
     const response = await api.post(`${API_V1_PREFIX}/weekly-report/${weekNumber}/save`, data)
     return response.data
   },
+  patchWeeklyReport: async (weekNumber: number, cells: any[], classId?: number) => {
+    const data = classId ? { cells, class_id: classId } : { cells }
+    const response = await api.patch(`${API_V1_PREFIX}/weekly-report/${weekNumber}`, data)
+    return response.data
+  },
   getLessonsBySubject: async (subjectName: string) => {
     const response = await api.get(`${API_V1_PREFIX}/weekly-report/lessons/${encodeURIComponent(subjectName)}`)
     return response.data
   },
+  searchLessons: async (query: string, subjectName?: string, limit: number = 20) => {
+    const params: any = { q: query, limit }
+    if (subjectName) params.subject_name = subjectName
+    const response = await api.get(`${API_V1_PREFIX}/weekly-report/lessons/search`, { params })
+    return response.data
+  },
   exportPDF: async (weekNumber: number, classId?: number) => {
     const params = classId ? { class_id: classId } : {}
     const response = await api.get(`${API_V1_PREFIX}/weekly-report/${weekNumber}/export/pdf`, {
@@ -201,6 +238,29 @@ export const weeklyReportAPI = {
   },
 }
 
+export const exportJobAPI = {
+  createJob: async (data: { kind: 'pdf' | 'excel' | 'excel_all'; start_week: number; end_week: number; class_id?: number; class_ids?: number[] }) => {
+    const response = await api.post(`${API_V1_PREFIX}/exports`, data)
+    return response.data
+  },
+  getJob: async (jobId: string) => {
+    const response = await api.get(`${API_V1_PREFIX}/exports/${jobId}`)
+    return response.data
+  },
+  downloadJob: async (jobId: string, filename: string) => {
+    const response = await api.get(`${API_V1_PREFIX}/exports/${jobId}/download`, {
+      responseType: 'blob',
+    })
+    const url = window.URL.createObjectURL(new Blob([response.data]))
+    const link = document.createElement('a')
+    link.href = url
+    link.setAttribute('download', filename)
+    document.body.appendChild(link)
+    link.click()
+    link.remove()
+  },
+}
+
 export const holidayAPI = {
   getHolidays: async () => {
     const response = await api.get(`${API_V1_PREFIX}/holidays`)